@@ -1,20 +1,64 @@
-from fastapi import FastAPI, Request
-from src.services.compare_service import run_comparison
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from src.services.job_queue import get_job_queue
+from src.services.webhook_handler import handle_github_webhook
+from src.utils.tracing import render_metrics
 
 app = FastAPI()
 
 
-@app.post("/compare")
+@app.post("/compare", status_code=202)
 async def compare_api(request: Request):
     """
     Accepts JSON body:
     {
         "git_repo": "<GitHub Repo URL>",
-        "swagger": "<Swagger JSON path or URL>"
+        "swagger": "<Swagger JSON path or URL>",
+        "commit": "<optional commit SHA>",
+        "base_url": "<optional URL of the running service to test>",
+        "incremental": <optional bool, re-check only endpoints changed since the last run>,
+        "load": <optional {"duration_s", "rate", "concurrency"}, replay the cases under load
+                 and report x-sla-* budget breaches>
     }
+    Queues the comparison and returns its job ID; poll GET /jobs/{id}.
     """
     body = await request.json()
     git_repo = body.get("git_repo")
     swagger_source = body.get("swagger")
+    commit = body.get("commit")
 
-    return run_comparison(repo_url=git_repo, swagger_source=swagger_source)
+    options = {"base_url": body["base_url"]} if body.get("base_url") else {}
+    if body.get("incremental"):
+        options["incremental"] = True
+    load = body.get("load") or {}
+    if load.get("duration_s"):
+        options["load_duration"] = float(load["duration_s"])
+        if load.get("rate"):
+            options["load_rate"] = float(load["rate"])
+        if load.get("concurrency"):
+            options["load_concurrency"] = int(load["concurrency"])
+    job = get_job_queue().submit(git_repo, swagger_source, commit=commit, **options)
+    return {"job_id": job["id"], "status": job["status"], "deduplicated": job["deduplicated"]}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a queued comparison, with the summary once it has completed."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@app.post("/webhook/github", status_code=202)
+async def github_webhook(request: Request):
+    """GitHub push webhook; bursts of pushes are coalesced per repository."""
+    if request.headers.get("X-GitHub-Event", "push") != "push":
+        return {"status": "ignored"}
+    return handle_github_webhook(await request.json())
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage durations and counters in the Prometheus text exposition format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
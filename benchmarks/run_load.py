@@ -0,0 +1,82 @@
+"""
+Offline check of load-testing mode against a local stand-in service.
+
+    python -m benchmarks.run_load --files 6 --duration 5 --rate 200
+
+Every operation of a synthetic spec gets an x-sla-p95-ms budget, and the
+stand-in target holds back every --slow-every'th route longer than that
+budget. The generated cases are replayed under load and the reported
+sla_breaches must be exactly the slowed routes. Results are written as
+JSON (see --output).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check load-testing mode against a local stand-in service.")
+    parser.add_argument("--files", type=int, default=6, help="synthetic source files")
+    parser.add_argument("--routes-per-file", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load")
+    parser.add_argument("--rate", type=float, help="requests per second (default: closed loop)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="x-sla-p95-ms put on every operation")
+    parser.add_argument("--slow-every", type=int, default=4, help="slow down every n-th route")
+    parser.add_argument("--output", help="results file (default benchmarks/results/load_<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output or os.path.join(
+        REPO_ROOT, "benchmarks", "results", f"load_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"))
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    from benchmarks.synthetic import generate_workload
+    from benchmarks.target import TargetServer
+    from src.loader.spec_index import SpecIndex
+    from src.services.load_test import LoadRunner
+
+    with tempfile.TemporaryDirectory(prefix="divergence-load-") as workdir:
+        workload = generate_workload(workdir, args.files, args.routes_per_file, args.seed, rates={})
+    spec = workload["spec"]
+    for operations in spec["paths"].values():
+        for operation in operations.values():
+            operation["x-sla-p95-ms"] = args.budget_ms
+    index = SpecIndex(spec)
+
+    routes = workload["backend_routes"]
+    slow = {route: 2 * args.budget_ms / 1000 for route in routes[::args.slow_every]}
+    testcases = [{"endpoint": path.replace("{item_id}", "1"), "method": method, "expected_status": 200}
+                 for method, path in routes]
+
+    with TargetServer(routes, delays=slow) as target:
+        report = LoadRunner(target.base_url, args.duration, args.rate, args.concurrency, index).run(testcases)
+
+    breached = sorted((b["method"], b["path"]) for b in report["sla_breaches"])
+    result = {
+        "suite": "load",
+        "created_at": datetime.now().isoformat(),
+        "params": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count()},
+        # Exactly the slowed routes must breach; anything else means the measurement is off
+        "correct": breached == sorted(slow) and not report["sla_unchecked"],
+        "report": report,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"⏱️ {report['requests']} requests at {report['achieved_rate']} req/s, "
+          f"p95={report['latency_ms'].get('p95')}ms, {len(breached)}/{len(slow)} slowed routes breached")
+    print(f"✅ Load results saved at: {output} (correct={result['correct']})")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+End-to-end benchmark of the comparison pipeline on a synthetic workload.
+
+Runs fully offline: the backend repo, spec, model and HTTP target are all
+generated locally. Usage, from the repository root:
+
+    python -m benchmarks.run_pipeline --files 60 --routes-per-file 20 --repeat 3
+
+Each repetition times the same stages run_comparison goes through. The
+first repetition starts from empty caches; later ones reuse them, as a
+redeployed server would. Results are written as JSON (see --output).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ("checkout", "load_swagger", "extraction", "comparison", "test_generation", "execution",
+          "postman_generation")
+
+
+@contextmanager
+def _timed(timings, stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - started, 6)
+
+
+def _init_git_repo(path):
+    env = dict(os.environ, GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@localhost",
+               GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@localhost")
+    for args in (["init", "-q"], ["add", "-A"], ["commit", "-qm", "synthetic workload"]):
+        subprocess.run(["git", *args], cwd=path, env=env, check=True)
+
+
+def run_once(workload, spec_path, target_url, use_llm, enrich=False):
+    """One pass over every pipeline stage; returns ({stage: seconds}, counts)."""
+    from src.ai.generate_testcases import generate_test_cases_from_divergence
+    from src.ai.predict_divergence import compare_api_contract
+    from src.generator.postman_generator import generate_collection_from_testcases
+    from src.loader.load_backend_code import SOURCE_EXTENSIONS, extract_routes_ai
+    from src.loader.spec_index import load_spec_index
+    from src.services.run_tests import execute_generated_tests
+    from src.utils.git_utils import checkout_worktree
+
+    timings = {}
+    started = time.perf_counter()
+    with _timed(timings, "checkout"):
+        worktree = checkout_worktree(workload["repo"], sparse_extensions=SOURCE_EXTENSIONS)
+        repo_path = worktree.__enter__()
+    try:
+        with _timed(timings, "load_swagger"):
+            index = load_spec_index(spec_path)
+        with _timed(timings, "extraction"):
+            routes = extract_routes_ai(repo_path)
+    finally:
+        worktree.__exit__(None, None, None)
+
+    with _timed(timings, "comparison"):
+        report = compare_api_contract(index, routes, use_llm=use_llm)
+    with _timed(timings, "test_generation"):
+        testcases = generate_test_cases_from_divergence(report, spec=index, enrich=enrich)
+    os.makedirs("reports/testcases", exist_ok=True)
+    testcases_path = os.path.join("reports", "testcases", f"testcases_{time.time_ns()}.json")
+    with open(testcases_path, "w") as f:
+        json.dump(testcases, f)
+    with _timed(timings, "execution"):
+        execution_path = execute_generated_tests(testcases_path, base_url=target_url, spec=index)
+    with _timed(timings, "postman_generation"):
+        generate_collection_from_testcases(testcases_path, base_url=target_url)
+    timings["total"] = round(time.perf_counter() - started, 6)
+
+    with open(execution_path, "r") as f:
+        execution = json.load(f)
+    counts = {
+        "routes_extracted": len(routes),
+        "divergences": {key: len(value) for key, value in report.items()},
+        "testcases": len(testcases) if isinstance(testcases, list) else 0,
+        "results": {status: sum(1 for r in execution["results"] if r["result"] == status)
+                    for status in ("PASS", "FAIL", "ERROR")},
+    }
+    return timings, counts
+
+
+def summarize(runs):
+    summary = {}
+    for stage in STAGES + ("total",):
+        values = [run["timings"][stage] for run in runs]
+        warm = values[1:]
+        summary[stage] = {
+            "cold": values[0],
+            "warm_median": round(statistics.median(warm), 6) if warm else None,
+            "min": min(values),
+            "max": max(values),
+        }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the API divergence pipeline offline.")
+    parser.add_argument("--files", type=int, default=30, help="synthetic source files")
+    parser.add_argument("--routes-per-file", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--divergence-rate", type=float, default=0.05,
+                        help="probability of each planted divergence kind per route")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stub model latency in seconds")
+    parser.add_argument("--llm-compare", action="store_true", help="also run the LLM schema comparison pass")
+    parser.add_argument("--llm-testcases", action="store_true",
+                        help="also ask the model for test cases on top of the template generator")
+    parser.add_argument("--no-compaction", action="store_true",
+                        help="send prompts uncompacted (PROMPT_COMPACTION=0) to measure the difference")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="results file (default benchmarks/results/pipeline_<timestamp>.json)")
+    parser.add_argument("--keep-workdir", action="store_true")
+    args = parser.parse_args(argv)
+
+    from benchmarks.stub_llm import install
+    stub = install(latency=args.llm_latency)
+    if args.no_compaction:
+        # Read when src.ai.prompt_compaction is first imported, inside run_once
+        os.environ["PROMPT_COMPACTION"] = "0"
+
+    workdir = tempfile.mkdtemp(prefix="divergence-bench-")
+    output = args.output or os.path.join(REPO_ROOT, "benchmarks", "results",
+                                         f"pipeline_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    output = os.path.abspath(output)
+    cwd = os.getcwd()
+    # Caches, reports and worktrees all live under the working directory
+    os.chdir(workdir)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    try:
+        from benchmarks.synthetic import generate_workload
+        from benchmarks.target import TargetServer
+
+        rates = {kind: args.divergence_rate for kind in ("missing", "extra", "method", "param")}
+        workload = generate_workload(workdir, args.files, args.routes_per_file, args.seed, rates)
+        _init_git_repo(workload["repo"])
+        spec_path = os.path.join(workdir, "openapi.json")
+        with open(spec_path, "w") as f:
+            json.dump(workload["spec"], f)
+
+        runs = []
+        with TargetServer(workload["backend_routes"]) as target:
+            for i in range(args.repeat):
+                calls_before, chars_before = stub.calls, stub.prompt_chars
+                timings, counts = run_once(workload, spec_path, target.base_url, args.llm_compare,
+                                           args.llm_testcases)
+                counts["llm_calls"] = stub.calls - calls_before
+                counts["llm_prompt_chars"] = stub.prompt_chars - chars_before
+                runs.append({"iteration": i, "cache": "cold" if i == 0 else "warm",
+                             "timings": timings, "counts": counts})
+                print(f"⏱️ run {i}: " + ", ".join(f"{stage}={timings[stage]:.3f}s" for stage in STAGES))
+
+        found = runs[0]["counts"]["divergences"]
+        result = {
+            "suite": "pipeline",
+            "created_at": datetime.now().isoformat(),
+            "params": vars(args),
+            "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                            "cpu_count": os.cpu_count()},
+            "workload": {"routes": workload["routes"], "files": args.files,
+                         "expected_divergences": workload["expected"]},
+            # Planted divergences must be reported exactly, or the timings are meaningless
+            "correct": all(found.get(k) == v for k, v in workload["expected"].items()),
+            "runs": runs,
+            "summary": summarize(runs),
+        }
+    finally:
+        os.chdir(cwd)
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"✅ Benchmark results saved at: {output} (correct={result['correct']})")
+    return result
+
+
+if __name__ == "__main__":
+    main()
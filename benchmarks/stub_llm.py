@@ -0,0 +1,79 @@
+import ast
+import json
+import re
+
+from src.ai.llm_client import LLMClient, StubProvider, set_client
+
+EXPRESS_ROUTE = re.compile(r"""(?:app|router)\.(get|post|put|patch|delete)\(\s*['"]([^'"]+)['"]""")
+PATH_PARAM = re.compile(r"\{[^}]+\}")
+STREAM_CHUNK_CHARS = 256
+FILE_HEADER = re.compile(r"^[ \t]*### FILE: (.+)$", re.MULTILINE)
+
+
+def answer(prompt):
+    """
+    Answer the project's three prompts (route extraction, schema
+    divergence, test generation) from the prompt itself, so the pipeline
+    gets realistic model output without any network access.
+    """
+    if "Extract all API endpoints" in prompt:
+        return json.dumps(_routes_from_prompt(prompt))
+    if "API divergence report" in prompt:
+        return json.dumps(_testcases_from_prompt(prompt))
+    if "API contract validation expert" in prompt:
+        return json.dumps({"response_mismatches": [], "status_code_mismatches": []})
+    return "[]"
+
+
+def _routes_from_prompt(prompt):
+    codebase = prompt.split("Codebase:", 1)[-1]
+    headers = list(FILE_HEADER.finditer(codebase))
+    if headers:
+        # Compacted prompts list files as plain text under path headers
+        ends = [h.start() for h in headers[1:]] + [len(codebase)]
+        shard = [{"path": h.group(1), "content": codebase[h.end():end]} for h, end in zip(headers, ends)]
+    else:
+        try:
+            shard = ast.literal_eval(codebase.strip())
+        except (ValueError, SyntaxError):
+            return []
+    routes = []
+    for file in shard:
+        for method, path in EXPRESS_ROUTE.findall(file["content"]):
+            routes.append({"method": method.upper(), "path": path, "file": file["path"]})
+    return routes
+
+
+def _concrete(path):
+    return PATH_PARAM.sub("1", path)
+
+
+def _testcases_from_prompt(prompt):
+    try:
+        report = json.loads(prompt.split("Here is the divergence report:", 1)[1].strip())
+    except (IndexError, ValueError):
+        return []
+    cases = []
+    for item in report.get("missing_endpoints", []):
+        path = _concrete(item["path"])
+        cases.append({"endpoint": path, "method": item["method"], "purpose": "Documented endpoint is missing",
+                      "steps": [f"Send {item['method']} request to {path}", "Expect status 404 Not Found"]})
+    for item in report.get("extra_endpoints", []):
+        path = _concrete(item["path"])
+        method = item["method"] if item["method"] != "ANY" else "GET"
+        cases.append({"endpoint": path, "method": method, "purpose": "Undocumented endpoint is reachable",
+                      "steps": [f"Send {method} request to {path}", "Expect status 200"]})
+    for item in report.get("method_mismatches", []):
+        path = _concrete(item["path"])
+        for method in item["backend_methods"]:
+            cases.append({"endpoint": path, "method": method, "purpose": "Method differs from the spec",
+                          "steps": [f"Send {method} request to {path}", "Expect status 200"]})
+    return cases
+
+
+def install(latency: float = 0.0) -> StubProvider:
+    """Route every model call through a StubProvider answering with `answer`; returns the provider."""
+    provider = StubProvider(answer=answer, latency=latency, chunk_chars=STREAM_CHUNK_CHARS)
+    # Offline runs measure the pipeline, not the API quota
+    set_client(LLMClient(provider, requests_per_minute=0, max_retries=0))
+    return provider
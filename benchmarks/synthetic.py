@@ -0,0 +1,213 @@
+import os
+import random
+
+FRAMEWORKS = ("fastapi", "flask", "express")
+METHODS = ("GET", "POST", "PUT", "DELETE")
+
+# Divergence kinds planted in the synthetic repo, keyed by the report
+# category the engine is expected to file them under
+DIVERGENCE_KINDS = {
+    "missing": "missing_endpoints",
+    "extra": "extra_endpoints",
+    "method": "method_mismatches",
+    "param": "parameter_mismatches",
+}
+
+
+def _param_syntax(framework, name):
+    if framework == "flask":
+        return f"<int:{name}>"
+    if framework == "express":
+        return f":{name}"
+    return "{" + name + "}"
+
+
+def _plan_routes(files, routes_per_file, rates, seed):
+    """Decide every route and which divergence, if any, it carries."""
+    rng = random.Random(seed)
+    plan = []
+    for i in range(files):
+        framework = FRAMEWORKS[i % len(FRAMEWORKS)]
+        for j in range(routes_per_file):
+            method = METHODS[j % len(METHODS)]
+            has_param = j % 2 == 1
+            kind = None
+            roll = rng.random()
+            for name in DIVERGENCE_KINDS:
+                if name == "param" and not has_param:
+                    continue
+                rate = rates.get(name, 0.0)
+                if roll < rate:
+                    kind = name
+                    break
+                roll -= rate
+            plan.append({"file": i, "framework": framework, "resource": f"{framework}{i}",
+                         "index": j, "method": method, "has_param": has_param, "divergence": kind})
+    return plan
+
+
+def _route_path(route, framework, param_name="item_id"):
+    path = f"/api/{route['resource']}/res{route['index']}"
+    if route["has_param"]:
+        path += "/" + _param_syntax(framework, param_name)
+    return path
+
+
+def _backend_method(route):
+    if route["divergence"] == "method":
+        return "PATCH" if route["method"] != "PATCH" else "GET"
+    return route["method"]
+
+
+def _fastapi_source(resource, routes):
+    lines = [
+        "from fastapi import APIRouter",
+        "from pydantic import BaseModel",
+        "",
+        f'router = APIRouter(prefix="/api/{resource}")',
+        "",
+        "",
+        "class Item(BaseModel):",
+        "    id: int",
+        "    name: str",
+        "",
+    ]
+    for route in routes:
+        method = _backend_method(route)
+        param = "item_id_renamed" if route["divergence"] == "param" else "item_id"
+        path = _route_path(route, "fastapi", param)[len(f"/api/{resource}"):]
+        args = [f"{param}: int"] if route["has_param"] else []
+        if method in ("POST", "PUT", "PATCH"):
+            args.append("payload: Item")
+        lines += [
+            "",
+            f'@router.{method.lower()}("{path}")',
+            f"def handler_{route['index']}({', '.join(args)}):",
+            f'    return {{"id": 1, "name": "{resource}"}}',
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def _flask_source(resource, routes):
+    lines = [
+        "from flask import Blueprint, jsonify",
+        "",
+        f'bp = Blueprint("{resource}", __name__, url_prefix="/api/{resource}")',
+        "",
+    ]
+    for route in routes:
+        method = _backend_method(route)
+        param = "item_id_renamed" if route["divergence"] == "param" else "item_id"
+        path = _route_path(route, "flask", param)[len(f"/api/{resource}"):]
+        args = param if route["has_param"] else ""
+        lines += [
+            "",
+            f'@bp.route("{path}", methods=["{method}"])',
+            f"def handler_{route['index']}({args}):",
+            f'    return jsonify({{"id": 1, "name": "{resource}"}})',
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def _express_source(resource, routes):
+    lines = [
+        "const express = require('express');",
+        "const app = express();",
+        "",
+    ]
+    for route in routes:
+        method = _backend_method(route)
+        param = "item_id_renamed" if route["divergence"] == "param" else "item_id"
+        lines += [
+            f"app.{method.lower()}('{_route_path(route, 'express', param)}', (req, res) => {{",
+            f"  res.json({{ id: 1, name: '{resource}' }});",
+            "});",
+            "",
+        ]
+    lines.append("module.exports = app;")
+    return "\n".join(lines)
+
+
+SOURCES = {
+    "fastapi": ("app", ".py", _fastapi_source),
+    "flask": ("app", ".py", _flask_source),
+    "express": ("web", ".js", _express_source),
+}
+
+
+def _spec_operation(route):
+    operation = {
+        "operationId": f"{route['resource']}_{route['index']}",
+        "responses": {
+            "200": {
+                "description": "OK",
+                "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}},
+            },
+            "404": {"description": "Not found"},
+        },
+    }
+    if route["has_param"]:
+        operation["parameters"] = [{"name": "item_id", "in": "path", "required": True,
+                                    "schema": {"type": "integer"}}]
+    # Only FastAPI handlers declare a body model the extractor can see
+    if route["framework"] == "fastapi" and route["method"] in ("POST", "PUT"):
+        operation["requestBody"] = {
+            "required": True,
+            "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}},
+        }
+    return operation
+
+
+def generate_workload(root: str, files: int = 30, routes_per_file: int = 10, seed: int = 0,
+                      rates: dict = None) -> dict:
+    """
+    Write a synthetic backend under root/repo and return its matching spec.
+
+    Files rotate between FastAPI, Flask and Express. Each route gets a
+    unique path, so every planted divergence lands in exactly one report
+    category and the expected counts can be checked after comparison.
+
+    Returns {"repo", "spec", "expected", "backend_routes"} where
+    backend_routes are (method, path template) pairs the target serves.
+    """
+    rates = rates if rates is not None else {"missing": 0.05, "extra": 0.05, "method": 0.05, "param": 0.05}
+    plan = _plan_routes(files, routes_per_file, rates, seed)
+    repo = os.path.join(root, "repo")
+
+    by_file = {}
+    for route in plan:
+        by_file.setdefault(route["file"], []).append(route)
+    for i, routes in by_file.items():
+        framework = routes[0]["framework"]
+        subdir, ext, render = SOURCES[framework]
+        backend = [r for r in routes if r["divergence"] != "missing"]
+        os.makedirs(os.path.join(repo, subdir), exist_ok=True)
+        with open(os.path.join(repo, subdir, f"{framework}_{i}{ext}"), "w") as f:
+            f.write(render(routes[0]["resource"], backend))
+
+    paths = {}
+    for route in plan:
+        if route["divergence"] == "extra":
+            continue
+        paths.setdefault(_route_path(route, "fastapi"), {})[route["method"].lower()] = _spec_operation(route)
+    spec = {
+        "openapi": "3.0.0",
+        "info": {"title": "Synthetic benchmark API", "version": "1.0.0"},
+        "paths": paths,
+        "components": {"schemas": {"Item": {
+            "type": "object",
+            "required": ["id", "name"],
+            "properties": {"id": {"type": "integer"}, "name": {"type": "string"}},
+        }}},
+    }
+
+    expected = {category: 0 for category in DIVERGENCE_KINDS.values()}
+    for route in plan:
+        if route["divergence"]:
+            expected[DIVERGENCE_KINDS[route["divergence"]]] += 1
+    backend_routes = [(_backend_method(r), _route_path(r, "fastapi"))
+                      for r in plan if r["divergence"] != "missing"]
+    return {"repo": repo, "spec": spec, "expected": expected, "backend_routes": backend_routes,
+            "routes": len(plan)}
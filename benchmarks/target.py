@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils.path_templates import PathTemplateTrie, normalize_path
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed ACKs
+    # add ~40ms to every keep-alive response and swamp the measurement
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        methods, _ = self.server.routes.match(self.path.split("?", 1)[0])
+        if methods is None or self.command not in methods:
+            status, body = 404, {"detail": "Not Found"}
+        else:
+            status, body = 200, {"id": 1, "name": "item"}
+            if methods[self.command]:
+                time.sleep(methods[self.command])
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class TargetServer:
+    """
+    Local HTTP target serving exactly the synthetic backend's routes.
+
+    Known (method, path) pairs answer 200 with a spec-conformant body and
+    everything else 404, so the runners see the divergences the workload
+    planted. `delays` maps (method, path) pairs to seconds each of their
+    responses is held back, to stand in for slow endpoints under load.
+    Runs on an ephemeral port in a daemon thread.
+    """
+
+    def __init__(self, backend_routes, host: str = "127.0.0.1", port: int = 0, delays: dict = None):
+        delays = {(method, normalize_path(path)[0]): delay for (method, path), delay in (delays or {}).items()}
+        routes = PathTemplateTrie()
+        for method, path in backend_routes:
+            template, _ = normalize_path(path)
+            methods = routes.get(template)
+            if methods is None:
+                methods = {}
+                routes.insert(template, methods)
+            methods[method] = delays.get((method, template), 0)
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.routes = routes
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
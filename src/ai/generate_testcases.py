@@ -1,11 +1,14 @@
 import json
 import re
-import google.generativeai as genai
 import os
+from src.ai.llm_cache import cached_generate, cached_generate_stream
+from src.ai.llm_client import get_client
+from src.ai.prompt_compaction import ENABLED as COMPACTION, compact_json, compact_report, record_savings
+from src.ai.streaming import STREAMING, ArrayStream, is_complete_array
+from src.generator.testcase_templates import generate_testcases
 
-# Configure Gemini model
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("models/gemini-2.5-flash")
+# Ask Gemini for extra cases on top of the deterministic ones
+LLM_ENRICHMENT = os.getenv("TESTCASE_LLM_ENRICH", "0") == "1"
 
 def extract_json_from_response(raw_output: str):
     """
@@ -30,13 +33,57 @@ def extract_json_from_response(raw_output: str):
         return {"error": "Model output not JSON", "raw": raw_output}
 
 
-def generate_test_cases_from_divergence(divergence_report):
+def generate_test_cases_from_divergence(divergence_report, use_llm_cache: bool = True, spec=None,
+                                        enrich: bool = None, on_case=None):
     """
-    Generates test cases using Gemini based on the divergence report.
-    Input: divergence_report (dict)
-    Output: list of generated test cases or error
+    Generates test cases for the divergence report.
+    With `spec` (a SpecIndex) the cases are expanded deterministically from
+    the report and the spec's schemas; Gemini is only asked for additional
+    cases when `enrich` is set (default: off, TESTCASE_LLM_ENRICH=1 turns it on).
+    Without a spec, Gemini generates every case as before.
+    on_case(case) is called for each case as soon as it exists; with
+    LLM_STREAMING, model cases arrive while the model is still generating.
+    Input: divergence_report (dict), use_llm_cache (reuse a cached response for the same prompt)
+    Output: list of generated test cases or error; an error after some cases
+    were streamed carries them under "test_cases"
     """
 
+    if spec is None:
+        return _generate_with_llm(divergence_report, use_llm_cache, on_case)
+
+    test_cases = generate_testcases(divergence_report, spec)
+    if on_case:
+        for case in test_cases:
+            on_case(case)
+    enrich = LLM_ENRICHMENT if enrich is None else enrich
+    if enrich:
+        known = {(c["method"], c["endpoint"], c.get("purpose")) for c in test_cases}
+
+        def add(case):
+            if not isinstance(case, dict) or not case.get("endpoint"):
+                return
+            key = (case.get("method", "GET").upper(), case["endpoint"], case.get("purpose"))
+            if key not in known:
+                known.add(key)
+                case = dict(case, source="llm")
+                test_cases.append(case)
+                if on_case:
+                    on_case(case)
+
+        extra = _generate_with_llm(divergence_report, use_llm_cache, add)
+        if not isinstance(extra, list):
+            kept = len(extra.get("test_cases", []))
+            print(f"⚠️ LLM enrichment {'stopped after ' + str(kept) + ' cases' if kept else 'skipped'}: "
+                  f"{extra.get('error')}")
+    return test_cases
+
+
+def _generate_with_llm(divergence_report, use_llm_cache: bool = True, on_case=None):
+    report_json = json.dumps(divergence_report, indent=2)
+    if COMPACTION:
+        compacted = compact_json(compact_report(divergence_report))
+        record_savings(report_json, compacted)
+        report_json = compacted
     prompt = f"""
     You are an expert QA automation engineer. Given the following API divergence report, 
     generate a set of test cases in pure JSON format (no markdown, no text).
@@ -60,23 +107,34 @@ def generate_test_cases_from_divergence(divergence_report):
     ]
 
     Here is the divergence report:
-    {json.dumps(divergence_report, indent=2)}
+    {report_json}
     """
 
+    streamed = []
     try:
-        response = model.generate_content(prompt)
-        raw_output = ""
-
-        # Gemini API response format can differ based on SDK version
-        if hasattr(response, "text"):
-            raw_output = response.text
-        elif hasattr(response, "candidates"):
-            raw_output = response.candidates[0].content.parts[0].text
-        else:
-            raw_output = str(response)
+        if STREAMING:
+            stream = ArrayStream(cached_generate_stream(get_client(), prompt, use_cache=use_llm_cache,
+                                                        validate=is_complete_array))
+            for case in stream:
+                streamed.append(case)
+                if on_case:
+                    on_case(case)
+            if stream.parser.started:
+                return streamed
+            # No JSON array at all: report the raw output like the non-streaming path
+            return extract_json_from_response(stream.text)
 
+        raw_output = cached_generate(get_client(), prompt, use_cache=use_llm_cache,
+                                     validate=lambda text: isinstance(extract_json_from_response(text), list))
         test_cases = extract_json_from_response(raw_output)
+        if on_case and isinstance(test_cases, list):
+            for case in test_cases:
+                on_case(case)
         return test_cases
 
     except Exception as e:
-        return {"error": f"Failed to generate test cases: {str(e)}"}
+        error = {"error": f"Failed to generate test cases: {str(e)}"}
+        if streamed:
+            # Cases already passed to on_case are kept alongside the error
+            error["test_cases"] = streamed
+        return error
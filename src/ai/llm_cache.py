@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from src.ai.sharding import estimate_tokens
+from src.utils import tracing
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm", "responses.sqlite"))
+MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+MAX_DISK_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+# Disk hits buffer their access times and write them in one batch
+ACCESS_FLUSH_EVERY = 64
+
+
+def cache_key(model_name: str, prompt: str, params: dict = None) -> str:
+    """Content address of one generation: model, prompt and generation params."""
+    payload = json.dumps({"model": model_name, "prompt": prompt, "params": params or {}},
+                         sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache of raw model output.
+
+    An in-process LRU answers repeated prompts within one run; a SQLite
+    file shares responses across runs and processes (CI retries, webhook
+    redeliveries) with TTL expiry and size-based eviction of the least
+    recently used rows.
+
+    Reads stay read-only: access times of disk hits are buffered and
+    written in batches, and the table size is tracked incrementally and
+    only summed again when it looks over budget. Expired rows are dropped
+    on lookup and swept during eviction.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, memory_entries: int = MEMORY_ENTRIES,
+                 max_bytes: int = MAX_DISK_BYTES, ttl: int = TTL_SECONDS):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_bytes = 0
+        self._accessed = {}
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _conn(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._db.commit()
+            self._disk_bytes = self._total_bytes(self._db)
+        return self._db
+
+    @staticmethod
+    def _total_bytes(db) -> int:
+        return db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _flush_accessed(self, db):
+        if self._accessed:
+            db.executemany("UPDATE responses SET accessed = ? WHERE key = ?",
+                           [(when, key) for key, when in self._accessed.items()])
+            self._accessed.clear()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return self._memory[key]
+            now = time.time()
+            db = self._conn()
+            row = db.execute("SELECT value, created, size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    db.commit()
+                    self._disk_bytes -= row[2]
+                self.counters["misses"] += 1
+                return None
+            self._accessed[key] = now
+            if len(self._accessed) >= ACCESS_FLUSH_EVERY:
+                self._flush_accessed(db)
+                db.commit()
+            self._remember(key, row[0])
+            self.counters["disk_hits"] += 1
+            return row[0]
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self._remember(key, value)
+            now = time.time()
+            db = self._conn()
+            size = len(value.encode("utf-8"))
+            replaced = db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._accessed.pop(key, None)
+            self._disk_bytes += size - (replaced[0] if replaced else 0)
+            self.counters["writes"] += 1
+            if self._disk_bytes > self.max_bytes:
+                self._evict(db, now)
+            db.commit()
+
+    def invalidate(self, key: str):
+        """Drop one entry from both tiers, e.g. a response that turned out unusable."""
+        with self._lock:
+            self._memory.pop(key, None)
+            db = self._conn()
+            row = db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            db.commit()
+            self._accessed.pop(key, None)
+            self._disk_bytes -= row[0] if row else 0
+
+    def _evict(self, db, now):
+        # Other processes share the file, so the running total is only an estimate
+        self._flush_accessed(db)
+        expired = db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,)).rowcount
+        self.counters["evictions"] += max(expired, 0)
+        total = self._disk_bytes = self._total_bytes(db)
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            if total <= self.max_bytes:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            self.counters["evictions"] += 1
+        self._disk_bytes = total
+
+    def stats(self) -> dict:
+        lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        hits = lookups - self.counters["misses"]
+        return dict(self.counters, hit_rate=round(hits / lookups, 3) if lookups else 0.0)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> LLMCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
+
+
+def cached_generate(client, prompt: str, use_cache: bool = True, validate=None, **params) -> str:
+    """
+    Return the text of client.generate(prompt, **params) (an
+    llm_client.LLMClient), served from the shared cache when the same
+    model/prompt/params were seen before. Token estimates and cache hits
+    are recorded on the running trace span.
+
+    validate(text) -> bool decides whether a response is worth keeping:
+    text it rejects (prose, unparseable JSON) is returned but not cached,
+    and a cached entry it rejects is dropped and generated again.
+    """
+    tracing.record(llm_prompts=1, prompt_tokens=estimate_tokens(prompt))
+    if not use_cache:
+        text = client.generate(prompt, **params)
+        tracing.record(llm_calls=1, response_tokens=estimate_tokens(text or ""))
+        return text
+    cache = get_cache()
+    key = cache_key(client.model_name, prompt, params)
+    text = cache.get(key)
+    if text is not None and validate is not None and not validate(text):
+        cache.invalidate(key)
+        text = None
+    if text is None:
+        text = client.generate(prompt, **params)
+        tracing.record(llm_calls=1, llm_cache_misses=1)
+        if text and (validate is None or validate(text)):
+            cache.put(key, text)
+    else:
+        tracing.record(llm_cache_hits=1)
+    tracing.record(response_tokens=estimate_tokens(text or ""))
+    return text
+
+
+def cached_generate_stream(client, prompt: str, use_cache: bool = True, validate=None, **params):
+    """
+    Like cached_generate, but yields the response text chunk by chunk as
+    the model streams it (client.stream). A cached response is yielded as
+    a single chunk. The full text is cached once the stream ends and
+    validate(text) accepts it; an interrupted stream is not cached.
+    """
+    tracing.record(llm_prompts=1, prompt_tokens=estimate_tokens(prompt))
+    cache = get_cache() if use_cache else None
+    key = cache_key(client.model_name, prompt, params)
+    text = cache.get(key) if cache else None
+    if text is not None and validate is not None and not validate(text):
+        cache.invalidate(key)
+        text = None
+    if text is not None:
+        tracing.record(llm_cache_hits=1, response_tokens=estimate_tokens(text))
+        yield text
+        return
+
+    chunks = []
+    for piece in client.stream(prompt, **params):
+        chunks.append(piece)
+        yield piece
+    text = "".join(chunks)
+    tracing.record(llm_calls=1, response_tokens=estimate_tokens(text))
+    if cache:
+        tracing.record(llm_cache_misses=1)
+        if text and (validate is None or validate(text)):
+            cache.put(key, text)
@@ -0,0 +1,272 @@
+"""
+One shared, rate-limited client for every model call.
+
+Providers only know how to send a prompt; the client adds what the calls
+need around them: a token-bucket limit on requests per minute, a cap on
+concurrent requests, a per-request timeout, and retries with jittered
+exponential backoff on 429, 5xx, timeouts and dropped connections.
+
+    LLM_PROVIDER=gemini   google.generativeai, imported on first use (default)
+    LLM_PROVIDER=stub     deterministic offline answers with LLM_STUB_LATENCY seconds of latency
+
+The Gemini SDK is not imported until the first request, so importing the
+pipeline (server start-up, CLIs) does not pay for it.
+"""
+import os
+import random
+import re
+import threading
+import time
+
+from src.utils import tracing
+
+PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "models/gemini-2.5-flash")
+REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+BURST = int(os.getenv("LLM_BURST", "10"))
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF", "1"))
+MAX_BACKOFF_SECONDS = 60.0
+STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMError(RuntimeError):
+    pass
+
+
+class RetryableLLMError(LLMError):
+    """Raised by providers for failures worth retrying (rate limited, overloaded)."""
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (RetryableLLMError, TimeoutError, ConnectionError)):
+        return True
+    # google.api_core exceptions carry the HTTP status as `code`
+    status = getattr(error, "code", None)
+    status = getattr(error, "status_code", None) if not isinstance(status, int) else status
+    return status in RETRY_STATUSES
+
+
+def response_text(response) -> str:
+    # Gemini API response format can differ based on SDK version
+    if hasattr(response, "text"):
+        return response.text
+    if hasattr(response, "candidates"):
+        return response.candidates[0].content.parts[0].text
+    return str(response)
+
+
+# -- providers ----------------------------------------------------------------
+class GeminiProvider:
+    """google.generativeai, imported and configured on the first request."""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, api_key: str = None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                try:
+                    import google.generativeai as genai
+                except ImportError as e:
+                    raise LLMError("google-generativeai is not installed; install it or set LLM_PROVIDER=stub") from e
+                genai.configure(api_key=self.api_key or os.getenv("GEMINI_API_KEY"))
+                self._model = genai.GenerativeModel(self.model_name)
+            return self._model
+
+    def generate(self, prompt: str, timeout: float, **params) -> str:
+        response = self._get_model().generate_content(prompt, request_options={"timeout": timeout}, **params)
+        return response_text(response)
+
+    def stream(self, prompt: str, timeout: float, **params):
+        chunks = self._get_model().generate_content(prompt, stream=True, request_options={"timeout": timeout},
+                                                    **params)
+        for chunk in chunks:
+            try:
+                piece = response_text(chunk)
+            except ValueError:
+                # Chunks without text parts (e.g. safety metadata only)
+                continue
+            if piece:
+                yield piece
+
+
+_JSON_SHAPE = re.compile(r"JSON[^\[{]*([\[{])")
+
+
+def empty_json_answer(prompt: str) -> str:
+    """An empty value of the JSON shape the prompt asks for ([] or {})."""
+    match = _JSON_SHAPE.search(prompt)
+    return "{}" if match and match.group(1) == "{" else "[]"
+
+
+class StubProvider:
+    """
+    Deterministic offline provider.
+
+    `answer(prompt)` produces the response text (by default an empty JSON
+    value of the requested shape) after `latency` seconds; streamed
+    responses arrive in `chunk_chars` pieces with the latency spread across
+    them. `calls` and `prompt_chars` count what was sent.
+    """
+
+    name = "stub"
+
+    def __init__(self, answer=empty_json_answer, latency: float = STUB_LATENCY, chunk_chars: int = 256,
+                 model_name: str = "stub"):
+        self.answer = answer
+        self.latency = latency
+        self.chunk_chars = chunk_chars
+        self.model_name = model_name
+        self.calls = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+
+    def _count(self, prompt):
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(prompt)
+
+    def generate(self, prompt: str, timeout: float = None, **params) -> str:
+        self._count(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.answer(prompt)
+
+    def stream(self, prompt: str, timeout: float = None, **params):
+        self._count(prompt)
+        text = self.answer(prompt)
+        pieces = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)] or [""]
+        for piece in pieces:
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            yield piece
+
+
+PROVIDERS = {"gemini": GeminiProvider, "stub": StubProvider}
+
+
+# -- client -------------------------------------------------------------------
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average and bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class LLMClient:
+    """
+    Sends prompts through a provider with rate limiting, bounded
+    concurrency, timeouts and retries. A requests_per_minute of 0 disables
+    the rate limit. Streams are only retried before their first chunk;
+    a stream that fails part-way raises, since its text was already used.
+    """
+
+    def __init__(self, provider, requests_per_minute: float = REQUESTS_PER_MINUTE, burst: int = BURST,
+                 max_concurrency: int = MAX_CONCURRENCY, timeout: float = TIMEOUT,
+                 max_retries: int = MAX_RETRIES, backoff: float = BACKOFF_SECONDS):
+        self.provider = provider
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._bucket = TokenBucket(requests_per_minute / 60, burst) if requests_per_minute > 0 else None
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+
+    @property
+    def model_name(self) -> str:
+        return self.provider.model_name
+
+    def _throttle(self):
+        if self._bucket is not None:
+            waited = self._bucket.acquire()
+            if waited:
+                tracing.record(llm_throttled_ms=round(waited * 1000, 3))
+
+    def _backoff(self, attempt: int, error: Exception) -> bool:
+        """Sleep before the next attempt; False when the error is final."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return False
+        # Full jitter: concurrent callers hit by the same 429 spread out instead of retrying in step
+        delay = random.uniform(0, min(MAX_BACKOFF_SECONDS, self.backoff * 2 ** attempt))
+        tracing.record(llm_retries=1)
+        print(f"⚠️ Model request failed ({error}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        time.sleep(delay)
+        return True
+
+    def generate(self, prompt: str, **params) -> str:
+        attempt = 0
+        while True:
+            self._throttle()
+            try:
+                with self._slots:
+                    return self.provider.generate(prompt, self.timeout, **params)
+            except Exception as e:
+                if not self._backoff(attempt, e):
+                    raise
+            attempt += 1
+
+    def stream(self, prompt: str, **params):
+        """Yield the response text in chunks as the provider produces them."""
+        attempt = 0
+        while True:
+            self._throttle()
+            started = False
+            try:
+                with self._slots:
+                    for piece in self.provider.stream(prompt, self.timeout, **params):
+                        started = True
+                        yield piece
+                return
+            except Exception as e:
+                if started or not self._backoff(attempt, e):
+                    raise
+            attempt += 1
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    """The process-wide client, built from LLM_PROVIDER on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if PROVIDER not in PROVIDERS:
+                raise LLMError(f"Unknown LLM_PROVIDER '{PROVIDER}'; expected one of {sorted(PROVIDERS)}")
+            _client = LLMClient(PROVIDERS[PROVIDER]())
+        return _client
+
+
+def set_client(client: LLMClient):
+    """Replace the shared client, e.g. with a StubProvider for offline runs."""
+    global _client
+    with _client_lock:
+        _client = client
@@ -1,57 +1,108 @@
-import google.generativeai as genai
-import os
 import json
+from src.ai.llm_cache import cached_generate
+from src.ai.llm_client import get_client
+from src.ai.prompt_compaction import ENABLED as COMPACTION, compact_json, project_responses, project_routes, \
+    record_savings
+from src.ai.sharding import shard_mapping, fan_out
+from src.services.divergence_engine import as_index, compute_divergence, matched_operations
+from src.utils.path_templates import normalize_path
 
-# Load API key from environment
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Categories the local engine cannot decide without reading handler bodies
+LLM_CATEGORIES = ("response_mismatches", "status_code_mismatches")
 
-def compare_api_contract(swagger_spec: dict, backend_routes: list) -> dict:
+
+def compare_api_contract(swagger_spec, backend_routes: list, use_llm: bool = False,
+                         use_llm_cache: bool = True) -> dict:
     """
-    Uses Gemini Pro to compare Swagger API spec with backend routes.
+    Compares Swagger API spec with backend routes.
+    Endpoint, method, parameter and request-body divergences are computed
+    locally; with use_llm, Gemini is asked only about response schemas and
+    status codes of the operations implemented on both sides, reusing cached
+    responses unless use_llm_cache is False.
+    swagger_spec may be a raw spec dict or a compiled SpecIndex.
     Produces a structured JSON report of divergences.
     """
 
+    index = as_index(swagger_spec)
+    report = compute_divergence(index, backend_routes)
+    if not use_llm:
+        return report
+
+    pairs = matched_operations(index, backend_routes)
+    if not pairs:
+        return report
+
+    resolved = {}
+    for path, method in pairs:
+        operation = index.operation(method, path)
+        responses = {code: index.resolve_schema(resp) for code, resp in operation["responses"].items()}
+        resolved.setdefault(path, {})[method.lower()] = {"responses": responses}
+    routes = [r for r in backend_routes if not isinstance(r, str)]
+    wanted, table = resolved, None
+    if COMPACTION:
+        # Only response schemas matter here; named schemas are sent once per shard
+        wanted, table = project_responses(index, pairs)
+        routes = project_routes(routes)
+        record_savings(json.dumps(resolved, separators=(",", ":")) + json.dumps(backend_routes, separators=(",", ":")),
+                       compact_json(wanted) + compact_json(table.schemas) + compact_json(routes))
+
+    def ask(operations_shard):
+        templates = {normalize_path(path)[0] for path in operations_shard}
+        # Sorted so cached and freshly extracted routes produce the same prompt
+        shard_routes = sorted((r for r in routes if normalize_path(r.get("path", ""))[0] in templates),
+                              key=lambda r: (r.get("path") or "", r.get("method") or ""))
+        schemas = table.subset(operations_shard) if table else None
+        return _ask_schema_divergence(operations_shard, shard_routes, use_llm_cache, schemas)
+
+    # Very large specs are split by path so each prompt fits the model context
+    for residual in fan_out(shard_mapping(wanted), ask):
+        for key in LLM_CATEGORIES:
+            report[key].extend(residual.get(key, []))
+    return report
+
+
+def _ask_schema_divergence(operations: dict, routes: list, use_llm_cache: bool = True,
+                           schemas: dict = None) -> dict:
+    shared = f"""
+    Shared Schemas (referenced as {{"$ref": "<name>"}}):
+    {compact_json(schemas)}
+    """ if schemas else ""
     prompt = f"""
     You are an API contract validation expert.
 
-    Compare the following:
-    - Swagger/OpenAPI spec (FULL JSON below)
-    - Backend implemented routes (Python list below)
-
-    Identify:
-    1. Missing endpoints (in backend but present in Swagger)
-    2. Extra endpoints (present in backend but not in Swagger)
-    3. Method mismatches
-    4. Parameter mismatches
-    5. Request body mismatches
-    6. Response schema mismatches
-    7. Status code mismatches
+    For each operation below, compare the documented responses with the
+    backend routes and identify:
+    1. Response schema mismatches
+    2. Status code mismatches
 
     Provide the output in STRICT JSON with keys:
     {{
-        "missing_endpoints": [],
-        "extra_endpoints": [],
-        "method_mismatches": [],
-        "parameter_mismatches": [],
-        "request_body_mismatches": [],
         "response_mismatches": [],
         "status_code_mismatches": []
     }}
 
-    Swagger Spec:
-    {json.dumps(swagger_spec, indent=2)}
-
+    Swagger Operations:
+    {json.dumps(operations, separators=(",", ":"))}
+    {shared}
     Backend Routes:
-    {json.dumps(backend_routes, indent=2)}
+    {json.dumps(routes, separators=(",", ":"))}
     """
 
-    model = genai.GenerativeModel("models/gemini-2.5-flash")
-    response = model.generate_content(prompt)
+    text = cached_generate(get_client(), prompt, use_cache=use_llm_cache, validate=_is_json_object)
+    return _parse_json_object(text)
+
 
+def _parse_json_object(text: str):
     try:
-        return json.loads(response.text)
+        return json.loads(text)
     except Exception:
-        text = response.text
         start = text.find("{")
         end = text.rfind("}") + 1
         return json.loads(text[start:end])
+
+
+def _is_json_object(text: str) -> bool:
+    try:
+        return isinstance(_parse_json_object(text), dict)
+    except ValueError:
+        return False
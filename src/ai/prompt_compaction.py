@@ -0,0 +1,214 @@
+"""
+Shrinks what the prompts embed before it is sent to the model.
+
+Specs are projected down to the fields a question needs, with prose,
+examples and vendor extensions removed and each named schema emitted once
+and referenced by name. Source files lose comments, docstrings and blank
+lines, and files that cannot define routes (tests, vendored and build
+output, files with no routing call) are not sent at all. Every
+compaction records estimated tokens before and after on the current span.
+"""
+import io
+import json
+import os
+import re
+import tokenize
+
+from src.ai.sharding import estimate_tokens
+from src.loader.route_scanner import ROUTE_HINT
+from src.utils import tracing
+
+ENABLED = os.getenv("PROMPT_COMPACTION", "1") == "1"
+
+# Human-facing keywords that never change whether a payload matches a schema
+PROSE_KEYS = {"description", "summary", "title", "example", "examples", "externalDocs", "deprecated",
+              "xml", "$comment", "operationId", "tags"}
+# Keywords whose values are maps keyed by user-chosen names (a property may be called "description")
+NAMED_MAPS = {"properties", "patternProperties", "definitions", "$defs"}
+
+FILE_HEADER = "### FILE: "
+# Test, vendored and build trees anywhere; docs only at the root, since
+# src/api/spec/ or app/docs/ can hold real handlers
+_NON_ROUTE_PATH = re.compile(
+    r"(^|/)(tests?|__tests__|testdata|fixtures|mocks?|vendor|third_party|node_modules|dist|build)/|^docs?/|"
+    r"(^|/)test_[^/]*\.py$|_test\.(py|go)$|\.(test|spec)\.[jt]sx?$|Tests?\.java$|\.min\.js$|\.d\.ts$")
+_C_STYLE = re.compile(r"""//[^\n]*|/\*.*?\*/|("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)""",
+                      re.DOTALL)
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def compact_json(value) -> str:
+    """JSON with no optional whitespace and stable key order."""
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def record_savings(before: str, after: str) -> tuple:
+    """Record estimated prompt tokens before/after compaction; returns the pair."""
+    tokens = (estimate_tokens(before), estimate_tokens(after))
+    tracing.record(compaction_tokens_before=tokens[0], compaction_tokens_after=tokens[1])
+    return tokens
+
+
+class SchemaTable:
+    """
+    Named schemas referenced from a projected spec, each stored once.
+
+    Prose, examples and x- extensions are dropped. Local $refs are rewritten
+    to {"$ref": "<name>"} and their targets added to the table, instead of
+    being inlined at every use the way SpecIndex.resolve_schema does.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.schemas = {}
+        self._names = {}
+
+    def _name(self, pointer: str) -> str:
+        if pointer not in self._names:
+            name = pointer.rsplit("/", 1)[-1]
+            self._names[pointer] = pointer[2:] if name in self._names.values() else name
+        return self._names[pointer]
+
+    def project(self, node, _named: bool = False):
+        if isinstance(node, list):
+            return [self.project(v) for v in node]
+        if not isinstance(node, dict):
+            return node
+        if not _named and "$ref" in node:
+            pointer = node["$ref"]
+            if not pointer.startswith("#/"):
+                return {"$ref": pointer}
+            known = pointer in self._names
+            name = self._name(pointer)
+            if not known:
+                # Placeholder first so recursive schemas terminate
+                self.schemas[name] = None
+                self.schemas[name] = self.project(self.index.ref(pointer) or {})
+            return {"$ref": name}
+        projected = {}
+        for key, value in node.items():
+            if _named:
+                projected[key] = self.project(value)
+            elif key not in PROSE_KEYS and not key.startswith("x-"):
+                projected[key] = self.project(value, key in NAMED_MAPS and isinstance(value, dict))
+        return projected
+
+    def subset(self, node) -> dict:
+        """The schemas reachable from a projected fragment, for a prompt shard."""
+        wanted, stack = {}, [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, list):
+                stack.extend(current)
+            elif isinstance(current, dict):
+                name = current.get("$ref")
+                if isinstance(name, str) and name in self.schemas and name not in wanted:
+                    wanted[name] = self.schemas[name]
+                    stack.append(wanted[name])
+                stack.extend(v for k, v in current.items() if k != "$ref")
+        return dict(sorted(wanted.items()))
+
+
+def _response_schema(index, response):
+    response = index.deref(response) or {}
+    if "schema" in response:
+        return response["schema"]
+    content = response.get("content") or {}
+    media = content.get("application/json") or next(iter(content.values()), None) or {}
+    return media.get("schema")
+
+
+def project_responses(index, pairs: list):
+    """
+    {path: {method: {"responses": {code: schema}}}} for the (path, method)
+    pairs, plus the SchemaTable their $refs point into.
+    """
+    table = SchemaTable(index)
+    operations = {}
+    for path, method in pairs:
+        operation = index.operation(method, path)
+        responses = {code: table.project(_response_schema(index, response))
+                     for code, response in sorted(operation["responses"].items())}
+        operations.setdefault(path, {})[method.lower()] = {"responses": responses}
+    return operations, table
+
+
+def project_routes(routes: list) -> list:
+    """Backend routes without the file/line bookkeeping the model does not need."""
+    return [{k: v for k, v in route.items() if k not in ("file", "line")} if isinstance(route, dict) else route
+            for route in routes]
+
+
+def compact_report(report: dict) -> dict:
+    """A divergence report without empty categories."""
+    return {key: value for key, value in report.items() if value}
+
+
+# -- source code ------------------------------------------------------------
+def is_route_candidate(rel_path: str, content: str) -> bool:
+    """False for tests, vendored or generated files and files with no routing call."""
+    if _NON_ROUTE_PATH.search(rel_path.replace(os.sep, "/")):
+        return False
+    return bool(ROUTE_HINT.search(content))
+
+
+def _strip_python(source: str) -> str:
+    """Remove comments and docstrings; the source is returned unchanged if it does not tokenize."""
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return source
+    line_offsets = [0]
+    for line in source.splitlines(keepends=True):
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    def offset(position):
+        return line_offsets[position[0] - 1] + position[1]
+
+    cuts = []
+    statement_start = True
+    for i, token in enumerate(tokens):
+        following = tokens[i + 1].type if i + 1 < len(tokens) else tokenize.ENDMARKER
+        # A string that is a whole statement of its own is a docstring
+        if token.type == tokenize.COMMENT or (
+                token.type == tokenize.STRING and statement_start
+                and following in (tokenize.NEWLINE, tokenize.ENDMARKER)):
+            cuts.append((offset(token.start), offset(token.end)))
+        if token.type not in (tokenize.NL, tokenize.COMMENT):
+            statement_start = token.type in (tokenize.INDENT, tokenize.DEDENT, tokenize.NEWLINE)
+
+    parts, position = [], 0
+    for start, end in cuts:
+        parts.append(source[position:start])
+        position = end
+    parts.append(source[position:])
+    return "".join(parts)
+
+
+def _strip_c_style(source: str) -> str:
+    """Remove // and /* */ comments outside string literals, and leading indentation."""
+    code = _C_STYLE.sub(lambda m: m.group(1) or "", source)
+    return "\n".join(line.strip() for line in code.splitlines())
+
+
+def strip_comments(rel_path: str, source: str) -> str:
+    if rel_path.endswith(".py"):
+        code = "\n".join(line.rstrip() for line in _strip_python(source).splitlines())
+    elif rel_path.endswith((".js", ".jsx", ".ts", ".tsx", ".java", ".go", ".kt", ".cs")):
+        code = _strip_c_style(source)
+    else:
+        return source
+    return _BLANK_LINES.sub("\n", code).strip() + "\n"
+
+
+def compact_files(files: list) -> list:
+    """Drop {"path", "content"} records that cannot define routes and strip the rest."""
+    kept = [dict(f, content=strip_comments(f["path"], f["content"]))
+            for f in files if is_route_candidate(f["path"], f["content"])]
+    record_savings("".join(f["content"] for f in files), "".join(f["content"] for f in kept))
+    return kept
+
+
+def render_files(files: list) -> str:
+    """Files as plain text under path headers, so newlines and quotes need no escaping."""
+    return "".join(f"{FILE_HEADER}{f['path']}\n{f['content'].rstrip()}\n" for f in files)
@@ -0,0 +1,103 @@
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from src.utils import tracing
+
+# Keep well below the model's context window to leave room for instructions and output
+DEFAULT_SHARD_TOKENS = int(os.getenv("LLM_SHARD_TOKENS", "120000"))
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+
+
+_WORDS = re.compile(r"\w+")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_INDENTATION = re.compile(r"\s{4,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate for code and JSON, roughly as a BPE tokenizer
+    splits them: one token per ~4 characters of a word, one per punctuation
+    mark, and one per 4 characters of whitespace runs (indentation), while
+    single separating spaces and newlines are free.
+    """
+    words = _WORDS.findall(text)
+    word_tokens = len(words) + (sum(map(len, words)) - len(words)) // 4
+    whitespace_tokens = sum(map(len, _INDENTATION.findall(text))) // 4
+    return 1 + word_tokens + len(_PUNCTUATION.findall(text)) + whitespace_tokens
+
+
+def shard_files(files: list, max_tokens: int = DEFAULT_SHARD_TOKENS) -> list:
+    """
+    Group {"path", "content"} records into token-budgeted shards.
+    Files from the same directory stay together where they fit, so the model
+    sees a module's router and handlers in one prompt. A single file larger
+    than the budget gets a shard of its own, truncated to the budget.
+    """
+    by_dir = {}
+    for f in sorted(files, key=lambda f: f["path"]):
+        by_dir.setdefault(os.path.dirname(f["path"]), []).append(f)
+
+    shards, current, used = [], [], 0
+    for group in by_dir.values():
+        group_tokens = sum(estimate_tokens(f["content"]) for f in group)
+        if current and used + group_tokens > max_tokens:
+            shards.append(current)
+            current, used = [], 0
+        for f in group:
+            tokens = estimate_tokens(f["content"])
+            if tokens > max_tokens:
+                if current:
+                    shards.append(current)
+                    current, used = [], 0
+                shards.append([dict(f, content=f["content"][: max_tokens * 4])])
+                continue
+            if current and used + tokens > max_tokens:
+                shards.append(current)
+                current, used = [], 0
+            current.append(f)
+            used += tokens
+    if current:
+        shards.append(current)
+    return shards
+
+
+def shard_mapping(mapping: dict, max_tokens: int = DEFAULT_SHARD_TOKENS) -> list:
+    """Split a dict (e.g. spec paths -> operations) into budgeted sub-dicts."""
+    shards, current, used = [], {}, 0
+    for key, value in mapping.items():
+        tokens = estimate_tokens(json.dumps({key: value}, separators=(",", ":")))
+        if current and used + tokens > max_tokens:
+            shards.append(current)
+            current, used = {}, 0
+        current[key] = value
+        used += tokens
+    if current:
+        shards.append(current)
+    return shards
+
+
+def fan_out(shards: list, fn, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> list:
+    """
+    Call fn(shard) for every shard with at most max_in_flight concurrent calls.
+    Results come back in shard order; the first failure is re-raised.
+    """
+    if len(shards) <= 1:
+        return [fn(shard) for shard in shards]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(shards)))) as pool:
+        return list(pool.map(tracing.propagate(fn), shards))
+
+
+def merge_routes(route_lists: list) -> list:
+    """Flatten per-shard route lists, de-duplicating on (method, path)."""
+    merged, seen = [], set()
+    for routes in route_lists:
+        for route in routes or []:
+            if not isinstance(route, dict):
+                continue
+            key = ((route.get("method") or "").upper(), route.get("path"))
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(route)
+    return merged
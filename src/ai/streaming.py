@@ -0,0 +1,136 @@
+import json
+import os
+
+# Consume model output chunk by chunk instead of waiting for the whole response
+STREAMING = os.getenv("LLM_STREAMING", "1") == "1"
+
+
+class JSONArrayParser:
+    """
+    Incremental parser for a JSON array arriving in arbitrary text chunks.
+
+    feed() returns the top-level items completed by each chunk. Text before
+    the opening '[' (prose, a ```json fence) is skipped. Items that fail to
+    parse are counted in `malformed` and skipped; an item still open when
+    the input ends is counted in `truncated`. Only the unfinished item is
+    buffered, so memory stays bounded by the largest single item.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self.malformed = 0
+        self.truncated = 0
+        self._buffer = ""
+        self._scan = 0
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _emit(self, text, items):
+        text = text.strip()
+        if not text:
+            return
+        try:
+            items.append(json.loads(text))
+        except ValueError:
+            self.malformed += 1
+
+    def feed(self, chunk: str) -> list:
+        items = []
+        buffer = self._buffer + chunk
+        i = self._scan
+        while i < len(buffer) and not self.finished:
+            ch = buffer[i]
+            if not self.started:
+                self.started = ch == "["
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+                if self._start is None:
+                    self._start = i
+            elif ch in "{[":
+                if self._start is None:
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # End of the top-level array; a pending scalar item ends here too
+                    if self._start is not None:
+                        self._emit(buffer[self._start:i], items)
+                        self._start = None
+                    self.finished = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._emit(buffer[self._start:i + 1], items)
+                        self._start = None
+            elif ch == "," and self._depth == 0:
+                if self._start is not None:
+                    self._emit(buffer[self._start:i], items)
+                    self._start = None
+            elif not ch.isspace() and self._start is None:
+                self._start = i
+            i += 1
+
+        # Keep only the unfinished item
+        keep = self._start if self._start is not None else i
+        self._buffer = buffer[keep:]
+        self._scan = i - keep
+        if self._start is not None:
+            self._start = 0
+        return items
+
+    def close(self):
+        """End of input: an item still open is dropped as truncated."""
+        if self._start is not None:
+            self.truncated += 1
+            self._start = None
+        self._buffer = ""
+
+
+class ArrayStream:
+    """
+    Iterate the items of a JSON array while its text chunks are still
+    arriving. After iteration, `text` holds the full response and
+    `parser` the malformed/truncated counts.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.parser = JSONArrayParser()
+        self._text = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self._text)
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            if not chunk:
+                continue
+            self._text.append(chunk)
+            if not self.parser.finished:
+                yield from self.parser.feed(chunk)
+        self.parser.close()
+        if self.parser.malformed or self.parser.truncated:
+            print(f"⚠️ Streamed JSON: skipped {self.parser.malformed} malformed and "
+                  f"{self.parser.truncated} truncated items")
+
+
+def is_complete_array(text: str) -> bool:
+    """
+    Whether text holds a whole JSON array whose items all parse, i.e. a
+    response worth caching; a stream cut short or with malformed items is not.
+    """
+    parser = JSONArrayParser()
+    parser.feed(text)
+    parser.close()
+    return parser.finished and not parser.malformed and not parser.truncated
@@ -2,6 +2,7 @@
 import json
 import os
 from datetime import datetime
+from urllib.parse import urlencode
 from uuid import uuid4
 
 def _pm_meta():
@@ -19,10 +20,14 @@ def testcase_to_pm_item(testcase, base_url="http://127.0.0.1:8000"):
         "host": [base_url.replace("http://", "").replace("https://", "")],
         "path": endpoint.strip("/").split("/") if endpoint.strip("/") else []
     }
+    if testcase.get("query"):
+        url["query"] = [{"key": k, "value": str(v)} for k, v in testcase["query"].items()]
+        url["raw"] += "?" + urlencode(testcase["query"])
 
     # Basic body: for POST/PUT use placeholder JSON (empty), can be enriched later
     body = None
-    if method in ("POST", "PUT", "PATCH"):
+    # Template cases omit "body" on purpose when testing a missing body
+    if method in ("POST", "PUT", "PATCH") and ("body" in testcase or "expected_status" not in testcase):
         body = {
             "mode": "raw",
             "raw": json.dumps(testcase.get("body", {})),
@@ -30,9 +35,14 @@ def testcase_to_pm_item(testcase, base_url="http://127.0.0.1:8000"):
         }
 
     # Add a test script in Postman to assert expected status code
+    explicit = testcase.get("expected_status")
     expected_status = 404 if any("404" in s for s in testcase.get("steps", [])) else None
     tests_script = ""
-    if expected_status:
+    if isinstance(explicit, list):
+        tests_script = f"pm.test('Status is one of {explicit}', function() {{ pm.expect(pm.response.code).to.be.oneOf({json.dumps(explicit)}); }});"
+    elif explicit is not None:
+        tests_script = f"pm.test('Status is {explicit}', function() {{ pm.response.to.have.status({int(explicit)}); }});"
+    elif expected_status:
         tests_script = f"pm.test('Status is {expected_status}', function() {{ pm.response.to.have.status({expected_status}); }});"
     else:
         # default: assert not 404
@@ -46,11 +56,7 @@ def testcase_to_pm_item(testcase, base_url="http://127.0.0.1:8000"):
                 {"key": "Content-Type", "value": "application/json"}
             ],
             "body": body,
-            "url": {
-                "raw": f"{base_url}{endpoint}",
-                "host": [base_url.replace("http://", "").replace("https://", "")],
-                "path": endpoint.strip("/").split("/") if endpoint.strip("/") else []
-            }
+            "url": url
         },
         "response": [],
         "event": [
@@ -82,7 +88,7 @@ def generate_collection_from_testcases(testcases_path, out_dir="reports/postman"
     for t in testcases:
         collection["item"].append(testcase_to_pm_item(t, base_url=base_url))
 
-    out_path = os.path.join(out_dir, f"collection_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    out_path = os.path.join(out_dir, f"collection_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f')}.json")
     with open(out_path, "w") as f:
         json.dump(collection, f, indent=2)
     print(f"✅ Postman collection generated at: {out_path}")
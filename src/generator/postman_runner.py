@@ -0,0 +1,164 @@
+"""
+Runs the Postman v2.1 collections written by postman_generator without Node.
+
+    python -m src.generator.postman_runner reports/postman/collection.json \
+        --junit reports/junit/postman-report.xml
+
+Items run concurrently over pooled keep-alive connections. Only the
+status-code assertions testcase_to_pm_item emits are understood; any other
+script line is reported as skipped rather than silently passed.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from xml.etree import ElementTree
+
+from src.services.test_executor import DEFAULT_PER_HOST_LIMIT, ExecutionEngine
+
+_TEST_NAME = re.compile(r"""pm\.test\(\s*(['"])(.*?)\1""")
+_ASSERTIONS = (
+    (re.compile(r"pm\.response\.to\.have\.status\(\s*(\d+)\s*\)"),
+     lambda m: (lambda code: code == int(m.group(1)))),
+    (re.compile(r"pm\.expect\(\s*pm\.response\.code\s*\)\.to\.not\.eql\(\s*(\d+)\s*\)"),
+     lambda m: (lambda code: code != int(m.group(1)))),
+    (re.compile(r"pm\.expect\(\s*pm\.response\.code\s*\)\.to\.(?:eql|equal)\(\s*(\d+)\s*\)"),
+     lambda m: (lambda code: code == int(m.group(1)))),
+    (re.compile(r"pm\.expect\(\s*pm\.response\.code\s*\)\.to\.be\.oneOf\(\s*(\[[\d,\s]*\])\s*\)"),
+     lambda m: (lambda code: code in json.loads(m.group(1)))),
+)
+
+
+def iter_items(items, prefix=""):
+    """Flatten folders into (name, item) pairs, keeping the folder path in the name."""
+    for item in items or []:
+        name = f"{prefix}{item.get('name', '')}"
+        if "item" in item:
+            yield from iter_items(item["item"], f"{name} / ")
+        elif "request" in item:
+            yield name, item
+
+
+def parse_assertions(item) -> list:
+    """[(test name, predicate or None)] for every test-script line; None means unsupported."""
+    assertions = []
+    for event in item.get("event") or []:
+        if event.get("listen") != "test":
+            continue
+        for line in (event.get("script") or {}).get("exec") or []:
+            if not line.strip():
+                continue
+            name_match = _TEST_NAME.search(line)
+            name = name_match.group(2) if name_match else line.strip()[:80]
+            predicate = None
+            for pattern, build in _ASSERTIONS:
+                match = pattern.search(line)
+                if match:
+                    predicate = build(match)
+                    break
+            assertions.append((name, predicate))
+    return assertions
+
+
+def _request_args(request: dict, base_url: str = None):
+    url = request.get("url")
+    raw = url.get("raw") if isinstance(url, dict) else url
+    if base_url:
+        # Point the collection at another deployment: swap scheme and host, keep path and query
+        parts = urlsplit(raw)
+        raw = base_url.rstrip("/") + parts.path + (f"?{parts.query}" if parts.query else "")
+    kwargs = {"headers": {h["key"]: h["value"] for h in request.get("header") or [] if not h.get("disabled")}}
+    body = request.get("body") or {}
+    if body.get("mode") == "raw" and body.get("raw") is not None:
+        kwargs["data"] = body["raw"].encode("utf-8")
+    return request.get("method", "GET").upper(), raw, kwargs
+
+
+def run_collection(collection: dict, base_url: str = None, concurrency: int = DEFAULT_PER_HOST_LIMIT,
+                   timeout: float = None) -> list:
+    """Execute every request; returns one result per item, in collection order."""
+    options = {"per_host_limit": concurrency}
+    if timeout:
+        options["timeout"] = timeout
+    engine = ExecutionEngine(**options)
+
+    def run_item(entry):
+        name, item = entry
+        method, url, kwargs = _request_args(item["request"], base_url)
+        result = {"name": name, "method": method, "url": url, "status": None, "time_s": 0.0,
+                  "error": None, "assertions": []}
+        try:
+            response, latency_ms = engine.send(method, url, **kwargs)
+            result["status"] = response.status_code
+            result["time_s"] = latency_ms / 1000
+        except Exception as e:
+            result["error"] = str(e)
+            return result
+        for test_name, predicate in parse_assertions(item):
+            outcome = "skipped" if predicate is None else "passed" if predicate(response.status_code) else "failed"
+            result["assertions"].append({"name": test_name, "outcome": outcome})
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(run_item, iter_items(collection.get("item"))))
+    finally:
+        engine.close()
+
+
+def write_junit(collection: dict, results: list, path: str, duration: float):
+    """Write a JUnit XML report with one testcase per collection item, like Newman's junit reporter."""
+    failures = sum(1 for r in results if any(a["outcome"] == "failed" for a in r["assertions"]))
+    errors = sum(1 for r in results if r["error"])
+    name = (collection.get("info") or {}).get("name", "Postman collection")
+    suites = ElementTree.Element("testsuites", name=name, tests=str(len(results)), time=f"{duration:.3f}")
+    suite = ElementTree.SubElement(suites, "testsuite", name=name, tests=str(len(results)),
+                                   failures=str(failures), errors=str(errors), time=f"{duration:.3f}")
+    for result in results:
+        case = ElementTree.SubElement(suite, "testcase", name=result["name"], classname=name,
+                                      time=f"{result['time_s']:.3f}")
+        if result["error"]:
+            ElementTree.SubElement(case, "error", message=result["error"], type="RequestError")
+            continue
+        failed = [a["name"] for a in result["assertions"] if a["outcome"] == "failed"]
+        if failed:
+            failure = ElementTree.SubElement(case, "failure", type="AssertionFailure",
+                                             message=f"{len(failed)} assertion(s) failed, got {result['status']}")
+            failure.text = "\n".join(failed)
+        elif result["assertions"] and all(a["outcome"] == "skipped" for a in result["assertions"]):
+            ElementTree.SubElement(case, "skipped", message="No supported assertions in test script")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    ElementTree.ElementTree(suites).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a generated Postman v2.1 collection.")
+    parser.add_argument("collection")
+    parser.add_argument("--junit", default=os.path.join("reports", "junit", "postman-report.xml"))
+    parser.add_argument("--base-url", help="override the host the collection was generated for")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_PER_HOST_LIMIT)
+    parser.add_argument("--timeout", type=float)
+    args = parser.parse_args(argv)
+
+    with open(args.collection, "r") as f:
+        collection = json.load(f)
+    started = time.perf_counter()
+    results = run_collection(collection, args.base_url, args.concurrency, args.timeout)
+    duration = time.perf_counter() - started
+    write_junit(collection, results, args.junit, duration)
+
+    failed = [r for r in results if r["error"] or any(a["outcome"] == "failed" for a in r["assertions"])]
+    for result in failed:
+        reason = result["error"] or f"got {result['status']}"
+        print(f"❌ {result['name']}: {reason}")
+    print(f"✅ {len(results) - len(failed)}/{len(results)} requests passed in {duration:.2f}s. "
+          f"JUnit report saved at: {args.junit}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
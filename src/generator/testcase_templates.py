@@ -0,0 +1,313 @@
+import re
+
+from src.utils.path_templates import normalize_path
+
+# Status codes accepted when a request is deliberately invalid: Flask and
+# most frameworks answer 400, FastAPI/pydantic answers 422
+VALIDATION_STATUSES = [400, 422]
+# A documented method the backend lacks is either unroutable or rejected
+UNSUPPORTED_METHOD_STATUSES = [404, 405]
+# Undocumented routes only have to exist; any success code will do
+REACHABLE_STATUSES = [200, 201, 202, 204]
+MAX_NEGATIVE_CASES_PER_OPERATION = 12
+MAX_SAMPLE_DEPTH = 6
+
+_SPEC_PARAM = re.compile(r"\{([^}]+)\}")
+_FORMAT_SAMPLES = {
+    "date-time": "2024-01-01T00:00:00Z",
+    "date": "2024-01-01",
+    "time": "00:00:00",
+    "email": "user@example.com",
+    "uuid": "00000000-0000-4000-8000-000000000000",
+    "uri": "https://example.com",
+    "url": "https://example.com",
+    "hostname": "example.com",
+    "ipv4": "127.0.0.1",
+    "ipv6": "::1",
+    "byte": "c2FtcGxl",
+    "password": "Secret123!",
+}
+
+
+def sample_value(schema, depth: int = 0):
+    """A valid value for a resolved JSON Schema, preferring the spec's own examples."""
+    if not isinstance(schema, dict) or depth > MAX_SAMPLE_DEPTH or "$ref" in schema:
+        return None
+    for key in ("example", "default", "const"):
+        if key in schema:
+            return schema[key]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    for key in ("allOf", "oneOf", "anyOf"):
+        if schema.get(key):
+            if key == "allOf":
+                merged = {}
+                for part in schema[key]:
+                    value = sample_value(part, depth + 1)
+                    if isinstance(value, dict):
+                        merged.update(value)
+                return merged
+            return sample_value(schema[key][0], depth + 1)
+
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((t for t in kind if t != "null"), None)
+    if kind is None:
+        kind = "object" if "properties" in schema else "array" if "items" in schema else "string"
+
+    if kind == "object":
+        properties = schema.get("properties") or {}
+        return {name: sample_value(sub, depth + 1) for name, sub in properties.items()}
+    if kind == "array":
+        item = sample_value(schema.get("items") or {}, depth + 1)
+        return [item] * max(1, schema.get("minItems") or 1)
+    if kind == "integer":
+        return _number_in_bounds(schema, 1, 1)
+    if kind == "number":
+        return _number_in_bounds(schema, 1.5, 0.5)
+    if kind == "boolean":
+        return True
+    text = _FORMAT_SAMPLES.get(schema.get("format"), "sample")
+    min_len, max_len = schema.get("minLength"), schema.get("maxLength")
+    if min_len and len(text) < min_len:
+        text = text + "x" * (min_len - len(text))
+    if max_len is not None and len(text) > max_len:
+        text = text[:max_len]
+    return text
+
+
+def _number_in_bounds(schema, default, step):
+    low, high = schema.get("minimum"), schema.get("maximum")
+    if isinstance(schema.get("exclusiveMinimum"), (int, float)) and not isinstance(schema["exclusiveMinimum"], bool):
+        low = schema["exclusiveMinimum"] + step
+    elif low is not None and schema.get("exclusiveMinimum") is True:
+        low = low + step
+    if low is not None:
+        return low
+    if high is not None:
+        return min(default, high - (step if schema.get("exclusiveMaximum") is True else 0))
+    return default
+
+
+def boundary_values(schema) -> list:
+    """
+    (label, value, valid) triples at and just beyond the schema's limits.
+    Only keywords the schema declares produce values.
+    """
+    if not isinstance(schema, dict):
+        return []
+    values = []
+    kind = schema.get("type")
+    if kind in ("integer", "number"):
+        step = 1 if kind == "integer" else 0.01
+        if schema.get("minimum") is not None:
+            exclusive = schema.get("exclusiveMinimum") is True
+            values.append(("at minimum", schema["minimum"] + (step if exclusive else 0), True))
+            values.append(("below minimum", schema["minimum"] - (0 if exclusive else step), False))
+        if schema.get("maximum") is not None:
+            exclusive = schema.get("exclusiveMaximum") is True
+            values.append(("at maximum", schema["maximum"] - (step if exclusive else 0), True))
+            values.append(("above maximum", schema["maximum"] + (0 if exclusive else step), False))
+    elif kind == "string":
+        if schema.get("minLength"):
+            values.append(("at minLength", "x" * schema["minLength"], True))
+            values.append(("below minLength", "x" * (schema["minLength"] - 1), False))
+        if schema.get("maxLength") is not None:
+            values.append(("at maxLength", "x" * schema["maxLength"], True))
+            values.append(("above maxLength", "x" * (schema["maxLength"] + 1), False))
+    elif kind == "array":
+        item = sample_value(schema.get("items") or {})
+        if schema.get("minItems"):
+            values.append(("below minItems", [item] * (schema["minItems"] - 1), False))
+        if schema.get("maxItems") is not None:
+            values.append(("above maxItems", [item] * (schema["maxItems"] + 1), False))
+    if schema.get("enum"):
+        values.append(("outside enum", "__not_in_enum__", False))
+    return values
+
+
+class TestcaseGenerator:
+    """
+    Deterministic expansion of a divergence report into executable test cases.
+
+    Paths, query strings and bodies are synthesized from the SpecIndex's
+    schemas; operations with body or parameter divergences also get
+    required-field omissions and boundary-value cases. Every case carries
+    an explicit `expected_status` (an int or a list of acceptable codes).
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._samples = {}
+        # Keeps each param dict alive alongside its sample so ids stay unique
+        self._params = {}
+
+    # -- request synthesis --------------------------------------------------
+    def _param_value(self, param):
+        key = (param.get("in"), param["name"], id(param))
+        if key not in self._params:
+            schema = self.index.resolve_schema(param.get("schema") or {"type": param.get("type", "string")})
+            value = sample_value(schema)
+            self._params[key] = (param, value if value is not None else "sample")
+        return self._params[key][1]
+
+    def concrete_path(self, operation) -> str:
+        params = {p["name"]: p for p in operation["parameters"] if p.get("in") == "path"}
+
+        def fill(match):
+            param = params.get(match.group(1))
+            return str(self._param_value(param)) if param else "1"
+        return _SPEC_PARAM.sub(fill, operation["path"])
+
+    def query(self, operation, names=None) -> dict:
+        wanted = set(names or [])
+        return {p["name"]: self._param_value(p) for p in operation["parameters"]
+                if p.get("in") == "query" and (p.get("required") or p["name"] in wanted)}
+
+    def body(self, operation):
+        key = (operation["method"], operation["template"])
+        if key not in self._samples:
+            schema = self.index.request_schema(operation)
+            self._samples[key] = (schema, sample_value(schema) if schema else None)
+        return self._samples[key]
+
+    @staticmethod
+    def success_status(operation) -> int:
+        codes = sorted(int(c) for c in operation["response_codes"] if c.isdigit() and c.startswith("2"))
+        return codes[0] if codes else 200
+
+    # -- case builders ------------------------------------------------------
+    @staticmethod
+    def _case(category, endpoint, method, purpose, expected_status, body=None, query=None):
+        expected = expected_status if isinstance(expected_status, list) else [expected_status]
+        steps = [f"Send {method} request to {endpoint}"]
+        if query:
+            steps.append(f"With query parameters {sorted(query)}")
+        if body is not None:
+            steps.append("With the JSON body provided")
+        steps.append(f"Expect status {' or '.join(str(s) for s in expected)}")
+        case = {"endpoint": endpoint, "method": method, "purpose": purpose, "steps": steps,
+                "expected_status": expected_status, "category": category, "source": "template"}
+        if body is not None:
+            case["body"] = body
+        if query:
+            case["query"] = query
+        return case
+
+    def _request(self, category, operation, purpose, expected_status=None, query_names=None):
+        _, body = self.body(operation)
+        return self._case(category, self.concrete_path(operation), operation["method"], purpose,
+                          expected_status or self.success_status(operation), body,
+                          self.query(operation, query_names))
+
+    def _negative_cases(self, category, operation) -> list:
+        """Required-field omissions and boundary values for one operation's body and query."""
+        cases = []
+        path, method = self.concrete_path(operation), operation["method"]
+        query = self.query(operation)
+        schema, body = self.body(operation)
+
+        for name in query:
+            if any(p["name"] == name and p.get("required") for p in operation["parameters"]):
+                cases.append(self._case(category, path, method, f"Omit required query parameter '{name}'",
+                                        VALIDATION_STATUSES, body, {k: v for k, v in query.items() if k != name}))
+        if schema and operation["request_body"] and operation["request_body"]["required"]:
+            cases.append(self._case(category, path, method, "Omit the required request body",
+                                    VALIDATION_STATUSES, None, query))
+        if isinstance(body, dict) and isinstance(schema, dict):
+            properties = schema.get("properties") or {}
+            for name in schema.get("required") or []:
+                cases.append(self._case(category, path, method, f"Omit required field '{name}'",
+                                        VALIDATION_STATUSES, {k: v for k, v in body.items() if k != name}, query))
+            for name, sub in properties.items():
+                for label, value, valid in boundary_values(sub):
+                    expected = self.success_status(operation) if valid else VALIDATION_STATUSES
+                    cases.append(self._case(category, path, method, f"Field '{name}' {label}",
+                                            expected, dict(body, **{name: value}), query))
+        return cases[:MAX_NEGATIVE_CASES_PER_OPERATION]
+
+    # -- report expansion ---------------------------------------------------
+    def generate(self, report: dict) -> list:
+        cases = []
+        seen_operations = set()
+
+        def operation_for(entry, method=None):
+            return self.index.operation(method or entry.get("method") or "GET", entry["path"])
+
+        for entry in report.get("missing_endpoints", []):
+            operation = operation_for(entry)
+            if operation:
+                cases.append(self._request("missing_endpoints", operation,
+                                           "Documented endpoint is not implemented", 404))
+
+        for entry in report.get("extra_endpoints", []):
+            method = entry["method"] if entry["method"] not in (None, "ANY") else "GET"
+            endpoint = _concrete_backend_path(entry["path"])
+            cases.append(self._case("extra_endpoints", endpoint, method,
+                                    "Undocumented endpoint is reachable", REACHABLE_STATUSES))
+
+        for entry in report.get("method_mismatches", []):
+            swagger, backend = set(entry["swagger_methods"]), set(entry["backend_methods"])
+            for method in sorted(swagger - backend):
+                operation = operation_for(entry, method)
+                if operation:
+                    cases.append(self._request("method_mismatches", operation,
+                                               f"Documented {method} is not implemented",
+                                               UNSUPPORTED_METHOD_STATUSES))
+            for method in sorted(backend - swagger):
+                endpoint = _concrete_backend_path(entry["path"])
+                cases.append(self._case("method_mismatches", endpoint, method,
+                                        f"Undocumented {method} is reachable", REACHABLE_STATUSES))
+
+        for category in ("parameter_mismatches", "request_body_mismatches",
+                         "response_mismatches", "status_code_mismatches"):
+            for entry in report.get(category, []):
+                if not isinstance(entry, dict) or not entry.get("path"):
+                    continue
+                operation = operation_for(entry)
+                if operation is None:
+                    continue
+                names = entry.get("missing_in_backend") if entry.get("location") == "query" else None
+                cases.append(self._request(category, operation, _purpose(category, entry),
+                                           query_names=names))
+                key = (operation["method"], operation["template"])
+                if key not in seen_operations and category in ("parameter_mismatches", "request_body_mismatches"):
+                    seen_operations.add(key)
+                    cases.extend(self._negative_cases(category, operation))
+        return cases
+
+    def sla_cases(self, report: dict = None) -> list:
+        """
+        One success request per operation declaring an x-sla-* budget, for
+        load testing; operations the report shows as unimplemented are skipped.
+        """
+        report = report or {}
+        absent = {(entry.get("method") or "GET", normalize_path(entry["path"])[0])
+                  for entry in report.get("missing_endpoints", []) if isinstance(entry, dict)}
+        for entry in report.get("method_mismatches", []):
+            template = normalize_path(entry["path"])[0]
+            absent |= {(m, template) for m in set(entry["swagger_methods"]) - set(entry["backend_methods"])}
+        return [self._request("sla_breaches", operation, "Operation meets its latency budget")
+                for operation in self.index.operations()
+                if any(key.startswith("x-sla-") for key in operation["extensions"])
+                and (operation["method"], operation["template"]) not in absent]
+
+
+def _purpose(category, entry) -> str:
+    if category == "parameter_mismatches":
+        return f"Documented {entry.get('location', 'path')} parameters are honoured"
+    if category == "request_body_mismatches":
+        return "Request body matches the documented contract"
+    if category == "status_code_mismatches":
+        return "Documented success status is returned"
+    return "Response body matches the documented schema"
+
+
+def _concrete_backend_path(path: str) -> str:
+    """Fill any route syntax ('{id}', ':id', '<int:id>') with a placeholder value."""
+    template, _ = normalize_path(path)
+    return template.replace("{}", "1")
+
+
+def generate_testcases(report: dict, index) -> list:
+    return TestcaseGenerator(index).generate(report)
@@ -1,92 +1,221 @@
 import json
 import os
-import re
-from pathlib import Path
-import os
-import google.generativeai as genai
-
-
-
-def extract_routes_from_backend(folder_path: str) -> list:
+from src.ai.llm_cache import cached_generate, cached_generate_stream
+from src.ai.llm_client import get_client
+from src.ai.prompt_compaction import ENABLED as COMPACTION, compact_files, render_files
+from src.ai.sharding import shard_files, fan_out, merge_routes
+from src.ai.streaming import STREAMING, ArrayStream, is_complete_array
+from src.loader.python_routes import extract_python_routes, EXTRACTOR_VERSION
+from src.loader.route_scanner import SCANNER_VERSION, SCAN_EXTENSIONS, list_source_files, read_source, scan_files
+from src.utils.git_utils import list_blob_shas, repo_cache_key
+from src.utils.route_cache import RouteCache
+from src.utils import tracing
+
+# Every extension any extractor reads; used to sparse-check-out repos
+SOURCE_EXTENSIONS = SCAN_EXTENSIONS
+# Files the scanner finds routes in are not sent to the model
+SCANNER_FIRST = os.getenv("ROUTE_SCANNER", "1") == "1"
+# Whether a scanner hit is enough to keep a file away from the model; off until
+# the scanner's precision has been measured on real services
+SCANNER_TRUSTED = os.getenv("ROUTE_SCANNER_TRUSTED", "0") == "1"
+# Bump when the LLM prompt changes so previously extracted files are re-asked
+AI_EXTRACTOR_VERSION = "2"
+
+
+def _scan_routes(folder_path: str, rel_paths: list, shas: dict = None) -> dict:
+    """{rel_path: routes} from the route scanner, reusing matches for unchanged blobs."""
+    cache = RouteCache(repo_cache_key(folder_path), "scan", SCANNER_VERSION) if shas is not None else None
+    found, todo = {}, []
+    for rel in rel_paths:
+        cached = cache.get(rel, shas.get(rel)) if cache else None
+        if cached is None:
+            todo.append(rel)
+        else:
+            found[rel] = cached
+    for rel, matches in scan_files(folder_path, todo).items():
+        found[rel] = matches
+        if cache:
+            cache.put(rel, shas.get(rel), matches)
+    if cache:
+        cache.evict_missing(set(rel_paths))
+        cache.save()
+    return found
+
+
+def _non_ast_candidates(folder_path: str, unclassified: list) -> list:
+    """Files the AST extractor does not cover: unclassified Python, Django urls.py and other languages."""
+    # .gitignore'd and vendored files are never listed; oversized and binary
+    # ones are skipped by the scanner and by _extract_routes_llm
+    others = [rel for rel in list_source_files(folder_path)
+              if not rel.endswith(".py") or os.path.basename(rel) == "urls.py"]
+    return sorted(set(unclassified) | set(others))
+
+
+def extract_routes_from_backend(folder_path: str, use_cache: bool = True) -> list:
     """
-    Extract API routes from backend code by scanning for common patterns.
-    Supports Node.js (Express), Python (Flask/FastAPI), etc.
+    Extract API routes from backend code without the model.
+    Python routes come from the AST extractor; Express, NestJS, Spring,
+    Gin/Echo/chi and Django urls.py routes from the single-pass scanner.
 
     Args:
         folder_path (str): path to backend code folder
+        use_cache (bool): reuse per-file results for unchanged git blobs
 
     Returns:
-        list: list of route definitions found
+        list: {"method", "path", "file", ...} route records
     """
 
-    patterns = [
-        r"@app\.get\(['\"](.*?)['\"]",        # Flask / FastAPI
-        r"@app\.post\(['\"](.*?)['\"]",
-        r"@app\.put\(['\"](.*?)['\"]",
-        r"@app\.delete\(['\"](.*?)['\"]",
-
-        r"router\.get\(['\"](.*?)['\"]",     # Express JS
-        r"router\.post\(['\"](.*?)['\"]",
-        r"router\.put\(['\"](.*?)['\"]",
-        r"router\.delete\(['\"](.*?)['\"]",
-    ]
-
-    routes = []
-
-    for root, _, files in os.walk(folder_path):
-        for file in files:
-            if file.endswith((".js", ".ts", ".py")):  # languages we care about
-                full_path = Path(root) / file
-                with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-
-                    for pattern in patterns:
-                        matches = re.findall(pattern, content)
-                        for m in matches:
-                            routes.append(m)
+    shas = list_blob_shas(folder_path) if use_cache else None
+    ast_cache = RouteCache(repo_cache_key(folder_path), "ast", EXTRACTOR_VERSION) if use_cache else None
+    routes, unclassified = extract_python_routes(folder_path, cache=ast_cache, shas=shas)
+    if ast_cache:
+        ast_cache.save()
+    for matches in _scan_routes(folder_path, _non_ast_candidates(folder_path, unclassified), shas).values():
+        routes.extend(matches)
+    return routes
 
-    return list(set(routes))  # unique values
 
+def extract_routes_ai(folder_path: str, use_cache: bool = True, use_llm_cache: bool = True) -> list:
+    """
+    Extracts API endpoints from the backend code directory.
+    Python routes are read deterministically from the AST and other
+    frameworks by the route scanner. Files the AST pass cannot classify
+    also go to Gemini, and routes from both are merged; with
+    ROUTE_SCANNER_TRUSTED=1, files the scanner found routes in are not sent.
+    With use_cache, both passes skip files whose git blob is unchanged;
+    use_llm_cache reuses Gemini responses for identical prompts.
+    """
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-def extract_routes_ai(folder_path: str) -> list:
+    repo_key = repo_cache_key(folder_path)
+    shas = list_blob_shas(folder_path) if use_cache else None
+    ast_cache = RouteCache(repo_key, "ast", EXTRACTOR_VERSION) if use_cache else None
+    ai_cache = RouteCache(repo_key, "ai", AI_EXTRACTOR_VERSION) if use_cache else None
+
+    routes, unclassified = extract_python_routes(folder_path, cache=ast_cache, shas=shas)
+    print(f"✅ AST extractor found {len(routes)} Python routes")
+
+    candidates = _non_ast_candidates(folder_path, unclassified)
+    ai_routes = []
+    unscanned = candidates
+    if SCANNER_FIRST:
+        scanned = _scan_routes(folder_path, candidates, shas)
+        if SCANNER_TRUSTED:
+            unscanned = [rel for rel in candidates if not scanned.get(rel)]
+        for rel in candidates:
+            ai_routes.extend(scanned.get(rel) or [])
+        print(f"✅ Route scanner found {len(ai_routes)} routes in "
+              f"{sum(1 for rel in candidates if scanned.get(rel))} files")
+
+    llm_files = []
+    for rel in unscanned:
+        cached = ai_cache.get(rel, shas.get(rel)) if ai_cache else None
+        if cached is None:
+            llm_files.append(rel)
+        else:
+            ai_routes.extend(cached)
+
+    if llm_files:
+        print(f"🤖 Asking Gemini about {len(llm_files)} files the AST pass does not cover")
+        fresh = _extract_routes_llm(folder_path, llm_files, use_llm_cache)
+        by_file = {rel: [] for rel in llm_files}
+        attributed = True
+        for route in fresh:
+            rel = os.path.normpath(route.get("file") or "")
+            if rel in by_file:
+                by_file[rel].append(route)
+            else:
+                attributed = False
+        # Only cache when every route maps back to a file, otherwise a later
+        # run would silently lose the unattributed ones
+        if ai_cache and attributed:
+            for rel in llm_files:
+                ai_cache.put(rel, shas.get(rel), by_file[rel])
+        ai_routes.extend(fresh)
+
+    if use_cache:
+        ai_cache.evict_missing(set(candidates))
+        ast_cache.save()
+        ai_cache.save()
+        print(f"✅ Route cache: {ast_cache.hits + ai_cache.hits} files reused, "
+              f"{ast_cache.misses + ai_cache.misses} re-extracted")
+        tracing.record(cache_hits=ast_cache.hits + ai_cache.hits, cache_misses=ast_cache.misses + ai_cache.misses)
+    tracing.record(files=len(shas) if shas is not None else len(candidates), llm_files=len(llm_files))
+
+    known = {(r["method"], r["path"]) for r in routes}
+    for route in ai_routes:
+        if (route.get("method"), route.get("path")) not in known:
+            known.add((route.get("method"), route.get("path")))
+            routes.append(route)
+    return routes
+
+
+def _extract_routes_llm(folder_path: str, rel_paths: list, use_llm_cache: bool = True) -> list:
     """
-    Uses Gemini Pro to read the entire backend code directory
-    and extract API endpoints even if patterns fail.
+    Ask Gemini for the routes defined in the given files.
+    Files are split into token-budgeted shards that are sent concurrently.
     """
 
     all_files = []
-    for root, _, files in os.walk(folder_path):
-        for file in files:
-            if file.endswith((".js", ".ts", ".py", ".java", ".go")):
-                full_path = os.path.join(root, file)
-                all_files.append({
-                    "path": full_path,
-                    "content": open(full_path, "r", encoding="utf-8", errors="ignore").read()
-                })
-
+    for rel in rel_paths:
+        # Same size cap and binary check as the scanner
+        content = read_source(os.path.join(folder_path, rel))
+        if content is not None:
+            all_files.append({"path": rel, "content": content})
+    tracing.record(bytes_read=sum(len(f["content"]) for f in all_files))
+    if COMPACTION:
+        # Tests, vendored code and files without routing calls are not sent
+        sent = compact_files(all_files)
+        if len(sent) < len(all_files):
+            print(f"🤖 Skipped {len(all_files) - len(sent)} files that cannot define routes")
+        all_files = sent
+    if not all_files:
+        return []
+
+    shards = shard_files(all_files)
+    if len(shards) > 1:
+        print(f"🤖 Split {len(all_files)} files into {len(shards)} prompt shards")
+    return merge_routes(fan_out(shards, lambda shard: _ask_routes_for_shard(shard, use_llm_cache)))
+
+
+def _ask_routes_for_shard(shard: list, use_llm_cache: bool = True) -> list:
     prompt = f"""
     You are an expert backend analyst.
     Extract all API endpoints and HTTP methods from this backend codebase.
 
     Output only JSON list like:
     [
-       {{ "method": "GET", "path": "/users" }},
+       {{ "method": "GET", "path": "/users", "file": "<path of the file defining it>" }},
        ...
     ]
 
     Codebase:
-    {all_files}
+    {render_files(shard) if COMPACTION else shard}
     """
 
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    response = model.generate_content(prompt)
+    client = get_client()
+    if STREAMING:
+        # A malformed or truncated tail costs only the routes it contains
+        stream = ArrayStream(cached_generate_stream(client, prompt, use_cache=use_llm_cache,
+                                                    validate=is_complete_array))
+        routes = list(stream)
+        if stream.parser.started:
+            return routes
+        raise ValueError(f"Model returned no JSON array for route extraction: {stream.text[:200]!r}")
+    text = cached_generate(client, prompt, use_cache=use_llm_cache, validate=_is_json_list)
+    return _parse_json_list(text)
 
+
+def _parse_json_list(text: str):
     try:
-        return json.loads(response.text)
+        return json.loads(text)
     except:
-        text = response.text
         start = text.find("[")
         end = text.rfind("]") + 1
         return json.loads(text[start:end])
+
+
+def _is_json_list(text: str) -> bool:
+    try:
+        return isinstance(_parse_json_list(text), list)
+    except ValueError:
+        return False
@@ -1,7 +1,37 @@
 import json
 import yaml
-import requests
 from pathlib import Path
+from src.loader.spec_fetcher import get_spec_fetcher
+
+# libyaml's loader is an order of magnitude faster on large specs when available
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def yaml_load(text: str):
+    return yaml.load(text, Loader=_YAML_LOADER)
+
+
+def is_valid_swagger(content: str):
+    """Basic check to ensure file contains Swagger or OpenAPI structure."""
+    return any(key in content for key in ["openapi", "swagger", "paths"])
+
+
+def is_github_repo(source: str) -> bool:
+    """True for repository URLs like https://github.com/owner/repo(.git), not file URLs."""
+    if "github.com/" not in source:
+        return False
+    parts = source.split("github.com/", 1)[1].strip("/").split("/")
+    return len(parts) == 2
+
+
+def parse_spec_text(text: str, source: str) -> dict:
+    """Parse the text of a local spec file, JSON by extension and YAML otherwise."""
+    if not is_valid_swagger(text):
+        raise ValueError(f"File {source} does not appear to contain a valid Swagger spec.")
+    if source.endswith(".json"):
+        return json.loads(text)
+    return yaml_load(text)
+
 
 def load_swagger(source: str) -> dict:
     """
@@ -11,65 +41,32 @@ def load_swagger(source: str) -> dict:
     - GitHub repo (auto-scans recursively for swagger/openapi files)
     """
 
-    def is_valid_swagger(content: str):
-        """Basic check to ensure file contains Swagger or OpenAPI structure."""
-        return any(key in content for key in ["openapi", "swagger", "paths"])
+    # Case 1: GitHub repository (auto-scan)
+    if is_github_repo(source):
+        path, content = get_spec_fetcher().find_github_spec(source, is_valid_swagger)
+        if not content:
+            raise ValueError("No valid Swagger file found in GitHub repo.")
+        print(f"✅ Found Swagger file: {path}")
+        try:
+            return json.loads(content)
+        except Exception:
+            return yaml_load(content)
 
-    # Case 1: Hosted Swagger file (URL)
+    # Case 2: Hosted Swagger file (URL), revalidated against the local cache
     if source.startswith("http://") or source.startswith("https://"):
-        response = requests.get(source)
-        response.raise_for_status()
-        text = response.text
+        text = get_spec_fetcher().get(source)
 
         if not is_valid_swagger(text):
             raise ValueError(f"URL does not appear to be a valid Swagger file: {source}")
 
         try:
-            return response.json()
+            return json.loads(text)
         except Exception:
-            return yaml.safe_load(text)
-
-    # Case 2: GitHub repository (auto-scan)
-    if "github.com" in source:
-        if source.endswith(".git"):
-            source = source[:-4]
-
-        # Convert to GitHub API path
-        api_url = source.replace("github.com", "api.github.com/repos") + "/contents"
-        print(f"Scanning GitHub repo for Swagger files: {api_url}")
-
-        def recursive_scan(api_url):
-            response = requests.get(api_url)
-            response.raise_for_status()
-            for item in response.json():
-                if item["type"] == "file" and item["name"].lower().endswith((".json", ".yaml", ".yml")):
-                    file_resp = requests.get(item["download_url"])
-                    content = file_resp.text
-                    if is_valid_swagger(content):
-                        print(f"✅ Found Swagger file: {item['path']}")
-                        try:
-                            return json.loads(content)
-                        except Exception:
-                            return yaml.safe_load(content)
-                elif item["type"] == "dir":
-                    sub = recursive_scan(item["url"])
-                    if sub:
-                        return sub
-            return None
-
-        result = recursive_scan(api_url)
-        if not result:
-            raise ValueError("No valid Swagger file found in GitHub repo.")
-        return result
+            return yaml_load(text)
 
     # Case 3: Local file
     file = Path(source)
     if file.exists():
-        text = file.read_text(encoding="utf-8")
-        if not is_valid_swagger(text):
-            raise ValueError(f"File {source} does not appear to contain a valid Swagger spec.")
-        if source.endswith(".json"):
-            return json.loads(text)
-        return yaml.safe_load(text)
+        return parse_spec_text(file.read_text(encoding="utf-8"), source)
 
     raise ValueError(f"Swagger file not found or unsupported format: {source}")
@@ -0,0 +1,429 @@
+import ast
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump whenever analyze_python_file output changes so cached facts are discarded
+EXTRACTOR_VERSION = "1"
+HTTP_METHODS = ("get", "post", "put", "patch", "delete", "head", "options", "trace")
+PRIMITIVE_TYPES = {"int", "float", "str", "bool", "bytes", "list", "dict", "set", "tuple",
+                   "List", "Dict", "Set", "Tuple", "Optional", "Union", "Any", "UUID", "date", "datetime"}
+# Arguments FastAPI injects itself and that never show up as request params
+INJECTED_TYPES = {"Request", "Response", "WebSocket", "BackgroundTasks", "HTTPConnection", "Session"}
+WEB_FRAMEWORKS = ("fastapi", "flask", "starlette", "quart")
+SKIP_DIRS = {".git", "node_modules", "venv", ".venv", "__pycache__", "site-packages", "dist", "build"}
+
+
+def _const_str(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _kwarg(call, name):
+    for kw in call.keywords:
+        if kw.arg == name:
+            return kw.value
+    return None
+
+
+def _str_list(node):
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        values = [_const_str(e) for e in node.elts]
+        if all(v is not None for v in values):
+            return values
+    return None
+
+
+def _dotted(node):
+    """Return 'a.b.c' for Name/Attribute chains, else None."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return ".".join(reversed(parts))
+    return None
+
+
+def _annotation_name(node):
+    if node is None:
+        return None
+    if isinstance(node, ast.Subscript):
+        # Optional[Model] / List[Model] -> Model
+        inner = node.slice
+        if isinstance(inner, ast.Tuple):
+            inner = inner.elts[0]
+        return _annotation_name(inner)
+    if isinstance(node, ast.BinOp):
+        # Model | None
+        return _annotation_name(node.left)
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    name = _dotted(node)
+    return name.split(".")[-1] if name else None
+
+
+def _module_name(rel_path):
+    parts = rel_path[:-3].replace(os.sep, "/").split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def path_params(path):
+    """Path parameter names for FastAPI ('{id}') and Flask ('<int:id>') templates."""
+    names = []
+    for segment in path.split("/"):
+        if segment.startswith("{") and segment.endswith("}"):
+            names.append(segment[1:-1].split(":")[0])
+        elif segment.startswith("<") and segment.endswith(">"):
+            names.append(segment[1:-1].split(":")[-1])
+    return names
+
+
+class _FileVisitor(ast.NodeVisitor):
+    """Collects routers, routes and include edges from a single module."""
+
+    def __init__(self, module, is_package=False):
+        self.module = module
+        self.is_package = is_package
+        self.imports = {}
+        self.routers = {}
+        self.routes = []
+        self.includes = []
+        self.unresolved = 0
+        self.uses_framework = False
+        self.functions = {}
+        self.pending = []
+
+    # -- imports -----------------------------------------------------------
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.name.split(".")[0] in WEB_FRAMEWORKS:
+                self.uses_framework = True
+            if alias.asname:
+                self.imports[alias.asname] = (alias.name, None)
+            else:
+                # 'import pkg.users' binds 'pkg'
+                head = alias.name.split(".")[0]
+                self.imports[head] = (head, None)
+
+    def visit_ImportFrom(self, node):
+        module = node.module or ""
+        if module.split(".")[0] in WEB_FRAMEWORKS:
+            self.uses_framework = True
+        if node.level:
+            base = self.module.split(".")
+            # A package's __init__ is its own base; plain modules drop their last part
+            base = base[: len(base) - node.level + (1 if self.is_package else 0)]
+            module = ".".join(p for p in base + ([module] if module else []) if p)
+        for alias in node.names:
+            self.imports[alias.asname or alias.name] = (module, alias.name)
+
+    # -- router / app construction ----------------------------------------
+    def visit_Assign(self, node):
+        if isinstance(node.value, ast.Call) and len(node.targets) == 1:
+            target = _dotted(node.targets[0])
+            ctor = _dotted(node.value.func)
+            if target and ctor:
+                ctor = ctor.split(".")[-1]
+                call = node.value
+                if ctor in ("FastAPI", "APIRouter"):
+                    prefix = _const_str(_kwarg(call, "prefix")) or ""
+                    self.routers[target] = {"framework": "fastapi", "prefix": prefix}
+                elif ctor in ("Flask", "Quart"):
+                    self.routers[target] = {"framework": "flask", "prefix": ""}
+                elif ctor == "Blueprint":
+                    prefix = _const_str(_kwarg(call, "url_prefix")) or ""
+                    self.routers[target] = {"framework": "flask", "prefix": prefix}
+        self.generic_visit(node)
+
+    # -- imperative registration -------------------------------------------
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Attribute):
+            owner = _dotted(node.func.value)
+            attr = node.func.attr
+            if owner and attr in ("include_router", "register_blueprint") and node.args:
+                child = _dotted(node.args[0])
+                prefix_kw = "prefix" if attr == "include_router" else "url_prefix"
+                prefix_node = _kwarg(node, prefix_kw)
+                prefix = _const_str(prefix_node) if prefix_node is not None else None
+                if child:
+                    self.includes.append({"parent": owner, "child": child, "prefix": prefix,
+                                          "override": attr == "register_blueprint"})
+            elif owner and attr in ("add_api_route", "add_url_rule") and node.args:
+                path = _const_str(node.args[0])
+                if path is None:
+                    self.unresolved += 1
+                else:
+                    endpoint = _kwarg(node, "endpoint") or _kwarg(node, "view_func")
+                    if endpoint is None and len(node.args) > 1:
+                        endpoint = node.args[-1]
+                    methods = _str_list(_kwarg(node, "methods")) or ["GET"]
+                    self._add_route(owner, path, methods, node, _dotted(endpoint) if endpoint else None)
+        self.generic_visit(node)
+
+    # -- decorators ---------------------------------------------------------
+    def visit_FunctionDef(self, node):
+        self.functions.setdefault(node.name, node)
+        for deco in node.decorator_list:
+            if not (isinstance(deco, ast.Call) and isinstance(deco.func, ast.Attribute)):
+                continue
+            owner = _dotted(deco.func.value)
+            attr = deco.func.attr
+            if not owner:
+                continue
+            if attr in HTTP_METHODS:
+                methods = [attr.upper()]
+            elif attr in ("route", "api_route"):
+                methods = _str_list(_kwarg(deco, "methods")) or ["GET"]
+            else:
+                continue
+            path_node = deco.args[0] if deco.args else _kwarg(deco, "path") or _kwarg(deco, "rule")
+            path = _const_str(path_node)
+            if path is None:
+                self.unresolved += 1
+                continue
+            self._add_route(owner, path, methods, deco, node.name, func=node)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def _add_route(self, owner, path, methods, call, function, func=None):
+        response_model = _kwarg(call, "response_model")
+        record = {
+            "owner": owner,
+            "path": path,
+            "methods": [m.upper() for m in methods],
+            "line": call.lineno,
+            "function": function,
+            "query_params": [],
+            "request_model": None,
+            "response_model": _annotation_name(response_model) if response_model is not None else None,
+        }
+        if func is not None:
+            self._describe_signature(func, record)
+        elif function:
+            # add_api_route(path, handler): the handler may be defined further down
+            self.pending.append(record)
+        self.routes.append(record)
+
+    def finish(self):
+        for record in self.pending:
+            func = self.functions.get(record["function"])
+            if func is not None:
+                self._describe_signature(func, record)
+
+    def _describe_signature(self, func, record):
+        declared = set(path_params(record["path"]))
+        args = func.args.args + func.args.kwonlyargs
+        defaults = [None] * (len(func.args.args) - len(func.args.defaults)) + list(func.args.defaults)
+        defaults += list(func.args.kw_defaults)
+        for arg, default in zip(args, defaults):
+            if arg.arg in declared or arg.arg in ("self", "cls"):
+                continue
+            marker = _dotted(default.func).split(".")[-1] if isinstance(default, ast.Call) and _dotted(default.func) else None
+            if marker in ("Depends", "Security", "Header", "Cookie", "File", "Form"):
+                continue
+            type_name = _annotation_name(arg.annotation)
+            if type_name in INJECTED_TYPES:
+                continue
+            if marker == "Body" or (type_name and type_name not in PRIMITIVE_TYPES and marker != "Query"):
+                record["request_model"] = type_name or arg.arg
+            else:
+                record["query_params"].append(arg.arg)
+        if record["response_model"] is None and func.returns is not None:
+            returned = _annotation_name(func.returns)
+            if returned and returned not in PRIMITIVE_TYPES and returned not in INJECTED_TYPES:
+                record["response_model"] = returned
+        # Flask reads query params from request.args instead of the signature
+        for sub in ast.walk(func):
+            if (isinstance(sub, ast.Call) and isinstance(sub.func, ast.Attribute)
+                    and sub.func.attr == "get" and _dotted(sub.func.value) == "request.args" and sub.args):
+                name = _const_str(sub.args[0])
+                if name and name not in record["query_params"]:
+                    record["query_params"].append(name)
+
+
+def analyze_python_file(full_path: str, root: str) -> dict:
+    """
+    Parse one Python file and return its route facts, before any
+    cross-module prefix resolution. Safe to run in a worker process.
+    """
+    rel_path = os.path.relpath(full_path, root)
+    module = _module_name(rel_path)
+    facts = {"file": rel_path, "module": module, "imports": {}, "routers": {},
+             "routes": [], "includes": [], "classified": True}
+    try:
+        with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
+            tree = ast.parse(f.read(), filename=full_path)
+    except (SyntaxError, ValueError):
+        facts["classified"] = False
+        return facts
+
+    visitor = _FileVisitor(module, is_package=rel_path.endswith("__init__.py"))
+    visitor.visit(tree)
+    visitor.finish()
+    facts["imports"] = visitor.imports
+    facts["routers"] = visitor.routers
+    facts["routes"] = visitor.routes
+    facts["includes"] = visitor.includes
+    # Framework code we could not read statically (dynamic paths) goes to the LLM
+    facts["classified"] = not (visitor.uses_framework and visitor.unresolved)
+    return facts
+
+
+def _module_resolver(modules):
+    """
+    Map an imported module name to the repo module it refers to. Module
+    names come from paths relative to the repo root, so with a src/ layout
+    'app.routers' is the repo's 'src.app.routers': an exact name wins, then
+    the shortest repo module ending in '.<name>'.
+    """
+    by_suffix = {}
+    for module in sorted(modules, key=lambda m: (m.count("."), m)):
+        parts = module.split(".")
+        for i in range(len(parts)):
+            by_suffix.setdefault(".".join(parts[i:]), module)
+
+    def resolve(module):
+        return module if module in modules else by_suffix.get(module, module)
+    return resolve
+
+
+def _resolve_ref(facts, name, resolve_module=lambda module: module):
+    """Map a local name ('router', 'users.router') to a global (module, var) key."""
+    if name in facts["routers"]:
+        return (facts["module"], name)
+    head, _, rest = name.partition(".")
+    if head in facts["imports"]:
+        module, attr = facts["imports"][head]
+        if attr is None:
+            # 'import pkg.users as users' -> users.router
+            return (resolve_module(module), rest) if rest else None
+        if rest:
+            # 'from pkg import users' -> users.router
+            return (resolve_module(f"{module}.{attr}" if module else attr), rest)
+        return (resolve_module(module), attr)
+    return None
+
+
+def resolve_routes(all_facts: list, unresolved: set = None) -> list:
+    """
+    Combine per-file facts into final route records, applying router
+    prefixes and include_router/register_blueprint mounts across modules.
+    Files whose include_router/register_blueprint mounts do not resolve to
+    a known router are added to `unresolved`, since the prefix they apply
+    is missing from the routes.
+    """
+    routers = {}
+    for facts in all_facts:
+        for var, info in facts["routers"].items():
+            routers[(facts["module"], var)] = info
+    resolve_module = _module_resolver({facts["module"] for facts in all_facts})
+
+    # parent edges: child router -> [(parent router, mount prefix, override)]
+    parents = {}
+    for facts in all_facts:
+        for inc in facts["includes"]:
+            parent = _resolve_ref(facts, inc["parent"], resolve_module)
+            child = _resolve_ref(facts, inc["child"], resolve_module)
+            if parent in routers and child in routers:
+                parents.setdefault(child, []).append((parent, inc["prefix"], inc["override"]))
+            elif unresolved is not None:
+                unresolved.add(facts["file"])
+
+    def mount_prefixes(key, seen=()):
+        """All full prefixes under which a router is reachable."""
+        own = routers.get(key, {}).get("prefix", "")
+        if key in seen or key not in parents:
+            return [own]
+        found = []
+        for parent, prefix, override in parents[key]:
+            local = prefix if (override and prefix is not None) else (prefix or "") + own
+            for outer in mount_prefixes(parent, seen + (key,)):
+                found.append(outer + local)
+        return found
+
+    prefix_cache = {}
+    routes = []
+    seen = set()
+    for facts in all_facts:
+        for route in facts["routes"]:
+            key = _resolve_ref(facts, route["owner"], resolve_module) or (facts["module"], route["owner"])
+            if key not in prefix_cache:
+                prefix_cache[key] = mount_prefixes(key)
+            framework = routers.get(key, {}).get("framework", "unknown")
+            for prefix in prefix_cache[key]:
+                full = (prefix.rstrip("/") + "/" + route["path"].lstrip("/")) if prefix else route["path"]
+                if len(full) > 1:
+                    full = full.rstrip("/") or "/"
+                for method in route["methods"]:
+                    if (method, full) in seen:
+                        continue
+                    seen.add((method, full))
+                    routes.append({
+                        "method": method,
+                        "path": full,
+                        "file": facts["file"],
+                        "line": route["line"],
+                        "function": route["function"],
+                        "framework": framework,
+                        "path_params": path_params(full),
+                        "query_params": route["query_params"],
+                        "request_model": route["request_model"],
+                        "response_model": route["response_model"],
+                    })
+    return routes
+
+
+def iter_python_files(folder_path: str):
+    for root, dirs, files in os.walk(folder_path):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for file in sorted(files):
+            if file.endswith(".py"):
+                yield os.path.join(root, file)
+
+
+def analyze_python_files(paths: list, root: str, workers: int = None) -> list:
+    """Analyze files across a process pool; small batches stay in-process."""
+    if len(paths) < 64:
+        return [analyze_python_file(p, root) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(analyze_python_file, paths, [root] * len(paths), chunksize=32))
+
+
+def extract_python_routes(folder_path: str, workers: int = None, cache=None, shas: dict = None) -> tuple:
+    """
+    Deterministically extract FastAPI/Flask routes from a Python codebase.
+
+    When a RouteCache and the tree's blob SHAs are given, only files whose
+    blob changed since the last run are parsed again.
+
+    Returns:
+        tuple: (routes, unclassified_files) where unclassified_files are
+        relative paths the AST pass could not read and should go to the LLM.
+    """
+    paths = list(iter_python_files(folder_path))
+    if cache is None or shas is None:
+        facts = analyze_python_files(paths, folder_path, workers)
+    else:
+        facts, todo = [], []
+        for full_path in paths:
+            rel = os.path.relpath(full_path, folder_path)
+            cached = cache.get(rel, shas.get(rel))
+            if cached is None:
+                todo.append(full_path)
+            else:
+                facts.append(cached)
+        for fresh in analyze_python_files(todo, folder_path, workers):
+            cache.put(fresh["file"], shas.get(fresh["file"]), fresh)
+            facts.append(fresh)
+        cache.evict_missing({os.path.relpath(p, folder_path) for p in paths})
+        facts.sort(key=lambda f: f["file"])
+
+    unresolved = set()
+    routes = resolve_routes(facts, unresolved)
+    unclassified = sorted({f["file"] for f in facts if not f["classified"]} | unresolved)
+    return routes, unclassified
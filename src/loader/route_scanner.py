@@ -0,0 +1,245 @@
+import fnmatch
+import mmap
+import os
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from src.loader.python_routes import SKIP_DIRS
+
+# Bump whenever scan_file output changes so cached matches are discarded
+SCANNER_VERSION = "1"
+SCAN_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".java", ".kt", ".go", ".py")
+# Larger files are generated bundles or data, not route tables
+MAX_FILE_BYTES = int(os.getenv("ROUTE_SCAN_MAX_BYTES", str(1024 * 1024)))
+BINARY_SNIFF_BYTES = 8192
+
+HTTP_VERBS = ("get", "post", "put", "patch", "delete", "head", "options")
+_LOWER = "|".join(HTTP_VERBS).encode()
+_UPPER = _LOWER.upper()
+_TITLE = "|".join(v.title() for v in HTTP_VERBS).encode()
+
+_Q = rb"""['"`]"""
+_NOT_Q = rb"""[^'"`\n]*"""
+# One alternation over every supported framework, so each file is scanned once
+ROUTE_PATTERN = re.compile(
+    # NestJS: @Controller('users') prefixes the @Get(':id') handlers that follow it
+    rb"@Controller\(\s*(?:" + _Q + rb"(?P<nest_prefix>" + _NOT_Q + rb")" + _Q + rb")?"
+    rb"|@(?P<nest_method>" + _TITLE + rb"|All)\(\s*(?:" + _Q + rb"(?P<nest_path>" + _NOT_Q
+    + rb")" + _Q + rb")?\s*\)"
+    # Spring: a class-level @RequestMapping prefixes the method-level mappings
+    rb"|@RequestMapping\s*\((?P<spring_prefix>[^)]*)\)(?=(?:\s*@\w+(?:\([^)]*\))?)*\s*(?:public\s+|final\s+|abstract\s+)*class\b)"
+    rb"|@(?P<spring_method>Get|Post|Put|Patch|Delete|Request)Mapping\b(?:\s*\((?P<spring_args>[^)]*)\))?"
+    # Gin/Echo/chi/Fiber groups: v1 := r.Group("/v1")
+    rb"|\b(?P<group_var>\w+)\s*:?=\s*(?P<group_parent>\w+)\.(?:Group|Route)\(\s*\"(?P<group_path>[^\"]*)\""
+    # Express/Koa/Fastify: app.get('/users/:id', handler). The receiver is a bare
+    # name (not r.Header.get, not request(app).get) and a handler must follow the path
+    rb"|(?<![\w$.)\]])(?:this\.)?(?P<express_obj>[A-Za-z_$][\w$]*)\."
+    rb"(?P<express_method>" + _LOWER + rb"|all)\(\s*"
+    + _Q + rb"(?P<express_path>/" + _NOT_Q + rb")" + _Q + rb"\s*,"
+    # Gin/Echo/chi/Fiber/net/http: r.GET("/users/:id", h), mux.HandleFunc("/users", h);
+    # r.Header.Get("Authorization") and q.Get("page") are accessors, not routes
+    rb"|(?<![\w.)\]])(?P<go_obj>\w+)\.(?P<go_method>" + _UPPER + rb"|" + _TITLE
+    + rb"|Any|Handle|HandleFunc)\(\s*\"(?P<go_path>/[^\"]*)\"\s*,"
+    # Django urls.py: path('users/<int:pk>/', ...), re_path(r'^users/$', ...)
+    rb"|\b(?:re_)?path\(\s*r?['\"](?P<django_path>[^'\"]*)['\"]"
+)
+# Cheap pre-filter for files that may register routes: any routing call
+# ROUTE_PATTERN knows, in any case, plus the Python framework forms. Looser
+# than ROUTE_PATTERN on purpose; a miss keeps the file from the model
+ROUTE_HINT = re.compile(
+    r"\.(?:" + "|".join(HTTP_VERBS) + r"|all|any|route|use|group|handle|handlefunc|methods|add_url_rule|api_route|"
+    r"add_api_route)\s*\(|@\w*(?:mapping|controller|" + "|".join(HTTP_VERBS) + r"|route)\b|"
+    r"\burlpatterns\b|\b(?:re_)?path\s*\(|\bhandlefunc\s*\(", re.IGNORECASE)
+_SPRING_PATH = re.compile(rb"""(?:(?:value|path)\s*=\s*)?\{?\s*"([^"]*)\"""")
+_SPRING_METHOD = re.compile(rb"RequestMethod\.(\w+)")
+_ANY_METHOD = {"Any", "Handle", "HandleFunc", "All", "Request", "all"}
+# HTTP clients and key/value stores share the router verbs: axios.get('/api/x', config)
+CLIENT_RECEIVERS = {"axios", "http", "https", "client", "httpClient", "request", "superagent", "got", "ky",
+                    "fetch", "api", "$http", "agent", "instance", "cache", "redis", "store", "map", "params",
+                    "headers", "query", "searchParams", "cookies", "session", "localStorage", "sessionStorage"}
+
+
+def _join(prefix: str, path: str) -> str:
+    joined = "/" + "/".join(part.strip("/") for part in (prefix, path) if part and part.strip("/"))
+    return joined if joined == "/" or not path.endswith("/") else joined + "/"
+
+
+def _django_path(path: str) -> str:
+    # re_path patterns are anchored regexes; path() routes are relative
+    return "/" + path.lstrip("^").rstrip("$").lstrip("/")
+
+
+def _commented(content, start: int) -> bool:
+    """Whether a match sits behind a line comment or on a block-comment line."""
+    line_start = content.rfind(b"\n", 0, start) + 1
+    prefix = content[line_start:start]
+    return b"//" in prefix or prefix.lstrip().startswith((b"#", b"*", b"/*"))
+
+
+def scan_content(content, rel_path: str) -> list:
+    """Route records found in one file's bytes (or mmap), in source order."""
+    routes = []
+    nest_prefix = spring_prefix = ""
+    groups = {}
+    is_python = rel_path.endswith(".py")
+    line, last = 1, 0
+
+    def add(method, path, framework, start):
+        nonlocal line, last
+        line += content[last:start].count(b"\n")
+        last = start
+        routes.append({"method": method, "path": path, "file": rel_path, "line": line, "framework": framework})
+
+    for match in ROUTE_PATTERN.finditer(content):
+        if _commented(content, match.start()):
+            continue
+        group = {k: (v.decode("utf-8", "replace") if v is not None else None)
+                 for k, v in match.groupdict().items()}
+        if match.group(0).startswith(b"@Controller"):
+            nest_prefix = group["nest_prefix"] or ""
+        elif group["nest_method"]:
+            method = None if group["nest_method"] == "All" else group["nest_method"].upper()
+            add(method, _join(nest_prefix, group["nest_path"] or ""), "nestjs", match.start())
+        elif group["spring_prefix"] is not None:
+            found = _SPRING_PATH.search(match.group("spring_prefix"))
+            spring_prefix = found.group(1).decode("utf-8", "replace") if found else ""
+        elif group["spring_method"]:
+            args = match.group("spring_args") or b""
+            found = _SPRING_PATH.search(args)
+            path = _join(spring_prefix, found.group(1).decode("utf-8", "replace") if found else "")
+            methods = [m.decode() for m in _SPRING_METHOD.findall(args)]
+            if group["spring_method"] != "Request":
+                methods = [group["spring_method"].upper()]
+            for method in methods or [None]:
+                add(method, path, "spring", match.start())
+        elif group["group_var"]:
+            groups[group["group_var"]] = _join(groups.get(group["group_parent"], ""), group["group_path"])
+        elif group["express_method"]:
+            if group["express_obj"] in CLIENT_RECEIVERS:
+                continue
+            method = None if group["express_method"] in _ANY_METHOD else group["express_method"].upper()
+            add(method, group["express_path"], "express", match.start())
+        elif group["go_method"]:
+            method = None if group["go_method"] in _ANY_METHOD else group["go_method"].upper()
+            add(method, _join(groups.get(group["go_obj"], ""), group["go_path"]), "go", match.start())
+        elif group["django_path"] is not None and is_python:
+            add(None, _django_path(group["django_path"]), "django", match.start())
+    return routes
+
+
+def scan_file(full_path: str, root: str) -> list:
+    """Memory-map one file and scan it; empty, oversized or binary files yield nothing."""
+    rel_path = os.path.relpath(full_path, root)
+    try:
+        size = os.path.getsize(full_path)
+        if size == 0 or size > MAX_FILE_BYTES:
+            return []
+        with open(full_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            if b"\0" in content[:BINARY_SNIFF_BYTES]:
+                return []
+            return scan_content(content, rel_path)
+    except (OSError, ValueError):
+        return []
+
+
+def read_source(full_path: str):
+    """The text of one file, or None for empty, oversized or binary files, as scan_file skips them."""
+    try:
+        size = os.path.getsize(full_path)
+        if size == 0 or size > MAX_FILE_BYTES:
+            return None
+        with open(full_path, "rb") as f:
+            content = f.read()
+    except OSError:
+        return None
+    if b"\0" in content[:BINARY_SNIFF_BYTES]:
+        return None
+    return content.decode("utf-8", "ignore")
+
+
+class IgnoreRules:
+    """
+    Minimal .gitignore matcher for trees that are not git checkouts:
+    globs, '!' negation, trailing '/' for directories and leading '/'
+    anchoring, read from every .gitignore on the way down.
+    """
+
+    def __init__(self):
+        self.rules = []
+
+    def load(self, directory: str, root: str):
+        try:
+            with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8", errors="ignore") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        base = os.path.relpath(directory, root).replace(os.sep, "/")
+        base = "" if base == "." else base + "/"
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            line = line.lstrip("!")
+            dir_only = line.endswith("/")
+            line = line.strip("/")
+            anchored = "/" in line
+            self.rules.append((base, line, negate, dir_only, anchored))
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        rel_path = rel_path.replace(os.sep, "/")
+        ignored = False
+        for base, pattern, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir or not rel_path.startswith(base):
+                continue
+            local = rel_path[len(base):]
+            target = local if anchored else local.rsplit("/", 1)[-1]
+            if fnmatch.fnmatchcase(target, pattern):
+                ignored = not negate
+        return ignored
+
+
+def list_source_files(folder_path: str, extensions: tuple = SCAN_EXTENSIONS) -> list:
+    """
+    Relative paths of source files under folder_path, honouring .gitignore.
+    Git checkouts are listed by git itself (tracked plus untracked,
+    non-ignored files); other trees are walked with IgnoreRules.
+    Vendored and build directories are always skipped.
+    """
+    def wanted(rel):
+        parts = rel.replace(os.sep, "/").split("/")
+        return rel.endswith(extensions) and not any(part in SKIP_DIRS for part in parts[:-1])
+
+    if os.path.exists(os.path.join(folder_path, ".git")):
+        try:
+            output = subprocess.run(["git", "ls-files", "-z", "-co", "--exclude-standard"], cwd=folder_path,
+                                    capture_output=True, check=True).stdout
+            return sorted(rel for rel in output.decode("utf-8", "replace").split("\0")
+                          if rel and wanted(rel) and os.path.isfile(os.path.join(folder_path, rel)))
+        except (OSError, subprocess.CalledProcessError):
+            pass
+
+    rules = IgnoreRules()
+    paths = []
+    for root, dirs, files in os.walk(folder_path):
+        rules.load(root, folder_path)
+        rel_root = os.path.relpath(root, folder_path)
+        rel_root = "" if rel_root == "." else rel_root + os.sep
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not rules.ignored(rel_root + d, True))
+        for file in sorted(files):
+            rel = rel_root + file
+            if wanted(rel) and not rules.ignored(rel, False):
+                paths.append(rel)
+    return paths
+
+
+def scan_files(folder_path: str, rel_paths: list, workers: int = None) -> dict:
+    """{rel_path: routes} for the given files; large batches are scanned across a process pool."""
+    full_paths = [os.path.join(folder_path, rel) for rel in rel_paths]
+    if len(full_paths) < 64:
+        results = [scan_file(p, folder_path) for p in full_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(scan_file, full_paths, [folder_path] * len(full_paths), chunksize=32))
+    return dict(zip(rel_paths, results))
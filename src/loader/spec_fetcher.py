@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CACHE_DIR = os.path.join(".cache", "specs")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_RAW_URL = os.getenv("GITHUB_RAW_URL", "https://raw.githubusercontent.com")
+DEFAULT_WORKERS = int(os.getenv("SPEC_FETCH_WORKERS", "8"))
+SNIFF_BYTES = 2048
+SPEC_EXTENSIONS = (".json", ".yaml", ".yml")
+
+
+class SpecFetcher:
+    """
+    HTTP client for spec sources with an on-disk conditional cache.
+
+    Every response is stored with its ETag/Last-Modified validators and
+    revalidated with If-None-Match/If-Modified-Since, so an unchanged spec
+    costs one 304. A GitHub repo is listed with one recursive trees call;
+    while that tree is unchanged the spec found in it last time is reused
+    without further requests. Candidate files are sniffed with a ranged
+    request before any full download.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, workers: int = DEFAULT_WORKERS,
+                 api_url: str = GITHUB_API_URL, timeout: float = 30):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.token = os.getenv("GITHUB_TOKEN")
+        # The token only goes to GitHub; spec URLs can point at any host
+        self.token_hosts = {urlparse(self.api_url).netloc, urlparse(GITHUB_RAW_URL).netloc,
+                            "raw.githubusercontent.com"}
+        self.counters = {"requests": 0, "not_modified": 0, "downloads": 0}
+        self._lock = threading.Lock()
+
+    # -- conditional cache --------------------------------------------------
+    def _cache_paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+
+    def _request(self, url, headers=None, **kwargs):
+        headers = dict(headers or {})
+        if self.token and urlparse(url).netloc in self.token_hosts:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return self.session.get(url, headers=headers, timeout=self.timeout, **kwargs)
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, url: str) -> str:
+        """GET url, revalidating any cached copy; returns the body text."""
+        return self._get(url)[0]
+
+    def _get(self, url: str) -> tuple:
+        """GET url as (body text, whether the cached copy was still valid)."""
+        meta_path, body_path = self._cache_paths(url)
+        headers = {}
+        # Validators without a body to fall back on would turn a 304 into an empty spec
+        if os.path.exists(body_path):
+            try:
+                with open(meta_path, "r") as f:
+                    meta = json.load(f)
+                if meta.get("etag"):
+                    headers["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"):
+                    headers["If-Modified-Since"] = meta["last_modified"]
+            except (OSError, ValueError):
+                pass
+
+        self._count("requests")
+        response = self._request(url, headers)
+        if response.status_code == 304:
+            text = self._cached_body(url)
+            if text is not None:
+                self._count("not_modified")
+                return text, True
+            # The body was removed after the request went out; fetch it unconditionally
+            self._count("requests")
+            response = self._request(url)
+        response.raise_for_status()
+        self._count("downloads")
+        self._store(url, response)
+        return response.text, False
+
+    def _cached_body(self, url):
+        try:
+            with open(self._cache_paths(url)[1], "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, path, text):
+        # A private temp file per writer, so concurrent fetches of one URL cannot interleave
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.cache_dir, suffix=".tmp",
+                                         delete=False) as f:
+            f.write(text)
+        os.replace(f.name, path)
+
+    def _store(self, url, response):
+        validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        if not any(validators.values()):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path, body_path = self._cache_paths(url)
+        self._write(body_path, response.text)
+        self._write(meta_path, json.dumps(dict(validators, url=url)))
+
+    def is_cached(self, url: str) -> bool:
+        return all(os.path.exists(p) for p in self._cache_paths(url))
+
+    def sniff(self, url: str) -> tuple:
+        """
+        Fetch the first few KB of url with a ranged request.
+        Already cached files are revalidated instead, since a 304 is as cheap.
+        Returns (text, complete) where complete means text is the whole body.
+        """
+        if self.is_cached(url):
+            return self.get(url), True
+        self._count("requests")
+        response = self._request(url, {"Range": f"bytes=0-{SNIFF_BYTES - 1}"}, stream=True)
+        try:
+            response.raise_for_status()
+            if response.status_code == 200:
+                # Server ignored the range; keep the full body rather than download it twice
+                self._count("downloads")
+                self._store(url, response)
+                return response.text, True
+            head = next(response.iter_content(SNIFF_BYTES), b"").decode("utf-8", errors="ignore")
+            return head, False
+        finally:
+            response.close()
+
+    # -- GitHub -------------------------------------------------------------
+    @staticmethod
+    def _owner_repo(repo_url: str) -> str:
+        if repo_url.endswith(".git"):
+            repo_url = repo_url[:-4]
+        return repo_url.rstrip("/").split("github.com/", 1)[1]
+
+    def github_contents_url(self, repo_url: str) -> str:
+        return f"{self.api_url}/repos/{self._owner_repo(repo_url)}/contents"
+
+    def github_tree_url(self, repo_url: str) -> str:
+        return f"{self.api_url}/repos/{self._owner_repo(repo_url)}/git/trees/HEAD?recursive=1"
+
+    def list_github_files(self, contents_url: str) -> list:
+        """Walk a GitHub contents tree level by level, listing directories concurrently."""
+        files = []
+        level = [contents_url]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while level:
+                next_level = []
+                for listing in pool.map(lambda url: json.loads(self.get(url)), level):
+                    for item in listing:
+                        if item["type"] == "file":
+                            files.append(item)
+                        elif item["type"] == "dir":
+                            next_level.append(item["url"])
+                level = next_level
+        return files
+
+    def _tree_files(self, repo_url: str, tree: dict) -> list:
+        """Files of a recursive trees response; a truncated tree falls back to the contents walk."""
+        if tree.get("truncated"):
+            return [{"path": f["path"], "download_url": f["download_url"]}
+                    for f in self.list_github_files(self.github_contents_url(repo_url))]
+        raw_url = f"{GITHUB_RAW_URL.rstrip('/')}/{self._owner_repo(repo_url)}/HEAD"
+        return [{"path": item["path"], "download_url": f"{raw_url}/{item['path']}"}
+                for item in tree.get("tree") or [] if item["type"] == "blob"]
+
+    def find_github_spec(self, repo_url: str, is_valid) -> tuple:
+        """
+        Locate the spec in a GitHub repo: the shallowest, then alphabetically
+        first, spec-like file whose leading bytes look like Swagger/OpenAPI.
+        Returns (path, text) or (None, None).
+        """
+        tree_url = self.github_tree_url(repo_url)
+        print(f"Scanning GitHub repo for Swagger files: {tree_url}")
+        text, unchanged = self._get(tree_url)
+        found_path = self._cache_paths(tree_url)[0][:-len(".json")] + ".found.json"
+        if unchanged:
+            # Same tree, same blobs: the previous answer still holds
+            try:
+                with open(found_path, "r") as f:
+                    found = json.load(f)
+                if found["url"] is None:
+                    return None, None
+                body = self._cached_body(found["url"])
+                if body is not None:
+                    return found["path"], body
+            except (OSError, ValueError, KeyError):
+                pass
+
+        candidates = [f for f in self._tree_files(repo_url, json.loads(text))
+                      if f["path"].lower().endswith(SPEC_EXTENSIONS)]
+        candidates.sort(key=lambda f: (f["path"].count("/"), f["path"]))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            heads = list(pool.map(lambda f: self.sniff(f["download_url"]), candidates))
+        result, url = (None, None), None
+        for item, (head, complete) in zip(candidates, heads):
+            if is_valid(head):
+                url = item["download_url"]
+                result = item["path"], head if complete else self.get(url)
+                break
+        if self.is_cached(tree_url) and (url is None or self.is_cached(url)):
+            self._write(found_path, json.dumps({"path": result[0], "url": url}))
+        return result
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_spec_fetcher() -> SpecFetcher:
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = SpecFetcher()
+        return _fetcher
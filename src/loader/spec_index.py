@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+from src.loader.load_swagger import load_swagger, parse_spec_text
+from src.utils.path_templates import PathTemplateTrie, normalize_path
+
+HTTP_METHODS = ("get", "post", "put", "patch", "delete", "head", "options", "trace")
+INDEX_CACHE_DIR = os.path.join(".cache", "spec_index")
+# Bump whenever the SpecIndex layout changes so stale pickles are ignored
+INDEX_VERSION = "1"
+
+
+class CircularRefError(ValueError):
+    pass
+
+
+class SpecIndex:
+    """
+    Compiled, query-friendly view of an OpenAPI/Swagger document.
+
+    Operations are looked up by (method, path template) in O(1) or matched
+    against concrete request paths through a template trie. Parameter,
+    request-body and response-code sets are extracted once per operation,
+    and $ref targets are resolved lazily and memoized.
+    """
+
+    def __init__(self, spec: dict, content_hash: str = None):
+        self.spec = spec
+        self.content_hash = content_hash or hashlib.sha256(
+            json.dumps(spec, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        self._refs = {}
+        self._schemas = {}
+        # template -> {"path": original path, "methods": {METHOD: operation}}
+        self.paths = {}
+        self.trie = PathTemplateTrie()
+        self._compile()
+
+    # -- $ref resolution ----------------------------------------------------
+    def ref(self, pointer: str):
+        """Resolve one local JSON pointer ('#/components/schemas/User'), memoized."""
+        if pointer in self._refs:
+            return self._refs[pointer]
+        if not pointer.startswith("#/"):
+            # External refs are left for the caller to interpret
+            return {"$ref": pointer}
+        target = self.spec
+        for part in pointer[2:].split("/"):
+            part = part.replace("~1", "/").replace("~0", "~")
+            target = target.get(part) if isinstance(target, dict) else None
+            if target is None:
+                break
+        self._refs[pointer] = target
+        return target
+
+    def deref(self, node):
+        """Follow a chain of $refs to a concrete node; raises on ref-only cycles."""
+        seen = []
+        while isinstance(node, dict) and "$ref" in node:
+            pointer = node["$ref"]
+            if pointer in seen:
+                raise CircularRefError(" -> ".join(seen + [pointer]))
+            seen.append(pointer)
+            resolved = self.ref(pointer)
+            if resolved is None or resolved == node:
+                return node
+            node = resolved
+        return node
+
+    def resolve_schema(self, node, _stack=()):
+        """
+        Fully inline a schema's $refs. Recursive schemas keep their $ref at
+        the point where they would recurse. Named schemas are memoized.
+        """
+        if isinstance(node, dict):
+            if "$ref" in node:
+                pointer = node["$ref"]
+                if pointer in _stack or not pointer.startswith("#/"):
+                    return {"$ref": pointer}
+                if pointer not in self._schemas:
+                    self._schemas[pointer] = self.resolve_schema(self.ref(pointer) or {}, _stack + (pointer,))
+                return self._schemas[pointer]
+            return {k: self.resolve_schema(v, _stack) for k, v in node.items()}
+        if isinstance(node, list):
+            return [self.resolve_schema(v, _stack) for v in node]
+        return node
+
+    # -- compilation --------------------------------------------------------
+    def _compile(self):
+        base_path = (self.spec.get("basePath") or "").rstrip("/")
+        for path, item in (self.spec.get("paths") or {}).items():
+            item = self.deref(item) or {}
+            full_path = base_path + path
+            template, _ = normalize_path(full_path)
+            entry = self.paths.setdefault(template, {"path": full_path, "methods": {}})
+            shared = item.get("parameters", [])
+            for method in HTTP_METHODS:
+                if method in item:
+                    entry["methods"][method.upper()] = self._compile_operation(
+                        full_path, template, method.upper(), item[method] or {}, shared)
+            self.trie.insert(template, entry)
+
+    def _compile_operation(self, path, template, method, raw, shared):
+        params = {}
+        for param in list(shared) + list(raw.get("parameters", [])):
+            param = self.deref(param)
+            if isinstance(param, dict) and "name" in param:
+                params[(param.get("in"), param["name"])] = param
+        parameters = list(params.values())
+
+        body = raw.get("requestBody")
+        body_param = next((p for p in parameters if p.get("in") == "body"), None)
+        if body is not None:
+            body = self.deref(body) or {}
+            request_body = {"required": bool(body.get("required")),
+                            "content_types": sorted((body.get("content") or {}).keys()),
+                            "content": body.get("content") or {}}
+        elif body_param is not None or any(p.get("in") == "formData" for p in parameters):
+            request_body = {"required": bool(body_param and body_param.get("required")),
+                            "content_types": raw.get("consumes") or self.spec.get("consumes") or ["application/json"],
+                            "schema": (body_param or {}).get("schema")}
+        else:
+            request_body = None
+
+        responses = {str(code): resp for code, resp in (raw.get("responses") or {}).items()}
+        return {
+            "path": path,
+            "template": template,
+            "method": method,
+            "operation_id": raw.get("operationId"),
+            "parameters": parameters,
+            "path_params": [p["name"] for p in parameters if p.get("in") == "path"],
+            "query_params": [p["name"] for p in parameters if p.get("in") == "query"],
+            "required_params": [p["name"] for p in parameters if p.get("required")],
+            "request_body": request_body,
+            "response_codes": sorted(responses),
+            "responses": responses,
+            "extensions": {k: v for k, v in raw.items() if k.startswith("x-")},
+            "raw": raw,
+        }
+
+    # -- queries ------------------------------------------------------------
+    def operation(self, method: str, path: str):
+        """O(1) lookup by method and path template in any route syntax."""
+        entry = self.paths.get(normalize_path(path)[0])
+        return entry["methods"].get(method.upper()) if entry else None
+
+    def match(self, method: str, request_path: str):
+        """Find the operation serving a concrete request path such as '/users/42'."""
+        entry, _ = self.trie.match(request_path)
+        return entry["methods"].get(method.upper()) if entry else None
+
+    def operations(self):
+        for entry in self.paths.values():
+            yield from entry["methods"].values()
+
+    def request_schema(self, operation: dict, content_type: str = "application/json"):
+        body = operation.get("request_body")
+        if not body:
+            return None
+        if "schema" in body:
+            return self.resolve_schema(body["schema"]) if body["schema"] else None
+        media = body["content"].get(content_type) or next(iter(body["content"].values()), {})
+        return self.resolve_schema(media.get("schema")) if media.get("schema") else None
+
+    def response_schema(self, operation: dict, status, content_type: str = "application/json",
+                        use_default: bool = True):
+        """Resolved response schema for a status code (falls back to 'NXX' and, with use_default, 'default')."""
+        responses = operation["responses"]
+        status = str(status)
+        raw = responses.get(status) or responses.get(f"{status[0]}XX") or (
+            responses.get("default") if use_default else None)
+        if raw is None:
+            return None
+        raw = self.deref(raw) or {}
+        if "schema" in raw:  # Swagger 2
+            return self.resolve_schema(raw["schema"])
+        content = raw.get("content") or {}
+        media = content.get(content_type) or next(iter(content.values()), {})
+        return self.resolve_schema(media.get("schema")) if media.get("schema") else None
+
+
+def _snapshot_path(content_hash: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"{content_hash}.v{INDEX_VERSION}.pickle")
+
+
+def _read_snapshot(content_hash: str, cache_dir: str):
+    try:
+        with open(_snapshot_path(content_hash, cache_dir), "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def _write_snapshot(index: SpecIndex, cache_dir: str):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _snapshot_path(index.content_hash, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_spec_index(source: str, cache_dir: str = INDEX_CACHE_DIR) -> SpecIndex:
+    """
+    Load a spec and compile it into a SpecIndex.
+    Local files are hashed before parsing, so an unchanged spec skips YAML
+    parsing entirely and is restored from its pickled snapshot.
+    """
+    file = Path(source)
+    if not source.startswith(("http://", "https://")) and file.exists():
+        raw = file.read_bytes()
+        content_hash = hashlib.sha256(raw).hexdigest()
+        index = _read_snapshot(content_hash, cache_dir)
+        if index is None:
+            index = SpecIndex(parse_spec_text(raw.decode("utf-8"), source), content_hash)
+            _write_snapshot(index, cache_dir)
+        return index
+
+    spec = load_swagger(source)
+    content_hash = hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    index = _read_snapshot(content_hash, cache_dir)
+    if index is None:
+        index = SpecIndex(spec, content_hash)
+        _write_snapshot(index, cache_dir)
+    return index
@@ -0,0 +1,172 @@
+"""
+Batch comparison of many repositories in one process pool.
+
+    python -m src.services.batch_compare manifest.yaml --workers 8
+
+The manifest is a JSON/YAML list (or JSONL file) of entries such as
+{"repo": "<git URL>", "spec": "<path or URL>", "base_url": "http://svc:8000",
+"commit": "<optional>", "name": "<optional label>"}. Results are appended
+to one JSONL report as each repository finishes.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
+
+from src.loader.load_swagger import yaml_load
+from src.services.compare_service import run_comparison
+
+DEFAULT_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 4)))
+BATCH_DIR = os.path.join("reports", "batch")
+
+
+def load_manifest(path: str) -> list:
+    """Read manifest entries, normalizing the /compare field names (git_repo, swagger)."""
+    with open(path, "r") as f:
+        text = f.read()
+    if path.endswith(".jsonl"):
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        entries = yaml_load(text)
+        if isinstance(entries, dict):
+            entries = entries.get("repos") or entries.get("entries") or []
+
+    normalized = []
+    for i, entry in enumerate(entries):
+        repo = entry.get("repo") or entry.get("git_repo")
+        spec = entry.get("spec") or entry.get("swagger")
+        if not repo or not spec:
+            raise ValueError(f"Manifest entry {i} needs both a repo and a spec: {entry}")
+        normalized.append({
+            "name": entry.get("name") or f"{i:03d}-{repo.rstrip('/').split('/')[-1].replace('.git', '')}",
+            "repo": repo,
+            "spec": spec,
+            "base_url": entry.get("base_url") or "http://127.0.0.1:8000",
+            "commit": entry.get("commit"),
+        })
+    return normalized
+
+
+def compare_entry(entry: dict, log_dir: str) -> dict:
+    """
+    Run one manifest entry in a pool worker. Its progress output goes to
+    its own log file and any exception becomes a failed result, so one
+    bad repo or spec never takes the batch down.
+    """
+    started = time.perf_counter()
+    log_path = os.path.join(log_dir, f"{entry['name']}.log")
+    result = dict(entry, log=log_path, started_at=datetime.now().isoformat())
+    with open(log_path, "w") as log, redirect_stdout(log), redirect_stderr(log):
+        try:
+            result["summary"] = run_comparison(entry["repo"], entry["spec"], commit=entry["commit"],
+                                               base_url=entry["base_url"])
+            result["status"] = "completed"
+        except Exception as e:
+            traceback.print_exc()
+            result["status"] = "failed"
+            result["error"] = str(e)
+    result["duration_s"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _run_pool(entries: list, log_dir: str, workers: int):
+    """
+    Yield (entry, result) as entries finish in one process pool; result is
+    None for entries that were still pending when a worker died, since a
+    dead worker breaks the whole pool.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for entry in entries:
+            try:
+                futures[pool.submit(compare_entry, entry, log_dir)] = entry
+            except BrokenProcessPool:
+                yield entry, None
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                yield entry, future.result()
+            except BrokenProcessPool:
+                yield entry, None
+            except Exception as e:
+                yield entry, dict(entry, status="failed", error=f"worker failed: {e}")
+
+
+def run_batch(entries: list, output_path: str, workers: int = DEFAULT_WORKERS) -> dict:
+    """
+    Compare every entry across a process pool and stream results to
+    output_path (JSONL, one 'result' line per repo then a 'summary' line).
+    Workers share the on-disk repo mirrors, spec index snapshots, route
+    caches and LLM response cache, so repeated specs and repos are cheap.
+
+    A worker that dies (e.g. out of memory) breaks the pool for every
+    pending entry, so those are resubmitted to a new pool. Entries caught
+    in a broken pool a second time run alone, which pins the crash on the
+    entry that caused it instead of failing its neighbours.
+    """
+    log_dir = os.path.splitext(output_path)[0] + "_logs"
+    os.makedirs(log_dir, exist_ok=True)
+    counts = {"completed": 0, "failed": 0}
+    started = time.perf_counter()
+    done = 0
+
+    with open(output_path, "w") as out:
+        def record(entry, result):
+            nonlocal done
+            done += 1
+            counts[result["status"]] += 1
+            out.write(json.dumps(dict(result, type="result"), default=str) + "\n")
+            out.flush()
+            icon = "✅" if result["status"] == "completed" else "❌"
+            print(f"{icon} [{done}/{len(entries)}] {entry['name']} {result['status']}"
+                  f"{' in ' + str(result['duration_s']) + 's' if 'duration_s' in result else ''}"
+                  f"{': ' + result['error'] if result.get('error') else ''}")
+
+        pending, broken = list(entries), set()
+        while pending:
+            groups = [[e for e in pending if id(e) not in broken]] + [[e] for e in pending if id(e) in broken]
+            pending = []
+            for group in groups:
+                if not group:
+                    continue
+                for entry, result in _run_pool(group, log_dir, min(workers, len(group))):
+                    if result is not None:
+                        record(entry, result)
+                    elif len(group) == 1 and id(entry) in broken:
+                        record(entry, dict(entry, status="failed", error="worker crashed"))
+                    else:
+                        print(f"⚠️ {entry['name']} was interrupted by a crashed worker; retrying")
+                        broken.add(id(entry))
+                        pending.append(entry)
+
+        summary = {"type": "summary", "repos": len(entries), **counts,
+                   "duration_s": round(time.perf_counter() - started, 3)}
+        out.write(json.dumps(summary) + "\n")
+
+    print(f"🧾 Batch report saved at: {output_path} ({counts['completed']} completed, {counts['failed']} failed)")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare many repositories against their specs in one batch.")
+    parser.add_argument("manifest", help="JSON, YAML or JSONL list of {repo, spec, base_url, commit, name}")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent repositories")
+    parser.add_argument("--output", help="JSONL report path (default reports/batch/batch_<timestamp>.jsonl)")
+    args = parser.parse_args(argv)
+
+    entries = load_manifest(args.manifest)
+    output_path = args.output or os.path.join(BATCH_DIR, f"batch_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.jsonl")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    print(f"📦 Comparing {len(entries)} repositories with {args.workers} workers")
+    summary = run_batch(entries, output_path, args.workers)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,80 +1,196 @@
 import os
 import json
+from contextlib import ExitStack
 from datetime import datetime
-from src.loader.load_swagger import load_swagger
-from src.loader.load_backend_code import extract_routes_ai
-from src.utils.git_utils import clone_or_pull_repo
+from src.loader.spec_index import load_spec_index
+from src.loader.load_backend_code import extract_routes_ai, SOURCE_EXTENSIONS
+from src.utils.git_utils import checkout_worktree, head_commit
 from src.ai.predict_divergence import compare_api_contract
+from src.services.divergence_engine import REPORT_KEYS
 from src.ai.generate_testcases import generate_test_cases_from_divergence
-from src.services.run_tests import execute_generated_tests
+from src.generator.postman_generator import generate_collection_from_testcases
+from src.services.run_tests import execute_testcases
+from src.services.load_test import run_load_test
+from src.services.pipeline import Pipeline
+from src.services.incremental import run_incremental_comparison, save_baseline
+from src.ai.llm_cache import get_cache
+from src.utils import tracing
 
 
-def run_comparison(repo_url: str, swagger_source: str) -> dict:
+def run_comparison(repo_url: str, swagger_source: str, commit: str = None,
+                   base_url: str = "http://127.0.0.1:8000", incremental: bool = False,
+                   load_duration: float = None, load_rate: float = None, load_concurrency: int = None) -> dict:
     """
     Main function to compare Swagger API spec with backend code routes.
-    1. Pulls or clones the Git repo.
+    1. Checks out the repo (at `commit` when given) in a private worktree.
     2. Extracts backend routes.
-    3. Compares them with Swagger using Gemini.
+    3. Compares them with Swagger (locally, Gemini optional).
     4. Generates divergence report & test cases.
     5. Executes generated tests automatically.
+
+    Stages run as a DAG: the spec loads while the repo is checked out,
+    and test cases stream into execution as soon as they are generated.
+    Tests are sent to the running service at `base_url`.
+
+    With incremental, only endpoints touched since the last analyzed commit
+    are re-checked (see src.services.incremental); the first run for a
+    repo and spec is always a full one.
+
+    With load_duration (seconds), the generated cases are also replayed
+    under load (at load_rate req/s, or with load_concurrency clients) and
+    operations missing their x-sla-* latency budgets are reported as
+    sla_breaches. Load runs are always full runs: latency depends on the
+    live service, not on which files changed.
     """
+    load = None
+    if load_duration:
+        load = {"duration": load_duration, "rate": load_rate}
+        if load_concurrency:
+            load["concurrency"] = load_concurrency
+    elif incremental:
+        summary = run_incremental_comparison(repo_url, swagger_source, commit, base_url)
+        if summary is not None:
+            return summary
+        print(f"ℹ️ No usable baseline for {repo_url}, running a full comparison")
 
     print(f"📦 Starting API divergence comparison for repo: {repo_url}")
 
-    # Step 1: Clone or pull the latest repo
-    local_repo_path = os.path.join(os.getcwd(), "cloned_repo")
-    repo_path = clone_or_pull_repo(repo_url, local_repo_path)
-    print(f"✅ Repo synced at: {repo_path}")
-
-    # Step 2: Load Swagger file
-    swagger = load_swagger(swagger_source)
-    print("✅ Swagger loaded successfully")
-
-    # Step 3: Extract backend routes
-    all_routes = extract_routes_ai(repo_path)
-    print(f"✅ Extracted backend routes: {len(all_routes)} endpoints found")
-
-    # Step 4: Compare using Gemini AI
-    print("🤖 Running Gemini divergence analysis...")
-    comparison = compare_api_contract(swagger, all_routes)
-
-    # Step 5: Save divergence report
-    os.makedirs("reports", exist_ok=True)
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    divergence_path = f"reports/report_{timestamp}.json"
-    with open(divergence_path, "w") as f:
-        json.dump(comparison, f, indent=4)
-    print(f"✅ Divergence report saved at: {divergence_path}")
-
-    # Step 6: Generate test cases based on divergence
-    print("🧠 Generating test cases from divergences...")
-    testcases = generate_test_cases_from_divergence(comparison)
-    os.makedirs("reports/testcases", exist_ok=True)
-    testcases_path = f"reports/testcases/testcases_{timestamp}.json"
-    with open(testcases_path, "w") as f:
-        json.dump(testcases, f, indent=4)
-    print(f"✅ Test cases saved at: {testcases_path}")
-
-    # Step 7: Execute generated test cases
-    print("🧪 Executing generated test cases...")
-    execution_report = execute_generated_tests(testcases_path)
-    print(f"🧾 Execution report generated: {execution_report}")
+    with tracing.span("comparison", repo_url=repo_url, commit=commit or ""), ExitStack() as worktree:
+        results = _build_pipeline(repo_url, swagger_source, commit, base_url, worktree, load).run()
+
+    print(f"✅ Process completed for repo: {repo_url}")
+    return results["summarize"]
+
+
+def _build_pipeline(repo_url: str, swagger_source: str, commit: str, base_url: str,
+                    worktree: ExitStack, load: dict = None) -> Pipeline:
+    pipeline = Pipeline()
+    testcase_stream = pipeline.stream()
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+
+    # Step 1: Check out the commit from the repo's shared mirror; only
+    # source files the extractors read are materialized
+    def checkout():
+        repo_path = worktree.enter_context(
+            checkout_worktree(repo_url, commit, sparse_extensions=SOURCE_EXTENSIONS))
+        print(f"✅ Repo synced at: {repo_path}")
+        return {"path": repo_path, "commit": head_commit(repo_path)}
+
+    # Step 2: Load Swagger file into a compiled index (independent of the repo)
+    def load_spec():
+        swagger = load_spec_index(swagger_source)
+        span = tracing.current_span()
+        span.add("operations", sum(len(entry["methods"]) for entry in swagger.paths.values()))
+        if os.path.isfile(swagger_source):
+            span.add("bytes_read", os.path.getsize(swagger_source))
+        print(f"✅ Swagger loaded successfully ({len(swagger.paths)} paths)")
+        return swagger
+
+    # Step 3: Extract backend routes, then release the worktree
+    def extract_routes(checkout):
+        try:
+            all_routes = extract_routes_ai(checkout["path"])
+        finally:
+            worktree.close()
+        tracing.current_span().add("routes", len(all_routes))
+        print(f"✅ Extracted backend routes: {len(all_routes)} endpoints found")
+        return all_routes
+
+    # Step 4: Compare spec and routes
+    def compare(load_spec, extract_routes):
+        print("🔍 Running divergence analysis...")
+        comparison = compare_api_contract(load_spec, extract_routes)
+        tracing.current_span().add("divergences", sum(len(comparison.get(key, [])) for key in REPORT_KEYS))
+        return comparison
+
+    # Step 5: Save divergence report, with SLA breaches when load testing
+    def write_report(compare, load_test=None):
+        report = dict(compare, sla_breaches=load_test["sla_breaches"]) if load_test else compare
+        os.makedirs("reports", exist_ok=True)
+        divergence_path = f"reports/report_{timestamp}.json"
+        with open(divergence_path, "w") as f:
+            json.dump(report, f, indent=4)
+        tracing.current_span().add("bytes_written", os.path.getsize(divergence_path))
+        print(f"✅ Divergence report saved at: {divergence_path}")
+        return divergence_path
+
+    # Step 6: Generate test cases based on divergence, handing each one to
+    # execution as soon as it exists
+    def generate_tests(load_spec, compare):
+        print("🧠 Generating test cases from divergences...")
+        try:
+            testcases = generate_test_cases_from_divergence(compare, spec=load_spec, on_case=testcase_stream.put)
+        finally:
+            testcase_stream.close()
+        os.makedirs("reports/testcases", exist_ok=True)
+        testcases_path = f"reports/testcases/testcases_{timestamp}.json"
+        with open(testcases_path, "w") as f:
+            json.dump(testcases, f, indent=4)
+        tracing.current_span().add("testcases", len(testcases))
+        print(f"✅ Test cases saved at: {testcases_path}")
+        return {"path": testcases_path, "count": len(testcases)}
+
+    # Step 7: Execute generated test cases while they are still being generated
+    def execute_tests(load_spec):
+        print("🧪 Executing generated test cases...")
+        execution_report = execute_testcases(testcase_stream, base_url, spec=load_spec)
+        print(f"🧾 Execution report generated: {execution_report}")
+        return execution_report
+
+    # Optional: replay the generated cases under load and check SLA budgets
+    def load_test(load_spec, compare, generate_tests, execute_tests):
+        with open(generate_tests["path"], "r") as f:
+            testcases = json.load(f)
+        return run_load_test(testcases, base_url, spec=load_spec, report=compare, **load)
+
+    # Remember what was analyzed so the next run can be incremental
+    def save_baseline_stage(checkout, load_spec, extract_routes, compare):
+        save_baseline(repo_url, swagger_source, checkout["commit"], load_spec, extract_routes, compare)
+        return checkout["commit"]
+
+    # Export the cases as a Postman collection for CI (src.generator.postman_runner)
+    def export_postman(generate_tests):
+        return generate_collection_from_testcases(generate_tests["path"], base_url=base_url)
 
     # Step 8: Combine final summary
-    summary = {
-        "repo_url": repo_url,
-        "divergence_report": divergence_path,
-        "testcases_report": testcases_path,
-        "execution_report": execution_report,
-        "divergences_found": len(comparison.get("missing_endpoints", []))
-        + len(comparison.get("extra_endpoints", []))
-        + len(comparison.get("method_mismatches", []))
-        + len(comparison.get("parameter_mismatches", []))
-        + len(comparison.get("request_body_mismatches", []))
-        + len(comparison.get("response_mismatches", []))
-        + len(comparison.get("status_code_mismatches", [])),
-        "testcases_generated": len(testcases),
-    }
+    def summarize(compare, write_report, generate_tests, execute_tests, export_postman, save_baseline,
+                  load_test=None):
+        breaches = load_test["sla_breaches"] if load_test else []
+        summary = {
+            "repo_url": repo_url,
+            "commit": commit,
+            "analyzed_commit": save_baseline,
+            "divergence_report": write_report,
+            "testcases_report": generate_tests["path"],
+            "execution_report": execute_tests,
+            "postman_collection": export_postman,
+            "divergences_found": sum(len(compare.get(key, [])) for key in REPORT_KEYS) + len(breaches),
+            "testcases_generated": generate_tests["count"],
+            "llm_cache": get_cache().stats(),
+        }
+        if load_test:
+            summary["load_report"] = load_test["path"]
+            summary["sla_breaches"] = len(breaches)
+        return summary
 
-    print(f"✅ Process completed for repo: {repo_url}")
-    return summary
+    pipeline = (pipeline
+                .stage("checkout", checkout)
+                .stage("load_spec", load_spec)
+                .stage("extract_routes", extract_routes, after=("checkout",))
+                .stage("compare", compare, after=("load_spec", "extract_routes"))
+                .stage("generate_tests", generate_tests, after=("load_spec", "compare"))
+                .stage("execute_tests", execute_tests, after=("load_spec",))
+                .stage("export_postman", export_postman, after=("generate_tests",))
+                .stage("save_baseline", save_baseline_stage,
+                       after=("checkout", "load_spec", "extract_routes", "compare")))
+    report_after = ("compare",)
+    summary_after = ("compare", "write_report", "generate_tests", "execute_tests", "export_postman",
+                     "save_baseline")
+    if load:
+        # After the functional run, so the two do not skew each other's latencies
+        pipeline.stage("load_test", load_test, after=("load_spec", "compare", "generate_tests", "execute_tests"))
+        report_after += ("load_test",)
+        summary_after += ("load_test",)
+    return (pipeline
+            .stage("write_report", write_report, after=report_after)
+            .stage("summarize", summarize, after=summary_after))
@@ -0,0 +1,136 @@
+from src.loader.spec_index import SpecIndex
+from src.utils.path_templates import normalize_path
+
+REPORT_KEYS = (
+    "missing_endpoints",
+    "extra_endpoints",
+    "method_mismatches",
+    "parameter_mismatches",
+    "request_body_mismatches",
+    "response_mismatches",
+    "status_code_mismatches",
+    # Filled by load testing (src.services.load_test), not by static comparison
+    "sla_breaches",
+)
+
+
+def empty_report() -> dict:
+    return {key: [] for key in REPORT_KEYS}
+
+
+def as_index(swagger_spec) -> SpecIndex:
+    """Accept either a raw spec dict or an already compiled SpecIndex."""
+    return swagger_spec if isinstance(swagger_spec, SpecIndex) else SpecIndex(swagger_spec)
+
+
+def _normalize_route(route):
+    """Backend routes may be {'method','path',...} dicts or bare path strings."""
+    if isinstance(route, str):
+        return {"method": None, "path": route}
+    method = route.get("method")
+    return dict(route, method=method.upper() if method else None)
+
+
+def _compare_operation(report, path, method, operation, route, spec_param_names):
+    _, backend_path = normalize_path(route["path"])
+    if backend_path != spec_param_names:
+        # Frameworks bind path parameters by name, so a rename is a real divergence
+        report["parameter_mismatches"].append({
+            "path": path, "method": method, "location": "path",
+            "swagger": spec_param_names, "backend": backend_path,
+        })
+
+    if "query_params" in route:
+        spec_query = operation["query_params"]
+        backend_query = set(route.get("query_params") or [])
+        missing = sorted(n for n in spec_query if n not in backend_query)
+        extra = sorted(n for n in backend_query if n not in spec_query)
+        if missing or extra:
+            report["parameter_mismatches"].append({
+                "path": path, "method": method, "location": "query",
+                "missing_in_backend": missing, "undocumented_in_swagger": extra,
+            })
+
+    if "request_model" in route:
+        spec_body = operation["request_body"] is not None
+        backend_body = route.get("request_model") is not None
+        if spec_body != backend_body:
+            report["request_body_mismatches"].append({
+                "path": path, "method": method,
+                "swagger_expects_body": spec_body,
+                "backend_model": route.get("request_model"),
+            })
+
+
+def compute_divergence(swagger_spec, backend_routes: list) -> dict:
+    """
+    Deterministically compare a Swagger/OpenAPI spec with backend routes.
+    Paths are matched on normalized templates, so '{id}', ':id' and '<int:id>'
+    are equivalent. Runs in O(routes + operations).
+
+    Response and status-code checks need schema knowledge of the handlers
+    and are left empty here for an optional LLM pass.
+    """
+    report = empty_report()
+    index = as_index(swagger_spec)
+    matched = set()
+
+    # Group backend routes by template, keeping per-method route details
+    backend = {}
+    for route in backend_routes:
+        route = _normalize_route(route)
+        if not route.get("path"):
+            continue
+        template, _ = normalize_path(route["path"])
+        group = backend.setdefault(template, {"path": route["path"], "methods": {}})
+        group["methods"].setdefault(route["method"], route)
+
+    # Sorted so the report (and any prompt built from it) does not depend on
+    # the order routes were extracted in
+    for template, group in sorted(backend.items()):
+        entry = index.trie.get(template)
+        if entry is None:
+            for method in sorted(group["methods"], key=lambda m: m or ""):
+                report["extra_endpoints"].append({"path": group["path"], "method": method or "ANY"})
+            continue
+        matched.add(template)
+        _, spec_param_names = normalize_path(entry["path"])
+
+        spec_methods = set(entry["methods"])
+        backend_methods = set(m for m in group["methods"] if m)
+        if None in group["methods"]:
+            # Bare path strings carry no method information
+            backend_methods |= spec_methods
+        if spec_methods != backend_methods:
+            report["method_mismatches"].append({
+                "path": entry["path"],
+                "swagger_methods": sorted(spec_methods),
+                "backend_methods": sorted(backend_methods),
+            })
+        for method in sorted(spec_methods & backend_methods):
+            route = group["methods"].get(method) or group["methods"][None]
+            _compare_operation(report, entry["path"], method, entry["methods"][method], route, spec_param_names)
+
+    for template, entry in index.paths.items():
+        if template not in matched:
+            for method in entry["methods"]:
+                report["missing_endpoints"].append({"path": entry["path"], "method": method})
+
+    return report
+
+
+def matched_operations(swagger_spec, backend_routes: list) -> list:
+    """(path, method) pairs implemented on both sides, for schema-level follow-up."""
+    index = as_index(swagger_spec)
+    pairs = set()
+    for route in backend_routes:
+        route = _normalize_route(route)
+        template, _ = normalize_path(route.get("path", ""))
+        entry = index.paths.get(template)
+        if entry is None:
+            continue
+        methods = entry["methods"] if route["method"] is None else [route["method"]]
+        for method in methods:
+            if method in entry["methods"]:
+                pairs.add((entry["path"], method))
+    return sorted(pairs)
@@ -0,0 +1,227 @@
+"""
+Commit-range differential analysis.
+
+After every full comparison the repo's routes, spec fingerprints and
+report are stored as a baseline. An incremental run diffs the new commit
+against that baseline's commit, works out which endpoint templates the
+change can affect, and re-runs comparison, test generation and execution
+for those templates only. The fresh entries replace the baseline's
+entries for the same templates, giving a complete report for the new
+commit.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import git
+
+from src.ai.generate_testcases import generate_test_cases_from_divergence
+from src.ai.llm_cache import get_cache
+from src.ai.predict_divergence import compare_api_contract
+from src.generator.postman_generator import generate_collection_from_testcases
+from src.loader.load_backend_code import SOURCE_EXTENSIONS, extract_routes_ai
+from src.loader.spec_index import load_spec_index
+from src.services.divergence_engine import REPORT_KEYS, empty_report
+from src.services.run_tests import execute_testcases
+from src.utils import tracing
+from src.utils.git_utils import changed_files, checkout_worktree, ensure_mirror, fetch_commit
+from src.utils.path_templates import normalize_path
+
+BASELINE_DIR = os.path.join(".cache", "incremental")
+# Bump whenever the stored baseline layout changes so old baselines are ignored
+BASELINE_VERSION = "1"
+
+
+def _baseline_path(repo_url: str, swagger_source: str, baseline_dir: str = BASELINE_DIR) -> str:
+    name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
+    key = hashlib.sha1(f"{repo_url}\n{swagger_source}".encode("utf-8")).hexdigest()[:12]
+    return os.path.join(baseline_dir, f"{name}-{key}.json")
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def operation_fingerprints(index) -> dict:
+    """'METHOD template' -> hash of the operation with every $ref inlined."""
+    fingerprints = {}
+    for operation in index.operations():
+        resolved = index.resolve_schema({"parameters": operation["parameters"], "raw": operation["raw"]})
+        fingerprints[f"{operation['method']} {operation['template']}"] = _digest(resolved)
+    return fingerprints
+
+
+def _template(path) -> str:
+    return normalize_path(path or "")[0]
+
+
+def _route_fingerprints(routes: list) -> dict:
+    """template -> sorted hashes of its route records; line numbers are ignored."""
+    by_template = {}
+    for route in routes:
+        if isinstance(route, str):
+            route = {"path": route}
+        record = {k: v for k, v in route.items() if k != "line"}
+        by_template.setdefault(_template(route.get("path")), []).append(_digest(record))
+    return {template: sorted(hashes) for template, hashes in by_template.items()}
+
+
+def _route_file(route):
+    return os.path.normpath(route["file"]) if isinstance(route, dict) and route.get("file") else None
+
+
+def load_baseline(repo_url: str, swagger_source: str):
+    try:
+        with open(_baseline_path(repo_url, swagger_source), "r") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return baseline if baseline.get("version") == BASELINE_VERSION else None
+
+
+def save_baseline(repo_url: str, swagger_source: str, commit: str, index, routes: list, report: dict):
+    """Record what was analyzed at `commit`, for the next incremental run to diff against."""
+    path = _baseline_path(repo_url, swagger_source)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    baseline = {
+        "version": BASELINE_VERSION,
+        "repo_url": repo_url,
+        "swagger_source": swagger_source,
+        "commit": commit,
+        "spec_hash": index.content_hash,
+        "operations": operation_fingerprints(index),
+        "routes": routes,
+        "report": report,
+        "analyzed_at": datetime.now().isoformat(),
+    }
+    # Concurrent runs for the same repo may race; the last one to finish wins
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(baseline, f)
+    os.replace(tmp_path, path)
+
+
+def touched_templates(baseline: dict, routes: list, index, changed: list, operations: dict = None) -> set:
+    """
+    Endpoint templates whose result may differ from the baseline:
+    routes defined in changed files (before or after the change), routes
+    whose extracted record changed (e.g. a router prefix edited in another
+    file), and spec operations that were added, removed or modified.
+    """
+    changed = {os.path.normpath(path) for path in changed}
+    touched = set()
+    for route in list(baseline["routes"]) + list(routes):
+        if _route_file(route) in changed:
+            touched.add(_template(route.get("path")))
+
+    old_routes, new_routes = _route_fingerprints(baseline["routes"]), _route_fingerprints(routes)
+    touched |= {t for t in old_routes.keys() | new_routes.keys() if old_routes.get(t) != new_routes.get(t)}
+
+    if index.content_hash != baseline["spec_hash"]:
+        old_ops, new_ops = baseline["operations"], operations or operation_fingerprints(index)
+        for key in old_ops.keys() | new_ops.keys():
+            if old_ops.get(key) != new_ops.get(key):
+                touched.add(key.split(" ", 1)[1])
+    touched.discard("")
+    return touched
+
+
+def _in_templates(entry, templates: set) -> bool:
+    return isinstance(entry, dict) and bool(entry.get("path")) and _template(entry["path"]) in templates
+
+
+def merge_reports(previous: dict, delta: dict, templates: set) -> dict:
+    """Previous entries for untouched templates plus the fresh entries for touched ones."""
+    merged = empty_report()
+    for key in set(REPORT_KEYS) | previous.keys() | delta.keys():
+        kept = [e for e in previous.get(key, []) if not _in_templates(e, templates)]
+        merged[key] = kept + [e for e in delta.get(key, []) if _in_templates(e, templates)]
+    return merged
+
+
+def run_incremental_comparison(repo_url: str, swagger_source: str, commit: str = None,
+                               base_url: str = "http://127.0.0.1:8000"):
+    """
+    Re-check only the endpoints touched since the last analyzed commit.
+    Returns the same summary as run_comparison, or None when there is no
+    usable baseline (first run, or its commit is gone) and a full run is needed.
+    """
+    baseline = load_baseline(repo_url, swagger_source)
+    if baseline is None:
+        return None
+    mirror_path = ensure_mirror(repo_url)
+    try:
+        sha = fetch_commit(mirror_path, commit)
+        changed = changed_files(repo_url, baseline["commit"], sha)
+    except git.GitCommandError as e:
+        print(f"⚠️ Cannot diff against baseline {baseline['commit'][:12]}: {e}")
+        return None
+
+    print(f"📦 Incremental comparison for {repo_url}: {baseline['commit'][:12]}..{sha[:12]}, "
+          f"{len(changed)} files changed")
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+
+    with tracing.span("comparison", repo_url=repo_url, commit=commit or "", mode="incremental") as span:
+        span.add("files_changed", len(changed))
+        with tracing.span("load_spec"):
+            index = load_spec_index(swagger_source)
+
+        # Extraction reuses the per-blob route caches, so only changed files are re-read
+        if any(path.endswith(SOURCE_EXTENSIONS) for path in changed):
+            with tracing.span("extract_routes"), \
+                    checkout_worktree(repo_url, sha, sparse_extensions=SOURCE_EXTENSIONS) as repo_path:
+                routes = extract_routes_ai(repo_path)
+        else:
+            routes = baseline["routes"]
+
+        operations = operation_fingerprints(index)
+        templates = touched_templates(baseline, routes, index, changed, operations)
+        span.add("endpoints_touched", len(templates))
+        print(f"🔍 Re-checking {len(templates)} touched endpoint templates...")
+
+        with tracing.span("compare"):
+            subset = [r for r in routes if _template(r.get("path") if isinstance(r, dict) else r) in templates]
+            delta = compare_api_contract(index, subset) if templates else empty_report()
+            report = merge_reports(baseline["report"], delta, templates)
+
+        os.makedirs("reports", exist_ok=True)
+        divergence_path = f"reports/report_{timestamp}.json"
+        with open(divergence_path, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"✅ Divergence report saved at: {divergence_path}")
+
+        with tracing.span("generate_tests"):
+            delta_report = {key: [e for e in delta.get(key, []) if _in_templates(e, templates)]
+                            for key in delta}
+            testcases = generate_test_cases_from_divergence(delta_report, spec=index) if templates else []
+        os.makedirs("reports/testcases", exist_ok=True)
+        testcases_path = f"reports/testcases/testcases_{timestamp}.json"
+        with open(testcases_path, "w") as f:
+            json.dump(testcases, f, indent=4)
+        print(f"✅ Test cases saved at: {testcases_path} ({len(testcases)} for touched endpoints)")
+
+        with tracing.span("execute_tests"):
+            execution_report = execute_testcases(testcases, base_url, spec=index)
+        with tracing.span("export_postman"):
+            postman_collection = generate_collection_from_testcases(testcases_path, base_url=base_url)
+
+        save_baseline(repo_url, swagger_source, sha, index, routes, report)
+
+    print(f"✅ Incremental comparison completed for repo: {repo_url}")
+    return {
+        "repo_url": repo_url,
+        "commit": commit,
+        "analyzed_commit": sha,
+        "mode": "incremental",
+        "baseline_commit": baseline["commit"],
+        "files_changed": len(changed),
+        "endpoints_rechecked": sorted(templates),
+        "divergence_report": divergence_path,
+        "testcases_report": testcases_path,
+        "execution_report": execution_report,
+        "postman_collection": postman_collection,
+        "divergences_found": sum(len(report.get(key, [])) for key in REPORT_KEYS),
+        "testcases_generated": len(testcases),
+        "llm_cache": get_cache().stats(),
+    }
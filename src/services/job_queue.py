@@ -0,0 +1,135 @@
+import os
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from uuid import uuid4
+
+from src.services.compare_service import run_comparison
+from src.utils import tracing
+
+DEFAULT_WORKERS = int(os.getenv("COMPARE_WORKERS", "4"))
+# Finished jobs kept around for GET /jobs/{id}; the oldest are dropped first
+MAX_FINISHED_JOBS = int(os.getenv("COMPARE_JOB_HISTORY", "1000"))
+
+
+class JobQueue:
+    """
+    Runs comparisons on a worker pool so request handlers return immediately.
+
+    Identical in-flight jobs (same repo, commit, spec and options) share one job ID.
+    Every run checks out its own worktree, so any jobs can run in parallel.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, runner=run_comparison):
+        self.workers = workers
+        self.runner = runner
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compare")
+        self._jobs = OrderedDict()
+        self._in_flight = {}
+        self._callbacks = {}
+        self._lock = threading.Lock()
+
+    def submit(self, repo_url: str, swagger_source: str, commit: str = None, on_complete=None, **options) -> dict:
+        """
+        Queue a comparison. on_complete(job) is called from the worker after
+        the job completes or fails (not when it is cancelled), including when
+        the submit is deduplicated onto a job that is already queued or running.
+        """
+        key = (repo_url, commit, swagger_source, tuple(sorted(options.items())))
+        with self._lock:
+            job_id = self._in_flight.get(key)
+            if job_id is not None:
+                if on_complete:
+                    self._callbacks[job_id].append(on_complete)
+                return dict(self._jobs[job_id], deduplicated=True)
+            job = {
+                "id": uuid4().hex,
+                "status": "queued",
+                "repo_url": repo_url,
+                "commit": commit,
+                "swagger_source": swagger_source,
+                "options": options,
+                "created_at": datetime.now().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._callbacks[job["id"]] = [on_complete] if on_complete else []
+            self._jobs[job["id"]] = job
+            self._in_flight[key] = job["id"]
+        self._pool.submit(self._run, job, key, options)
+        return dict(job, deduplicated=False)
+
+    def _run(self, job, key, options):
+        with self._lock:
+            cancelled = job["status"] == "cancelled"
+            if not cancelled:
+                job["status"] = "running"
+                job["started_at"] = datetime.now().isoformat()
+        if not cancelled:
+            try:
+                job["result"] = self.runner(repo_url=job["repo_url"], swagger_source=job["swagger_source"],
+                                            commit=job["commit"], **options)
+                job["status"] = "completed"
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = str(e)
+                traceback.print_exc()
+            finally:
+                job["finished_at"] = datetime.now().isoformat()
+            tracing.registry.inc("divergence_jobs_total", help_text="Comparison jobs by final status",
+                                 status=job["status"])
+        # Taken together with the in-flight entry, so a later identical submit
+        # either lands its callback here or starts a new job
+        with self._lock:
+            callbacks = self._callbacks.pop(job["id"], [])
+            if self._in_flight.get(key) == job["id"]:
+                self._in_flight.pop(key)
+            self._trim()
+        if not cancelled:
+            for callback in callbacks:
+                try:
+                    callback(dict(job))
+                except Exception:
+                    traceback.print_exc()
+
+    def _trim(self):
+        finished = [j for j in self._jobs.values() if j["status"] in ("completed", "failed", "cancelled")]
+        for job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job["id"]]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet. Running jobs are left alone."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return False
+            job["status"] = "cancelled"
+            job["finished_at"] = datetime.now().isoformat()
+            key = (job["repo_url"], job["commit"], job["swagger_source"], tuple(sorted(job["options"].items())))
+            if self._in_flight.get(key) == job_id:
+                del self._in_flight[key]
+            return True
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
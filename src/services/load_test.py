@@ -0,0 +1,383 @@
+"""
+Load-testing mode for generated test cases.
+
+    python -m src.services.load_test reports/testcases/testcases_<ts>.json \
+        --base-url http://127.0.0.1:8000 --spec openapi.yaml --duration 30 --rate 50
+
+Cases that expect a successful response are replayed round-robin for a
+fixed duration, either at a target request rate (open loop) or with a
+fixed number of concurrent clients (closed loop). Latencies go into
+HDR-style histograms per spec operation, and each operation's results are
+checked against the budgets it declares through OpenAPI extensions:
+
+    x-sla-p95-ms: 200        # any percentile: x-sla-p50-ms, x-sla-p99.9-ms...
+    x-sla-error-rate: 0.01   # largest tolerated fraction of errors
+
+Breaches are reported under the `sla_breaches` divergence category.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from src.generator.testcase_templates import TestcaseGenerator
+from src.loader.spec_index import load_spec_index
+from src.services.test_executor import DEFAULT_PER_HOST_LIMIT, ExecutionEngine, explicit_statuses
+from src.utils import tracing
+
+SLA_PERCENTILE = re.compile(r"^x-sla-p(\d+(?:\.\d+)?)-ms$")
+SLA_ERROR_RATE = "x-sla-error-rate"
+# Below this many samples a p95/p99 is just the slowest request, so budgets are not judged
+MIN_SLA_SAMPLES = int(os.getenv("LOAD_MIN_SLA_SAMPLES", "20"))
+REPORTED_PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram with bounded relative error.
+
+    Values are stored in microseconds in log-linear buckets: every
+    power-of-two range is split into the same number of linear
+    sub-buckets, sized so a recorded value is off by less than
+    10**-significant_figures whatever its magnitude. Buckets are sparse,
+    so memory grows with the spread of values, not the request count,
+    and histograms from several workers merge by adding counts.
+    """
+
+    def __init__(self, significant_figures: int = 2):
+        self.significant_figures = significant_figures
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_figures))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value: int) -> int:
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return shift * self.sub_bucket_count + (value >> shift)
+
+    def _highest_equivalent(self, index: int) -> int:
+        shift, sub = divmod(index, self.sub_bucket_count)
+        return ((sub + 1) << shift) - 1
+
+    def record(self, latency_ms: float):
+        value = max(0, int(round(latency_ms * 1000)))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    def percentile(self, pct: float) -> float:
+        """Latency in ms at `pct` (nearest rank), never above the largest recorded value."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max) / 1000
+        return self.max / 1000
+
+    def to_dict(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        summary = {"count": self.count, "min": self.min / 1000, "mean": round(self.total / self.count / 1000, 3)}
+        for pct in REPORTED_PERCENTILES:
+            summary[f"p{pct:g}"] = self.percentile(pct)
+        summary["max"] = self.max / 1000
+        return summary
+
+
+class EndpointStats:
+    """Histogram and outcome counters for one operation."""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.unexpected = 0
+        self.statuses = {}
+
+    def add(self, result: dict, latency_ms: float):
+        self.requests += 1
+        status = result.get("status")
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        # Transport failures and 5xx count against the error budget; a wrong
+        # 2xx/4xx is a functional failure, already covered by the normal run
+        if result["result"] == "ERROR" or (status is not None and status >= 500):
+            self.errors += 1
+        elif result["result"] == "FAIL":
+            self.unexpected += 1
+        if latency_ms is not None:
+            self.histogram.record(latency_ms)
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 6),
+            "unexpected_status": self.unexpected,
+            "statuses": dict(sorted(self.statuses.items())),
+            "latency_ms": self.histogram.to_dict(),
+        }
+
+
+def replayable(test: dict) -> bool:
+    """Only cases expecting a successful response say anything about an endpoint's latency."""
+    statuses = explicit_statuses(test)
+    if statuses is None:
+        statuses = [404] if "404" in " ".join(test.get("steps", [])).lower() else [200]
+    return bool(statuses) and all(200 <= s < 300 for s in statuses)
+
+
+def sla_budgets(operation: dict) -> dict:
+    """{"p95": (95.0, budget_ms), "error_rate": (None, max_fraction)} from the operation's x-sla-* extensions."""
+    budgets = {}
+    for key, value in (operation.get("extensions") or {}).items():
+        try:
+            match = SLA_PERCENTILE.match(key)
+            if match:
+                budgets[f"p{float(match.group(1)):g}"] = (float(match.group(1)), float(value))
+            elif key == SLA_ERROR_RATE:
+                budgets["error_rate"] = (None, float(value))
+        except (TypeError, ValueError):
+            print(f"⚠️ Ignoring non-numeric {key} on {operation['method']} {operation['path']}")
+    return budgets
+
+
+def check_slas(index, endpoints: dict) -> tuple:
+    """
+    Compare per-operation stats with the budgets the spec declares.
+    Returns (breaches, unchecked): `unchecked` lists operations with budgets
+    that received too few requests to judge.
+    """
+    breaches, unchecked = [], []
+    for operation in index.operations():
+        budgets = sla_budgets(operation)
+        if not budgets:
+            continue
+        key = f"{operation['method']} {operation['path']}"
+        stats = endpoints.get(key)
+        if stats is None or stats.requests < MIN_SLA_SAMPLES:
+            unchecked.append({"path": operation["path"], "method": operation["method"],
+                              "requests": stats.requests if stats else 0})
+            continue
+        for metric, (pct, budget) in sorted(budgets.items()):
+            observed = stats.error_rate if pct is None else stats.histogram.percentile(pct)
+            if observed > budget:
+                breaches.append({
+                    "path": operation["path"], "method": operation["method"], "metric": metric,
+                    "budget": budget, "observed": round(observed, 6) if pct is None else observed,
+                    "requests": stats.requests,
+                })
+    return breaches, unchecked
+
+
+class LoadRunner:
+    """
+    Replays test cases against `base_url` for `duration` seconds.
+
+    With `rate`, requests are scheduled at fixed intervals regardless of
+    how fast earlier ones return (open loop, up to `concurrency` in
+    flight), and latency is measured from each request's scheduled time,
+    so a stalled server is not hidden by the load generator backing off.
+    Without it, `concurrency` clients each send their next request as soon
+    as the previous one completes (closed loop).
+    """
+
+    def __init__(self, base_url: str, duration: float, rate: float = None,
+                 concurrency: int = DEFAULT_PER_HOST_LIMIT, spec=None, timeout: float = None):
+        if duration <= 0:
+            raise ValueError("duration must be positive")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        self.base_url = base_url
+        self.duration = duration
+        self.rate = rate
+        self.concurrency = max(1, concurrency or DEFAULT_PER_HOST_LIMIT)
+        self.spec = spec
+        self.timeout = timeout
+        self.endpoints = {}
+        self._lock = threading.Lock()
+        self._keys = {}
+
+    def _key(self, test: dict) -> str:
+        method = test.get("method", "GET").upper()
+        endpoint = test.get("endpoint") or ""
+        cache_key = (method, endpoint)
+        if cache_key not in self._keys:
+            operation = self.spec.match(method, endpoint.split("?", 1)[0]) if self.spec is not None else None
+            self._keys[cache_key] = f"{method} {operation['path'] if operation else endpoint}"
+        return self._keys[cache_key]
+
+    def _record(self, key: str, result: dict, latency_ms: float):
+        with self._lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+            stats.add(result, latency_ms)
+
+    def _open_loop(self, engine, cases, deadline):
+        interval = 1 / self.rate
+
+        def fire(test, key, scheduled):
+            result = engine.run_one(test)
+            self._record(key, result, (time.perf_counter() - scheduled) * 1000)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for n, (test, key) in enumerate(itertools.cycle(cases)):
+                scheduled = started + n * interval
+                if scheduled >= deadline:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(fire, test, key, scheduled)
+
+    def _closed_loop(self, engine, cases, deadline):
+        def client(offset):
+            for n in itertools.count(offset, self.concurrency):
+                if time.perf_counter() >= deadline:
+                    return
+                test, key = cases[n % len(cases)]
+                result = engine.run_one(test)
+                self._record(key, result, result["latency_ms"])
+
+        threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run(self, testcases: list) -> dict:
+        """Replay the cases and return the load report (without writing it)."""
+        cases = [(test, self._key(test)) for test in testcases if replayable(test)]
+        options = {"per_host_limit": self.concurrency}
+        if self.timeout:
+            options["timeout"] = self.timeout
+        engine = ExecutionEngine(self.base_url, **options)
+        started = time.perf_counter()
+        try:
+            if cases:
+                deadline = started + self.duration
+                if self.rate:
+                    self._open_loop(engine, cases, deadline)
+                else:
+                    self._closed_loop(engine, cases, deadline)
+        finally:
+            engine.close()
+        elapsed = time.perf_counter() - started
+
+        breaches, unchecked = check_slas(self.spec, self.endpoints) if self.spec is not None else ([], [])
+        overall = LatencyHistogram()
+        for stats in self.endpoints.values():
+            overall.merge(stats.histogram)
+        requests = sum(stats.requests for stats in self.endpoints.values())
+        errors = sum(stats.errors for stats in self.endpoints.values())
+        tracing.record(load_requests=requests, load_errors=errors, sla_breaches=len(breaches))
+        return {
+            "mode": "rate" if self.rate else "concurrency",
+            "target_rate": self.rate,
+            "concurrency": self.concurrency,
+            "duration_s": round(elapsed, 3),
+            "cases_replayed": len(cases),
+            "requests": requests,
+            "achieved_rate": round(requests / elapsed, 2) if elapsed else 0.0,
+            "errors": errors,
+            "latency_ms": overall.to_dict(),
+            "endpoints": {key: self.endpoints[key].to_dict() for key in sorted(self.endpoints)},
+            "sla_breaches": breaches,
+            "sla_unchecked": unchecked,
+        }
+
+
+def with_sla_cases(testcases, spec, report: dict = None) -> list:
+    """
+    The generated cases plus a success request for every budgeted operation
+    they do not already exercise. Generated cases only cover divergences, so
+    without these an operation that matches its spec would never be measured.
+    """
+    testcases = list(testcases)
+    covered = {(t.get("method", "GET").upper(), t.get("endpoint")) for t in testcases if replayable(t)}
+    return testcases + [case for case in TestcaseGenerator(spec).sla_cases(report)
+                        if (case["method"], case["endpoint"]) not in covered]
+
+
+def run_load_test(testcases, base_url: str = "http://127.0.0.1:8000", duration: float = 10.0,
+                  rate: float = None, concurrency: int = DEFAULT_PER_HOST_LIMIT, spec=None,
+                  report: dict = None) -> dict:
+    """
+    Run a load test and save its report under reports/load/.
+    With a spec, every operation declaring a budget is exercised (see
+    with_sla_cases); the divergence `report`, when given, keeps operations
+    the backend does not implement out of the run.
+    Returns {"path": report path, "sla_breaches": [...]}.
+    """
+    testcases = with_sla_cases(testcases, spec, report) if spec is not None else list(testcases)
+    mode = f"{rate:g} req/s" if rate else f"{concurrency} concurrent clients"
+    print(f"🏋️ Load testing {base_url} for {duration:g}s at {mode}...")
+    load_report = LoadRunner(base_url, duration, rate, concurrency, spec).run(testcases)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+    os.makedirs("reports/load", exist_ok=True)
+    report_path = f"reports/load/load_{timestamp}.json"
+    with open(report_path, "w") as f:
+        json.dump(load_report, f, indent=4)
+
+    print(f"✅ Load test sent {load_report['requests']} requests ({load_report['achieved_rate']} req/s, "
+          f"{load_report['errors']} errors). Report saved at: {report_path}")
+    for breach in load_report["sla_breaches"]:
+        print(f"❌ SLA breach: {breach['method']} {breach['path']} {breach['metric']} "
+              f"{breach['observed']} > {breach['budget']}")
+    return {"path": report_path, "sla_breaches": load_report["sla_breaches"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay generated test cases under load and check SLA budgets.")
+    parser.add_argument("testcases")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spec", help="OpenAPI/Swagger file or URL declaring x-sla-* budgets")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--rate", type=float, help="target requests per second (default: closed loop)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_PER_HOST_LIMIT)
+    args = parser.parse_args(argv)
+
+    with open(args.testcases, "r") as f:
+        testcases = json.load(f)
+    spec = load_spec_index(args.spec) if args.spec else None
+    result = run_load_test(testcases, args.base_url, args.duration, args.rate, args.concurrency, spec)
+    return 1 if result["sla_breaches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import os
+import queue
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.utils import tracing
+
+DEFAULT_STAGE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "8"))
+
+_END = object()
+
+
+class Stream:
+    """
+    Single-consumer hand-off between two stages.
+
+    The producer put()s items and close()s the stream; the consumer
+    iterates it and starts working on the first item right away. Closing
+    with an error makes the consumer's iteration raise it.
+    """
+
+    def __init__(self):
+        self._items = queue.Queue()
+        self._error = None
+        self.closed = False
+
+    def put(self, item):
+        self._items.put(item)
+
+    def extend(self, items):
+        for item in items:
+            self._items.put(item)
+
+    def close(self, error: BaseException = None):
+        if self.closed:
+            return
+        self.closed = True
+        self._error = error
+        self._items.put(_END)
+
+    def __iter__(self):
+        while True:
+            item = self._items.get()
+            if item is _END:
+                if self._error is not None:
+                    raise self._error
+                return
+            yield item
+
+
+class StageError(RuntimeError):
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Pipeline:
+    """
+    Small stage DAG run on a thread pool.
+
+    Each stage is a callable receiving its dependencies' results as
+    keyword arguments; it starts as soon as those dependencies finish, so
+    a run takes as long as its longest chain rather than the sum of its
+    stages. Stages that produce lists can hand them over item by item
+    through a Stream. Every stage runs inside a tracing span.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_STAGE_WORKERS):
+        self.max_workers = max_workers
+        self._stages = {}
+        self._streams = []
+
+    def stage(self, name: str, fn, after=()):
+        """Register a stage; dependencies must be registered first, which rules out cycles."""
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        unknown = [dep for dep in after if dep not in self._stages]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {unknown}")
+        self._stages[name] = (fn, tuple(after))
+        return self
+
+    def stream(self) -> Stream:
+        """A Stream that is closed with the failure if any stage fails, so consumers never hang."""
+        stream = Stream()
+        self._streams.append(stream)
+        return stream
+
+    def _call(self, name, fn, kwargs):
+        with tracing.span(name):
+            return fn(**kwargs)
+
+    def run(self) -> dict:
+        """Run every stage; returns {stage: result} or raises StageError for the first failure."""
+        results = {}
+        pending = dict(self._stages)
+        running = {}
+        failure = None
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as pool:
+            while pending or running:
+                if failure is None:
+                    for name, (fn, after) in list(pending.items()):
+                        if all(dep in results for dep in after):
+                            del pending[name]
+                            kwargs = {dep: results[dep] for dep in after}
+                            call = tracing.propagate(self._call)
+                            running[pool.submit(call, name, fn, kwargs)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        results[name] = future.result()
+                    elif failure is None:
+                        failure = StageError(name, error)
+                        for stream in self._streams:
+                            stream.close(failure)
+        if failure is not None:
+            raise failure from failure.error
+        return results
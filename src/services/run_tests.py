@@ -1,50 +1,73 @@
 import os
 import json
-import requests
 from datetime import datetime
+from src.services.load_test import run_load_test
+from src.services.test_executor import DEFAULT_PER_HOST_LIMIT, ExecutionEngine, latency_summary
+from src.utils.schema_validator import ResponseValidator
+from src.utils import tracing
 
-def execute_generated_tests(testcases_path: str, base_url: str = "http://127.0.0.1:8000") -> str:
+def execute_generated_tests(testcases_path: str, base_url: str = "http://127.0.0.1:8000",
+                            per_host_limit: int = None, http2: bool = False, spec=None,
+                            load_duration: float = None, load_rate: float = None,
+                            load_concurrency: int = None) -> str:
     """
-    Executes generated test cases (from Gemini output JSON).
-    Returns the path to the execution report.
+    Executes generated test cases (from Gemini output JSON) concurrently.
+    When `spec` (a SpecIndex) is given, response bodies are validated
+    against its response schemas.
+    Returns the path to the execution report, which holds the per-test
+    results, schema violations and p50/p95/p99 latency per endpoint.
+
+    With `load_duration` (seconds) the cases are replayed under load
+    instead, at `load_rate` requests per second or with `load_concurrency`
+    clients, and the path of the load report is returned; its
+    `sla_breaches` compare the spec's x-sla-* budgets with what was measured
+    (see src.services.load_test).
     """
     try:
         # Read test cases
         with open(testcases_path, "r") as f:
             testcases = json.load(f)
+    except Exception as e:
+        print(f"❌ Test execution failed: {e}")
+        return None
+    if load_duration:
+        try:
+            return run_load_test(testcases, base_url, load_duration, load_rate,
+                                 load_concurrency or per_host_limit or DEFAULT_PER_HOST_LIMIT, spec)["path"]
+        except Exception as e:
+            print(f"❌ Load test failed: {e}")
+            return None
+    return execute_testcases(testcases, base_url, per_host_limit, http2, spec)
 
-        results = []
-        for test in testcases:
-            endpoint = test.get("endpoint")
-            method = test.get("method", "GET").upper()
-            expected_status = 404 if "404" in " ".join(test.get("steps", [])).lower() else 200
-            url = f"{base_url}{endpoint}"
-            result = {"endpoint": endpoint, "method": method, "status": None, "result": None, "details": ""}
-
-            try:
-                # Perform API request
-                response = requests.request(method, url, timeout=5)
-                result["status"] = response.status_code
-
-                # Check if expected status matches
-                if response.status_code == expected_status:
-                    result["result"] = "PASS"
-                else:
-                    result["result"] = "FAIL"
-                    result["details"] = f"Expected {expected_status}, got {response.status_code}"
-
-            except Exception as e:
-                result["result"] = "ERROR"
-                result["details"] = str(e)
 
-            results.append(result)
+def execute_testcases(testcases, base_url: str = "http://127.0.0.1:8000", per_host_limit: int = None,
+                      http2: bool = False, spec=None) -> str:
+    """
+    Same as execute_generated_tests for test cases already in memory.
+    `testcases` may be any iterable; requests start as items arrive, so a
+    producer can stream cases in while earlier ones are executing.
+    """
+    try:
+        validator = ResponseValidator(spec) if spec is not None else None
+        engine_options = {"http2": http2, "validator": validator}
+        if per_host_limit:
+            engine_options["per_host_limit"] = per_host_limit
+        engine = ExecutionEngine(base_url, **engine_options)
+        try:
+            results = engine.run(testcases)
+        finally:
+            engine.close()
+        tracing.record(tests=len(results), failures=sum(1 for r in results if r["result"] != "PASS"))
 
         # Save report
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
         os.makedirs("reports/executions", exist_ok=True)
         report_path = f"reports/executions/execution_{timestamp}.json"
         with open(report_path, "w") as f:
-            json.dump(results, f, indent=4)
+            report = {"results": results, "latency": latency_summary(results)}
+            if validator is not None:
+                report["schema_validation"] = validator.stats()
+            json.dump(report, f, indent=4)
 
         print(f"✅ Test execution completed. Report saved at: {report_path}")
         return report_path
@@ -0,0 +1,449 @@
+"""
+Watch mode: keep the divergence report of a local checkout live while it is edited.
+
+    python -m src.services.watch backend_code swagger/openapi.json [--serve 8765] [--base-url URL]
+
+The working tree and the spec file are watched with inotify (polling
+where inotify is unavailable). Change events are batched; each batch
+re-parses only the files it touched, re-resolves routes from the
+per-file facts kept in memory, and re-compares only the endpoint
+templates whose routes or spec operations changed
+(src.services.incremental). Every batch prints what appeared and what
+was resolved; with --serve the live report and the recent deltas are
+also available over HTTP (GET /report, GET /deltas?since=<seq>).
+
+Extraction is deterministic only (AST pass and route scanner): files
+neither can read are reported once and not sent to the model, which
+would not answer within the second a save should take to show up.
+"""
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from src.ai.generate_testcases import generate_test_cases_from_divergence
+from src.ai.predict_divergence import compare_api_contract
+from src.loader.python_routes import SKIP_DIRS, analyze_python_file, resolve_routes
+from src.loader.route_scanner import SCAN_EXTENSIONS, list_source_files, scan_file
+from src.loader.spec_index import load_spec_index
+from src.services.divergence_engine import REPORT_KEYS
+from src.services.incremental import merge_reports, operation_fingerprints, touched_templates
+from src.services.test_executor import ExecutionEngine
+from src.utils.path_templates import normalize_path
+
+DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE", "0.1"))
+# A batch is processed after this long even if events keep arriving (e.g. a branch switch)
+MAX_BATCH_SECONDS = 1.0
+POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "0.25"))
+DELTA_HISTORY = 100
+
+
+# -- watchers -----------------------------------------------------------------
+class InotifyWatcher:
+    """
+    Recursive inotify watch on the source tree plus the spec file's
+    directory, through libc via ctypes. New directories are watched as
+    they appear; a queue overflow reports the root so everything is rescanned.
+    """
+
+    IN_MODIFY = 0x2
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, root: str, files: tuple = ()):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = os.path.abspath(root)
+        self.dirs = {}
+        self.files = {os.path.abspath(f) for f in files}
+        try:
+            self._add_tree(self.root)
+            for directory in {os.path.dirname(f) for f in self.files}:
+                self._add(directory)
+        except OSError:
+            self.close()
+            raise
+
+    def _add(self, directory: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            # Typically ENOSPC: fs.inotify.max_user_watches is too low for this tree
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.dirs[wd] = directory
+
+    def _add_tree(self, top: str) -> list:
+        """Watch `top` and its subdirectories; returns the files already inside."""
+        found = []
+        for root, dirs, files in os.walk(top):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            self._add(root)
+            found.extend(os.path.join(root, f) for f in files)
+        return found
+
+    def _in_tree(self, path: str) -> bool:
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def read(self, timeout: float) -> set:
+        """Paths changed within `timeout` seconds (empty when nothing happened)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed, offset = set(), 0
+        while offset < len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            name = data[offset + self._EVENT.size:offset + self._EVENT.size + length].rstrip(b"\0")
+            offset += self._EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                changed.add(self.root)
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            if not self._in_tree(path) and path not in self.files:
+                continue
+            if mask & self.IN_ISDIR:
+                if os.path.basename(path) in SKIP_DIRS:
+                    continue
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and os.path.isdir(path):
+                    # Files can land in a new directory before its watch exists
+                    changed.update(self._add_tree(path))
+                else:
+                    changed.add(path)
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback: compare (mtime, size) of every source file and the spec file each interval."""
+
+    def __init__(self, root: str, files: tuple = (), interval: float = POLL_INTERVAL):
+        self.root = os.path.abspath(root)
+        self.files = [os.path.abspath(f) for f in files]
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self) -> dict:
+        snapshot = {}
+        paths = list(self.files)
+        for root, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            paths.extend(os.path.join(root, f) for f in files if f.endswith(SCAN_EXTENSIONS))
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read(self, timeout: float) -> set:
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._snapshot()
+            changed = {p for p in current.keys() | self.snapshot.keys() if current.get(p) != self.snapshot.get(p)}
+            self.snapshot = current
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+def open_watcher(root: str, files: tuple = (), polling: bool = False):
+    if not polling:
+        try:
+            return InotifyWatcher(root, files)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify unavailable ({e}); polling every {POLL_INTERVAL}s instead")
+    return PollingWatcher(root, files)
+
+
+def batches(watcher, debounce: float = DEBOUNCE_SECONDS):
+    """Yield sets of changed paths, once events have been quiet for `debounce` seconds."""
+    while True:
+        changed = watcher.read(1.0)
+        if not changed:
+            continue
+        started = time.monotonic()
+        while time.monotonic() - started < MAX_BATCH_SECONDS:
+            more = watcher.read(debounce)
+            if not more:
+                break
+            changed |= more
+        yield changed
+
+
+# -- live analysis ------------------------------------------------------------
+def _describe(entry) -> str:
+    if not isinstance(entry, dict):
+        return str(entry)
+    return f"{entry.get('method') or ''} {entry.get('path', '')}".strip()
+
+
+def report_delta(old: dict, new: dict) -> dict:
+    """{category: {"added": [...], "resolved": [...]}} for the categories that changed."""
+    delta = {}
+    for key in sorted(set(old) | set(new)):
+        before = {json.dumps(e, sort_keys=True, default=str): e for e in old.get(key, [])}
+        after = {json.dumps(e, sort_keys=True, default=str): e for e in new.get(key, [])}
+        added = [after[k] for k in after.keys() - before.keys()]
+        resolved = [before[k] for k in before.keys() - after.keys()]
+        if added or resolved:
+            delta[key] = {"added": sorted(added, key=_describe), "resolved": sorted(resolved, key=_describe)}
+    return delta
+
+
+class WatchSession:
+    """
+    In-memory state of one watched checkout: per-file Python facts,
+    per-file scanner routes, the spec index and the current report.
+    apply() folds a batch of changed paths into that state.
+    """
+
+    def __init__(self, folder_path: str, swagger_source: str, base_url: str = None):
+        self.folder_path = os.path.abspath(folder_path)
+        self.swagger_source = swagger_source
+        self.spec_path = os.path.abspath(swagger_source) if os.path.isfile(swagger_source) else None
+        self.base_url = base_url
+        self.facts = {}
+        self.scanned = {}
+        self.sources = set()
+        self.index = None
+        self.operations = {}
+        self.routes = []
+        self.report = {}
+        self.deltas = deque(maxlen=DELTA_HISTORY)
+        self.seq = 0
+        self.lock = threading.Lock()
+        self._engine = ExecutionEngine(base_url) if base_url else None
+
+    def _scan_wanted(self, rel: str) -> bool:
+        if not rel.endswith(".py"):
+            return True
+        facts = self.facts.get(rel)
+        return os.path.basename(rel) == "urls.py" or (facts is not None and not facts["classified"])
+
+    def _refresh(self, rel: str):
+        """Re-read one source file (or forget it if it was deleted or is now ignored)."""
+        full_path = os.path.join(self.folder_path, rel)
+        present = rel in self.sources and os.path.isfile(full_path)
+        if rel.endswith(".py"):
+            self.facts.pop(rel, None)
+            if present:
+                self.facts[rel] = analyze_python_file(full_path, self.folder_path)
+        self.scanned.pop(rel, None)
+        if present and self._scan_wanted(rel):
+            self.scanned[rel] = scan_file(full_path, self.folder_path)
+
+    def _resolve(self) -> list:
+        routes = resolve_routes([self.facts[rel] for rel in sorted(self.facts)])
+        for rel in sorted(self.scanned):
+            routes.extend(self.scanned[rel])
+        return routes
+
+    def start(self) -> dict:
+        started = time.perf_counter()
+        self.index = load_spec_index(self.swagger_source)
+        self.operations = operation_fingerprints(self.index)
+        self.sources = set(list_source_files(self.folder_path))
+        for rel in sorted(self.sources):
+            self._refresh(rel)
+        self.routes = self._resolve()
+        self.report = compare_api_contract(self.index, self.routes)
+        unreadable = sorted(rel for rel, facts in self.facts.items() if not facts["classified"]
+                            and not self.scanned.get(rel))
+        if unreadable:
+            print(f"⚠️ {len(unreadable)} files could not be read statically and are not watched for routes")
+        print(f"👀 Watching {self.folder_path}: {len(self.routes)} routes, "
+              f"{sum(len(self.report.get(k, [])) for k in REPORT_KEYS)} divergences "
+              f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return self.report
+
+    def apply(self, changed_paths: set):
+        """Fold one batch of changed absolute paths into the report; returns the delta record or None."""
+        started = time.perf_counter()
+        spec_changed = self.spec_path is not None and self.spec_path in changed_paths
+        rels = {os.path.relpath(p, self.folder_path) for p in changed_paths
+                if p.startswith(self.folder_path + os.sep)}
+        # Listed again so .gitignore edits and new or deleted files take effect
+        self.sources = set(list_source_files(self.folder_path))
+        known = self.sources | set(self.facts) | set(self.scanned)
+        if self.folder_path in changed_paths:
+            # Event queue overflowed: anything may have changed
+            rels = known
+        else:
+            # A directory moved or deleted as a whole takes its files with it
+            for rel in [r for r in rels if not r.endswith(SCAN_EXTENSIONS)]:
+                rels |= {k for k in known if k.startswith(rel + os.sep)}
+        rels = {rel for rel in rels if rel.endswith(SCAN_EXTENSIONS)
+                and (rel in self.sources or rel in self.facts or rel in self.scanned)}
+        if not rels and not spec_changed:
+            return None
+
+        baseline = {"routes": self.routes, "spec_hash": self.index.content_hash, "operations": self.operations}
+        if spec_changed:
+            try:
+                self.index = load_spec_index(self.swagger_source)
+            except Exception as e:
+                # Usually a half-written file; the next save triggers another batch
+                print(f"⚠️ Spec not reloaded: {e}")
+                spec_changed = False
+            self.operations = operation_fingerprints(self.index)
+        for rel in sorted(rels):
+            self._refresh(rel)
+        routes = self._resolve()
+        templates = touched_templates(baseline, routes, self.index, sorted(rels), self.operations)
+        subset = [r for r in routes if _template_of(r) in templates]
+        fresh = compare_api_contract(self.index, subset) if templates else {}
+        report = merge_reports(self.report, fresh, templates)
+        delta = report_delta(self.report, report)
+        record = {"files": sorted(rels), "spec_changed": spec_changed, "endpoints_rechecked": sorted(templates),
+                  "changes": delta, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+        # Test traffic can take a while; readers keep getting the previous report meanwhile
+        if self._engine is not None and templates:
+            record["tests"] = self._run_tests(fresh, templates)
+        with self.lock:
+            self.routes, self.report = routes, report
+            self.seq += 1
+            record = dict(seq=self.seq, **record)
+            self.deltas.append(record)
+        return record
+
+    def _run_tests(self, fresh: dict, templates: set) -> dict:
+        """Execute the template cases for the re-checked endpoints against base_url."""
+        delta_report = {key: [e for e in fresh.get(key, []) if _template_of(e) in templates] for key in fresh}
+        results = self._engine.run(generate_test_cases_from_divergence(delta_report, spec=self.index, enrich=False))
+        return {status: sum(1 for r in results if r["result"] == status) for status in ("PASS", "FAIL", "ERROR")}
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"seq": self.seq, "report": self.report}
+
+    def deltas_since(self, seq: int) -> list:
+        with self.lock:
+            return [d for d in self.deltas if d["seq"] > seq]
+
+    def close(self):
+        if self._engine is not None:
+            self._engine.close()
+
+
+def _template_of(entry) -> str:
+    path = entry.get("path") if isinstance(entry, dict) else entry
+    return normalize_path(path or "")[0]
+
+
+def print_delta(record: dict):
+    what = " and ".join(([f"{len(record['files'])} files"] if record["files"] else [])
+                        + (["the spec"] if record["spec_changed"] else []))
+    what = what[:1].upper() + what[1:]
+    print(f"🔄 {what} changed, {len(record['endpoints_rechecked'])} endpoints re-checked "
+          f"in {record['elapsed_ms']:.0f} ms")
+    for category, change in record["changes"].items():
+        for entry in change["added"]:
+            print(f"   ➕ {category}: {_describe(entry)}")
+        for entry in change["resolved"]:
+            print(f"   ✅ resolved {category}: {_describe(entry)}")
+    if not record["changes"]:
+        print("   = no divergence changes")
+    if "tests" in record:
+        tests = record["tests"]
+        print(f"   🧪 {tests['PASS']} passed, {tests['FAIL']} failed, {tests['ERROR']} errors")
+
+
+def serve(session: WatchSession, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve GET /report and GET /deltas?since=<seq> from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/report":
+                body = session.snapshot()
+            elif url.path == "/deltas":
+                since = parse_qs(url.query).get("since", ["0"])[0]
+                body = session.deltas_since(int(since) if since.isdigit() else 0)
+            else:
+                self.send_error(404)
+                return
+            payload = json.dumps(body, default=str).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🌐 Live report at http://{host}:{server.server_address[1]}/report")
+    return server
+
+
+def watch(folder_path: str, swagger_source: str, base_url: str = None, serve_port: int = None,
+          polling: bool = False, debounce: float = DEBOUNCE_SECONDS):
+    session = WatchSession(folder_path, swagger_source, base_url)
+    session.start()
+    server = serve(session, serve_port) if serve_port is not None else None
+    if session.spec_path is None:
+        print("ℹ️ The spec is not a local file; only the source tree is watched")
+    watcher = open_watcher(folder_path, (session.spec_path,) if session.spec_path else (), polling)
+    try:
+        for changed in batches(watcher, debounce):
+            record = session.apply(changed)
+            if record is not None:
+                print_delta(record)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        session.close()
+        if server is not None:
+            server.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the divergence report of a local checkout live.")
+    parser.add_argument("folder", help="backend checkout, e.g. backend_code")
+    parser.add_argument("swagger", help="OpenAPI/Swagger file (watched) or URL")
+    parser.add_argument("--base-url", help="also run the re-checked endpoints' test cases against this service")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="serve /report and /deltas over HTTP")
+    parser.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS, help="seconds of quiet before a batch")
+    args = parser.parse_args(argv)
+    watch(args.folder, args.swagger, args.base_url, args.serve, args.poll, args.debounce)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,131 @@
-from src.services.compare_service import run_comparison
+import json
+import os
+import threading
+from src.loader.spec_index import load_spec_index
+from src.services.job_queue import get_job_queue
+
+# Pushes to one repo arriving within this window collapse into a single run
+DEBOUNCE_SECONDS = float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "10"))
+STATE_PATH = os.path.join(".cache", "webhook_state.json")
+# Pushes only re-check the endpoints they touch, diffed against the last analyzed commit
+INCREMENTAL = os.getenv("WEBHOOK_INCREMENTAL", "1") == "1"
+
+# Swagger should be stored in repo OR a fixed URL
+DEFAULT_SWAGGER_SOURCE = "swagger/swagger.yaml"
+
+
+def spec_fingerprint(swagger_source: str):
+    """Content hash of the loaded spec, or None when it cannot be loaded."""
+    try:
+        return load_spec_index(swagger_source).content_hash
+    except Exception as e:
+        print(f"⚠️ Could not fingerprint spec {swagger_source}: {e}")
+        return None
+
+
+class WebhookCoalescer:
+    """
+    Debounces push events per repository.
+
+    Every push restarts the repo's timer and moves the pending run to the
+    newest `after` SHA. When the timer fires, any still-queued run for the
+    repo is superseded, and the run is skipped altogether if the same
+    commit and spec were already analyzed successfully.
+    """
+
+    def __init__(self, window: float = DEBOUNCE_SECONDS, queue=None, state_path: str = STATE_PATH):
+        self.window = window
+        self.queue = queue
+        self.state_path = state_path
+        self._pending = {}
+        self._queued_jobs = {}
+        self._last_completed = self._load_state()
+        self._lock = threading.Lock()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._last_completed, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def push(self, repo_url: str, commit: str, swagger_source: str) -> dict:
+        with self._lock:
+            pending = self._pending.get(repo_url)
+            if pending:
+                pending["timer"].cancel()
+                pending["events"] += 1
+            else:
+                pending = self._pending[repo_url] = {"events": 1}
+            pending["commit"] = commit
+            pending["swagger_source"] = swagger_source
+            pending["timer"] = threading.Timer(self.window, self._fire, args=(repo_url,))
+            pending["timer"].daemon = True
+            pending["timer"].start()
+            status = "coalesced" if pending["events"] > 1 else "scheduled"
+        return {"status": status, "repo_url": repo_url, "commit": commit, "events": pending["events"]}
+
+    def _fire(self, repo_url: str):
+        with self._lock:
+            pending = self._pending.pop(repo_url, None)
+        if pending is None:
+            return
+        commit, swagger_source = pending["commit"], pending["swagger_source"]
+        fingerprint = spec_fingerprint(swagger_source)
+
+        def record(job):
+            if job["status"] == "completed" and fingerprint:
+                with self._lock:
+                    self._last_completed[repo_url] = {"commit": commit, "spec_hash": fingerprint}
+                    self._save_state()
+
+        queue = self.queue or get_job_queue()
+        # record() runs on JobQueue workers; the skip check, the cancel and the
+        # bookkeeping must see its updates whole
+        with self._lock:
+            last = self._last_completed.get(repo_url)
+            if fingerprint and last == {"commit": commit, "spec_hash": fingerprint}:
+                print(f"⏭️ Skipping {repo_url}@{commit}: already analyzed with the same spec")
+                return
+            stale = self._queued_jobs.get(repo_url)
+            if stale and queue.cancel(stale):
+                print(f"⏭️ Superseded queued run {stale} for {repo_url}")
+            job = queue.submit(repo_url, swagger_source, commit=commit, on_complete=record,
+                               incremental=INCREMENTAL)
+            self._queued_jobs[repo_url] = job["id"]
+        print(f"📦 Queued {repo_url}@{commit} as job {job['id']} ({pending['events']} push events)")
+
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+def get_coalescer() -> WebhookCoalescer:
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = WebhookCoalescer()
+        return _coalescer
+
 
 def handle_github_webhook(payload: dict):
     """
     Triggered automatically on each GitHub push event.
+    Bursts of pushes to the same repo are coalesced into one run at the
+    newest commit; returns the scheduling decision rather than the report.
     """
 
     repo_url = payload["repository"]["clone_url"]
+    commit = payload.get("after")
+    if commit and set(commit) == {"0"}:
+        # Branch deletion: nothing to analyze
+        return {"status": "ignored", "repo_url": repo_url, "commit": commit}
 
-    # Swagger should be stored in repo OR a fixed URL
-    swagger_source = "swagger/swagger.yaml"
-
-    result = run_comparison(repo_url, swagger_source)
-
-    return result
+    return get_coalescer().push(repo_url, commit, DEFAULT_SWAGGER_SOURCE)
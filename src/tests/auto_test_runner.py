@@ -1,62 +1,60 @@
 import json
-import requests
 from datetime import datetime
 import os
+from src.services.test_executor import ExecutionEngine, expect_404_or_reachable, latency_summary
+from src.utils.schema_validator import ResponseValidator
 
-def run_generated_tests(testcase_path: str, base_url: str = "http://127.0.0.1:8000") -> dict:
+def run_generated_tests(testcase_path: str, base_url: str = "http://127.0.0.1:8000", spec=None) -> dict:
     """
     Executes AI-generated test cases and returns a structured report.
+    Pass a SpecIndex as `spec` to also validate response bodies.
     """
     with open(testcase_path, "r") as f:
         testcases = json.load(f)
 
-    results = []
+    # Writes always carry a JSON body, matching what the API expects from clients;
+    # cases with an explicit expected_status already say whether they want one
+    cases = []
     for case in testcases:
-        endpoint = case.get("endpoint")
-        method = case.get("method", "GET").upper()
-        steps = case.get("steps", [])
-        url = f"{base_url}{endpoint}"
-        status = "PENDING"
-        details = ""
-
-        try:
-            if method == "GET":
-                response = requests.get(url)
-            elif method == "POST":
-                response = requests.post(url, json={})
-            elif method == "PUT":
-                response = requests.put(url, json={})
-            elif method == "DELETE":
-                response = requests.delete(url)
-            else:
-                response = requests.request(method, url)
-
-            # Evaluate based on expectation heuristics
-            if "404" in steps[-1]:
-                passed = response.status_code == 404
-            else:
-                passed = response.status_code != 404
+        if (case.get("method", "GET").upper() in ("POST", "PUT") and case.get("body") is None
+                and "expected_status" not in case):
+            case = dict(case, body={})
+        cases.append(case)
 
-            status = "PASS" if passed else "FAIL"
-            details = f"Expected: {'404' if '404' in steps[-1] else '!=404'}, Got: {response.status_code}"
+    validator = ResponseValidator(spec) if spec is not None else None
+    engine = ExecutionEngine(base_url, expectation=expect_404_or_reachable, validator=validator)
+    try:
+        executed = engine.run(cases)
+    finally:
+        engine.close()
 
-        except Exception as e:
-            status = "ERROR"
-            details = str(e)
-
-        results.append({
-            "endpoint": endpoint,
-            "method": method,
-            "status": status,
-            "details": details
-        })
+    results = []
+    for case, result in zip(cases, executed):
+        details = result["details"]
+        passed, expectation = expect_404_or_reachable(case)
+        # A FAIL with the expected status is a schema violation; keep the executor's message for it
+        if result["result"] != "ERROR" and not (result["result"] == "FAIL" and passed(result["status"])):
+            details = f"{expectation}, Got: {result['status']}"
+        entry = {
+            "endpoint": result["endpoint"],
+            "method": result["method"],
+            "status": result["result"],
+            "details": details,
+            "latency_ms": result["latency_ms"],
+        }
+        if "schema_diffs" in result:
+            entry["schema_diffs"] = result["schema_diffs"]
+        results.append(entry)
 
     # Save report
     os.makedirs("reports/executions", exist_ok=True)
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     out_path = f"reports/executions/execution_report_{timestamp}.json"
     with open(out_path, "w") as f:
-        json.dump(results, f, indent=4)
+        report = {"results": results, "latency": latency_summary(executed)}
+        if validator is not None:
+            report["schema_validation"] = validator.stats()
+        json.dump(report, f, indent=4)
 
     print(f"✅ Execution completed. Report saved at: {out_path}")
     return results
@@ -1,10 +1,19 @@
+import fcntl
+import hashlib
 import os
+import shutil
+from contextlib import contextmanager
+from uuid import uuid4
 import git
 
-def clone_or_pull_repo(repo_url: str, dest: str = "repos") -> str:
+MIRROR_DIR = os.getenv("REPO_MIRROR_DIR", os.path.join(".cache", "mirrors"))
+WORKTREE_DIR = os.getenv("REPO_WORKTREE_DIR", os.path.join(".cache", "worktrees"))
+
+def clone_or_pull_repo(repo_url: str, dest: str = "repos", commit: str = None) -> str:
     """
     Clone the repository if not already present,
     or pull the latest changes if it exists.
+    When commit is given, that commit is checked out instead of the branch head.
     Returns the local path to the repo folder.
     """
 
@@ -15,13 +24,198 @@ def clone_or_pull_repo(repo_url: str, dest: str = "repos") -> str:
     repo_path = os.path.join(dest, repo_name)
 
     if os.path.exists(repo_path):
-        print("Repo exists. Pulling latest changes...")
         repo = git.Repo(repo_path)
         origin = repo.remotes.origin
-        origin.pull()
+        if commit:
+            print(f"Repo exists. Fetching and checking out {commit} ...")
+            origin.fetch()
+        else:
+            print("Repo exists. Pulling latest changes...")
+            if repo.head.is_detached:
+                # A previous run pinned a commit; go back to the default branch
+                default_branch = repo.git.symbolic_ref("refs/remotes/origin/HEAD").split("/")[-1]
+                repo.git.checkout(default_branch)
+            origin.pull()
     else:
         print(f"Cloning repo from {repo_url} ...")
-        git.Repo.clone_from(repo_url, repo_path)
+        repo = git.Repo.clone_from(repo_url, repo_path)
+
+    if commit:
+        repo.git.checkout(commit)
 
     print(f"Repo ready at: {repo_path}")
     return repo_path
+
+
+def _repo_name(repo_url: str) -> str:
+    return repo_url.rstrip("/").split("/")[-1].replace(".git", "")
+
+
+@contextmanager
+def _mirror_lock(mirror_path: str):
+    """Serialize fetches and worktree bookkeeping on one mirror across threads and processes."""
+    os.makedirs(os.path.dirname(mirror_path) or ".", exist_ok=True)
+    with open(f"{mirror_path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def ensure_mirror(repo_url: str, mirror_dir: str = MIRROR_DIR) -> str:
+    """
+    Return the path of a bare, blobless mirror of repo_url, creating it on first use.
+    Blobs are fetched lazily when a worktree actually checks files out.
+    """
+    url_hash = hashlib.sha1(repo_url.encode("utf-8")).hexdigest()[:8]
+    mirror_path = os.path.abspath(os.path.join(mirror_dir, f"{_repo_name(repo_url)}-{url_hash}.git"))
+    with _mirror_lock(mirror_path):
+        if not os.path.exists(mirror_path):
+            print(f"Creating blobless mirror of {repo_url} ...")
+            git.Repo.clone_from(repo_url, mirror_path, bare=True, filter="blob:none")
+    return mirror_path
+
+
+def fetch_commit(mirror_path: str, commit: str = None, shallow: bool = False) -> str:
+    """
+    Make `commit` (default: the remote HEAD) available in the mirror and
+    return its full SHA. Commits already present are not fetched again.
+    """
+    # Plain command runner: sparse worktrees move core.bare into config.worktree,
+    # which git.Repo does not read, so it would mistake the mirror for a checkout
+    mirror = git.Git(mirror_path)
+    depth = {"depth": 1} if shallow else {}
+    with _mirror_lock(mirror_path):
+        if commit:
+            try:
+                return mirror.rev_parse("--verify", f"{commit}^{{commit}}")
+            except git.GitCommandError:
+                mirror.fetch("origin", commit, **depth)
+                return mirror.rev_parse("--verify", "FETCH_HEAD^{commit}")
+        mirror.fetch("origin", "HEAD", **depth)
+        return mirror.rev_parse("--verify", "FETCH_HEAD^{commit}")
+
+
+@contextmanager
+def checkout_worktree(repo_url: str, commit: str = None, sparse_extensions: tuple = None,
+                      shallow: bool = False):
+    """
+    Check out `commit` of repo_url into a private worktree of the shared mirror.
+
+    Parallel runs get separate directories, so different commits never
+    collide and history is downloaded once per repo. With sparse_extensions,
+    only files with those extensions are materialized. The worktree is
+    removed on exit; yields its path, whose basename is the repo name.
+    """
+    mirror_path = ensure_mirror(repo_url)
+    sha = fetch_commit(mirror_path, commit, shallow=shallow)
+    run_dir = os.path.join(WORKTREE_DIR, f"{sha[:12]}-{uuid4().hex[:8]}")
+    worktree_path = os.path.abspath(os.path.join(run_dir, _repo_name(repo_url)))
+    mirror = git.Git(mirror_path)
+
+    with _mirror_lock(mirror_path):
+        mirror.worktree("add", "--detach", "--no-checkout", worktree_path, sha)
+    try:
+        worktree = git.Repo(worktree_path)
+        if sparse_extensions:
+            worktree.git.sparse_checkout("set", "--no-cone", *[f"*{ext}" for ext in sparse_extensions])
+        worktree.git.read_tree("-mu", "HEAD")
+        print(f"Worktree for {repo_url}@{sha[:12]} ready at: {worktree_path}")
+        yield worktree_path
+    finally:
+        with _mirror_lock(mirror_path):
+            try:
+                mirror.worktree("remove", "--force", worktree_path)
+            except git.GitCommandError:
+                mirror.worktree("prune")
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def git_blob_sha(path: str) -> str:
+    """Compute the git blob SHA-1 of a file without needing a repository."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def repo_cache_key(repo_path: str) -> str:
+    """
+    Cache namespace for a checkout: its name plus a hash of its origin URL,
+    so every worktree of one remote shares a key and same-named repos from
+    different remotes do not. Folders that are not the top of a checkout
+    with an origin are keyed by their absolute path instead.
+    """
+    path = os.path.abspath(repo_path).rstrip(os.sep)
+    identity = path
+    try:
+        runner = git.Git(path)
+        if os.path.realpath(runner.rev_parse("--show-toplevel")) == os.path.realpath(path):
+            identity = runner.config("--get", "remote.origin.url")
+    except (git.GitCommandError, OSError):
+        pass
+    digest = hashlib.sha1(identity.encode("utf-8")).hexdigest()[:8]
+    return f"{os.path.basename(path)}-{digest}"
+
+
+def list_blob_shas(repo_path: str, extensions: tuple = None) -> dict:
+    """
+    Map every tracked (and untracked, non-ignored) file in the working tree
+    to its git blob SHA, keyed by path relative to repo_path.
+    Index SHAs are reused as-is; only locally modified or untracked files are hashed.
+    Falls back to hashing every file when repo_path is not a git checkout.
+    """
+    def wanted(rel):
+        return extensions is None or rel.endswith(extensions)
+
+    shas = {}
+    try:
+        repo = git.Repo(repo_path)
+    except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+        for root, _, files in os.walk(repo_path):
+            for file in files:
+                full_path = os.path.join(root, file)
+                rel = os.path.relpath(full_path, repo_path)
+                if wanted(rel):
+                    shas[rel] = git_blob_sha(full_path)
+        return shas
+
+    # "<mode> <sha> <stage>\t<path>"
+    for line in repo.git.ls_files("-s").splitlines():
+        meta, _, rel = line.partition("\t")
+        if wanted(rel):
+            shas[rel] = meta.split()[1]
+
+    dirty = repo.git.ls_files("-m", "-o", "-d", "--exclude-standard", "-t").splitlines()
+    for line in dirty:
+        tag, _, rel = line.partition(" ")
+        if not wanted(rel):
+            continue
+        full_path = os.path.join(repo_path, rel)
+        if tag == "R" or not os.path.exists(full_path):
+            shas.pop(rel, None)
+        else:
+            shas[rel] = git_blob_sha(full_path)
+    return shas
+
+
+def head_commit(repo_path: str) -> str:
+    """Full SHA of the commit checked out at repo_path."""
+    return git.Git(repo_path).rev_parse("HEAD")
+
+
+def changed_files(repo_url: str, old_commit: str, new_commit: str) -> list:
+    """
+    Paths added, modified or deleted between two commits of repo_url, diffed
+    in the shared mirror. Only trees are compared, so no blobs are fetched.
+    Raises git.GitCommandError when old_commit is no longer reachable.
+    """
+    mirror_path = ensure_mirror(repo_url)
+    mirror = git.Git(mirror_path)
+    old_sha = mirror.rev_parse("--verify", f"{old_commit}^{{commit}}")
+    new_sha = fetch_commit(mirror_path, new_commit)
+    if old_sha == new_sha:
+        return []
+    # Renames are reported as a delete plus an add, so both paths show up
+    output = mirror.diff("--name-only", "--no-renames", old_sha, new_sha)
+    return [line for line in output.splitlines() if line]
@@ -0,0 +1,100 @@
+import re
+
+# {id} / {id:int} (OpenAPI, FastAPI, Starlette), :id / :id? (Express, Gin), <int:id> / <id> (Flask)
+_PARAM_SEGMENT = re.compile(r"^(?:\{(?P<brace>[^}:]+)(?::[^}]*)?\}|:(?P<colon>[A-Za-z_]\w*)\??|<(?:[^:>]+:)?(?P<angle>[^>]+)>|\*(?P<star>\w*))$")
+PARAM = "{}"
+
+
+def normalize_path(path: str) -> tuple:
+    """
+    Normalize a route or OpenAPI path template into a canonical template
+    where every parameter segment is '{}'.
+
+    Returns:
+        tuple: (template, param_names) e.g. ('/users/{}', ['user_id'])
+    """
+    path = (path or "").split("?")[0].strip()
+    segments = []
+    names = []
+    for segment in path.strip("/").split("/"):
+        if not segment:
+            continue
+        m = _PARAM_SEGMENT.match(segment)
+        if m:
+            segments.append(PARAM)
+            names.append(m.group("brace") or m.group("colon") or m.group("angle") or m.group("star") or "")
+        else:
+            segments.append(segment)
+    return "/" + "/".join(segments), names
+
+
+def split_template(template: str) -> list:
+    return [s for s in template.strip("/").split("/") if s]
+
+
+class _Node:
+    __slots__ = ("literals", "param", "value")
+
+    def __init__(self):
+        self.literals = {}
+        self.param = None
+        self.value = None
+
+
+class PathTemplateTrie:
+    """
+    Segment trie over normalized path templates.
+    Lookups cost O(segments) and prefer literal segments over parameters.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, template: str, value):
+        node = self._root
+        for segment in split_template(template):
+            if segment == PARAM:
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.literals.setdefault(segment, _Node())
+        if node.value is None:
+            self._size += 1
+        node.value = value
+
+    def get(self, template: str):
+        """Exact lookup of a normalized template ('{}' only matches a parameter)."""
+        node = self._root
+        for segment in split_template(template):
+            node = node.param if segment == PARAM else node.literals.get(segment)
+            if node is None:
+                return None
+        return node.value
+
+    def match(self, path: str):
+        """
+        Match a concrete request path (e.g. '/users/42') against stored
+        templates, backtracking from literal to parameter edges.
+        Returns (value, [param values]) or (None, []).
+        """
+        segments = split_template(path.split("?")[0])
+
+        def walk(node, i, captured):
+            if i == len(segments):
+                return (node.value, captured) if node.value is not None else None
+            segment = segments[i]
+            child = node.literals.get(segment)
+            if child is not None:
+                found = walk(child, i + 1, captured)
+                if found:
+                    return found
+            if node.param is not None:
+                return walk(node.param, i + 1, captured + [segment])
+            return None
+
+        return walk(self._root, 0, []) or (None, [])
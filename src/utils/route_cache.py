@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+
+CACHE_DIR = os.path.join(".cache", "routes")
+
+
+class RouteCache:
+    """
+    Persistent per-file extraction cache for one repository.
+
+    Entries are keyed by relative path and are only valid while both the
+    file's git blob SHA and the extractor version match, so a pull that
+    touches a handful of files only re-extracts those files.
+    """
+
+    def __init__(self, repo_key: str, extractor: str, version: str, cache_dir: str = CACHE_DIR):
+        self.extractor = extractor
+        self.version = version
+        self.path = os.path.join(cache_dir, f"{repo_key}.{extractor}.json")
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        if stored.get("version") == self.version:
+            self.entries = stored.get("entries", {})
+
+    def get(self, rel_path: str, sha: str):
+        entry = self.entries.get(rel_path)
+        if sha is not None and entry is not None and entry["sha"] == sha:
+            self.hits += 1
+            return entry["data"]
+        self.misses += 1
+        return None
+
+    def put(self, rel_path: str, sha: str, data):
+        if sha is None:
+            return
+        self.entries[rel_path] = {"sha": sha, "data": data}
+        self._dirty = True
+
+    def evict_missing(self, present: set) -> int:
+        """Drop entries for files that no longer exist in the tree."""
+        stale = [p for p in self.entries if p not in present]
+        for rel_path in stale:
+            del self.entries[rel_path]
+        if stale:
+            self._dirty = True
+        return len(stale)
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # A private temp file per writer: parallel jobs on one repo save the same cache
+        with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(self.path), suffix=".tmp", delete=False) as f:
+            json.dump({"version": self.version, "entries": self.entries}, f)
+        os.replace(f.name, self.path)
+        self._dirty = False
@@ -0,0 +1,332 @@
+import json
+import re
+import threading
+from decimal import Decimal, InvalidOperation
+
+# Keywords the compiled validators understand; anything else (format,
+# readOnly, discriminator...) is treated as documentation and ignored
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "integer": lambda v: (isinstance(v, int) and not isinstance(v, bool))
+    or (isinstance(v, float) and v.is_integer()),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def _type_name(value) -> str:
+    for name in ("null", "boolean", "integer", "number", "string", "array", "object"):
+        if _TYPE_CHECKS[name](value):
+            return name
+    return type(value).__name__
+
+
+def _diff(path, rule, expected, actual) -> dict:
+    return {"path": path, "rule": rule, "expected": expected, "actual": actual}
+
+
+def _is_multiple(value, multiple_of) -> bool:
+    # Decimal of the repr, so 0.3 is a multiple of 0.1 despite binary floats
+    try:
+        return Decimal(str(value)) % Decimal(str(multiple_of)) == 0
+    except (InvalidOperation, ArithmeticError):
+        return True
+
+
+class SchemaCompiler:
+    """
+    Turns resolved JSON Schemas into nested validator closures.
+
+    Each schema is interpreted once; the resulting function only runs the
+    checks that schema declares. Compiled sub-schemas are memoized by
+    identity, so components shared through SpecIndex.resolve_schema are
+    compiled a single time. `ref_resolver` handles the $refs that
+    resolve_schema leaves in place for recursive schemas.
+    """
+
+    def __init__(self, ref_resolver=None):
+        self.ref_resolver = ref_resolver
+        self._compiled = {}
+        self._refs = {}
+
+    def compile(self, schema):
+        """Return validate(instance) -> list of structured diffs (empty when valid)."""
+        check = self._compile(schema)
+
+        def validate(instance):
+            errors = []
+            check(instance, "$", errors)
+            return errors
+
+        return validate
+
+    def _compile(self, schema):
+        if not isinstance(schema, dict) or not schema:
+            return lambda value, path, errors: None
+        key = id(schema)
+        if key in self._compiled:
+            return self._compiled[key][1]
+        if "$ref" in schema:
+            check = self._compile_ref(schema["$ref"])
+        else:
+            check = self._compile_keywords(schema)
+        # Keep the schema alive so its id cannot be reused by another object
+        self._compiled[key] = (schema, check)
+        return check
+
+    def _compile_ref(self, pointer):
+        if pointer in self._refs:
+            return self._refs[pointer]
+        target = {}
+        # Late binding: recursive schemas refer back to themselves
+        self._refs[pointer] = lambda value, path, errors: target["check"](value, path, errors)
+        resolved = self.ref_resolver(pointer) if self.ref_resolver else None
+        target["check"] = self._compile(resolved) if isinstance(resolved, dict) else (lambda value, path, errors: None)
+        return self._refs[pointer]
+
+    def _compile_keywords(self, schema):
+        checks = []
+
+        types = schema.get("type")
+        if types is not None:
+            types = [types] if isinstance(types, str) else list(types)
+            if schema.get("nullable"):
+                types.append("null")
+            type_checks = [_TYPE_CHECKS[t] for t in types if t in _TYPE_CHECKS]
+            expected = "|".join(types)
+
+            def check_type(value, path, errors):
+                if not any(fn(value) for fn in type_checks):
+                    errors.append(_diff(path, "type", expected, _type_name(value)))
+                    return False
+            checks.append(check_type)
+
+        if "enum" in schema:
+            allowed = schema["enum"]
+
+            def check_enum(value, path, errors):
+                if value not in allowed:
+                    errors.append(_diff(path, "enum", allowed, value))
+            checks.append(check_enum)
+
+        if "const" in schema:
+            const = schema["const"]
+
+            def check_const(value, path, errors):
+                if value != const:
+                    errors.append(_diff(path, "const", const, value))
+            checks.append(check_const)
+
+        checks.extend(self._compile_string(schema))
+        checks.extend(self._compile_number(schema))
+        checks.extend(self._compile_object(schema))
+        checks.extend(self._compile_array(schema))
+        checks.extend(self._compile_combinators(schema))
+
+        nullable = bool(schema.get("nullable"))
+
+        def check(value, path, errors):
+            if value is None and nullable:
+                return
+            for fn in checks:
+                # A type failure makes the remaining keywords meaningless
+                if fn(value, path, errors) is False:
+                    return
+        return check
+
+    def _compile_string(self, schema):
+        checks = []
+        min_len, max_len = schema.get("minLength"), schema.get("maxLength")
+        if min_len is not None or max_len is not None:
+            def check_length(value, path, errors):
+                if isinstance(value, str):
+                    if min_len is not None and len(value) < min_len:
+                        errors.append(_diff(path, "minLength", min_len, len(value)))
+                    if max_len is not None and len(value) > max_len:
+                        errors.append(_diff(path, "maxLength", max_len, len(value)))
+            checks.append(check_length)
+        if "pattern" in schema:
+            pattern = re.compile(schema["pattern"])
+
+            def check_pattern(value, path, errors):
+                if isinstance(value, str) and not pattern.search(value):
+                    errors.append(_diff(path, "pattern", pattern.pattern, value))
+            checks.append(check_pattern)
+        return checks
+
+    def _compile_number(self, schema):
+        bounds = []
+        for keyword, exclusive_keyword, fails in (
+                ("minimum", "exclusiveMinimum", lambda v, b, excl: v < b or (excl and v == b)),
+                ("maximum", "exclusiveMaximum", lambda v, b, excl: v > b or (excl and v == b))):
+            bound, exclusive = schema.get(keyword), schema.get(exclusive_keyword)
+            if isinstance(exclusive, (int, float)) and not isinstance(exclusive, bool):
+                # OpenAPI 3.1 / JSON Schema 2019+: the exclusive bound is a number
+                bounds.append((exclusive_keyword, exclusive, True, fails))
+            if bound is not None:
+                bounds.append((keyword, bound, exclusive is True, fails))
+        multiple_of = schema.get("multipleOf")
+        if not bounds and multiple_of is None:
+            return []
+
+        def check_number(value, path, errors):
+            if not _TYPE_CHECKS["number"](value):
+                return
+            for keyword, bound, exclusive, fails in bounds:
+                if fails(value, bound, exclusive):
+                    errors.append(_diff(path, keyword, bound, value))
+            if multiple_of and not _is_multiple(value, multiple_of):
+                errors.append(_diff(path, "multipleOf", multiple_of, value))
+        return [check_number]
+
+    def _compile_object(self, schema):
+        properties = {name: self._compile(sub) for name, sub in (schema.get("properties") or {}).items()}
+        required = list(schema.get("required") or [])
+        additional = schema.get("additionalProperties", True)
+        additional_check = self._compile(additional) if isinstance(additional, dict) else None
+        min_props, max_props = schema.get("minProperties"), schema.get("maxProperties")
+        if not (properties or required or additional is not True or min_props is not None or max_props is not None):
+            return []
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(_diff(f"{path}.{name}", "required", "present", "missing"))
+            for name, item in value.items():
+                child = f"{path}.{name}"
+                if name in properties:
+                    properties[name](item, child, errors)
+                elif additional is False:
+                    errors.append(_diff(child, "additionalProperties", "absent", _type_name(item)))
+                elif additional_check is not None:
+                    additional_check(item, child, errors)
+            if min_props is not None and len(value) < min_props:
+                errors.append(_diff(path, "minProperties", min_props, len(value)))
+            if max_props is not None and len(value) > max_props:
+                errors.append(_diff(path, "maxProperties", max_props, len(value)))
+        return [check_object]
+
+    def _compile_array(self, schema):
+        items = schema.get("items")
+        item_check = self._compile(items) if isinstance(items, dict) else None
+        min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+        unique = schema.get("uniqueItems")
+        if item_check is None and min_items is None and max_items is None and not unique:
+            return []
+
+        def check_array(value, path, errors):
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append(_diff(path, "minItems", min_items, len(value)))
+            if max_items is not None and len(value) > max_items:
+                errors.append(_diff(path, "maxItems", max_items, len(value)))
+            if unique and len({repr(v) for v in value}) != len(value):
+                errors.append(_diff(path, "uniqueItems", True, False))
+            if item_check is not None:
+                for i, item in enumerate(value):
+                    item_check(item, f"{path}[{i}]", errors)
+        return [check_array]
+
+    def _compile_combinators(self, schema):
+        checks = []
+        for sub in schema.get("allOf") or []:
+            checks.append(self._compile(sub))
+
+        def branches_passing(branches, value, path):
+            return sum(1 for branch in branches if not _run(branch, value, path))
+
+        if schema.get("anyOf"):
+            any_of = [self._compile(sub) for sub in schema["anyOf"]]
+
+            def check_any(value, path, errors):
+                if not branches_passing(any_of, value, path):
+                    errors.append(_diff(path, "anyOf", f"one of {len(any_of)} schemas", _type_name(value)))
+            checks.append(check_any)
+        if schema.get("oneOf"):
+            one_of = [self._compile(sub) for sub in schema["oneOf"]]
+
+            def check_one(value, path, errors):
+                passing = branches_passing(one_of, value, path)
+                if passing != 1:
+                    errors.append(_diff(path, "oneOf", "exactly 1 matching schema", f"{passing} matching"))
+            checks.append(check_one)
+        if isinstance(schema.get("not"), dict):
+            negated = self._compile(schema["not"])
+
+            def check_not(value, path, errors):
+                if not _run(negated, value, path):
+                    errors.append(_diff(path, "not", "schema must not match", _type_name(value)))
+            checks.append(check_not)
+        return checks
+
+
+def _run(check, value, path) -> list:
+    errors = []
+    check(value, path, errors)
+    return errors
+
+
+class ResponseValidator:
+    """
+    Validates response bodies against a SpecIndex's response schemas.
+
+    Validators are compiled on first use per (method, path template, status)
+    and reused for the rest of the run; operations without a response
+    schema are cached as "nothing to check" too. Only statuses the
+    operation documents explicitly (or by 'NXX' range) are checked.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.compiler = SchemaCompiler(ref_resolver=lambda pointer: index.resolve_schema(index.ref(pointer) or {}))
+        self._validators = {}
+        self._lock = threading.Lock()
+        self.validated = 0
+        self.violations = 0
+
+    def validator_for(self, operation: dict, status):
+        key = (operation["method"], operation["template"], str(status))
+        validator = self._validators.get(key)
+        if validator is None and key not in self._validators:
+            with self._lock:
+                if key not in self._validators:
+                    # A 'default' response describes errors in general, not whatever the
+                    # framework sends for this status (its own 404 page, an empty body)
+                    schema = self.index.response_schema(operation, status, use_default=False)
+                    self._validators[key] = self.compiler.compile(schema) if schema else None
+                validator = self._validators[key]
+        return validator
+
+    def validate(self, method: str, request_path: str, status, body_text: str):
+        """
+        Returns None when the spec has nothing to say about this response,
+        otherwise the list of structured diffs (empty means it conforms).
+        """
+        operation = self.index.match(method, request_path.split("?", 1)[0])
+        if operation is None:
+            return None
+        validator = self.validator_for(operation, status)
+        if validator is None:
+            return None
+        try:
+            body = json.loads(body_text) if body_text else None
+        except ValueError:
+            diffs = [_diff("$", "json", "JSON body", "unparseable response")]
+        else:
+            diffs = validator(body)
+        with self._lock:
+            self.validated += 1
+            self.violations += bool(diffs)
+        for diff in diffs:
+            diff.update(operation=f"{operation['method']} {operation['path']}", status=int(status))
+        return diffs
+
+    def stats(self) -> dict:
+        return {"validated": self.validated, "violations": self.violations,
+                "compiled_validators": sum(1 for v in self._validators.values() if v is not None)}
@@ -0,0 +1,228 @@
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") != "0"
+# Also emit OpenTelemetry spans when the SDK is installed and configured
+OTEL_ENABLED = os.getenv("TRACING_OTEL", "0") == "1"
+METRIC_PREFIX = "divergence"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_current = contextvars.ContextVar("divergence_span", default=None)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        # label key -> [per-bucket counts..., +Inf count, sum]
+        self.values = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        state = self.values.get(key)
+        if state is None:
+            state = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, state in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), state[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Process-local metric store rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text or name)
+            return self._metrics[name]
+
+    def histogram(self, name: str, help_text: str = "", buckets=DURATION_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text or name, buckets)
+            return self._metrics[name]
+
+    def inc(self, name: str, amount=1, help_text: str = "", **labels):
+        metric = self.counter(name, help_text)
+        with self._lock:
+            metric.inc(amount, **labels)
+
+    def observe(self, name: str, value: float, help_text: str = "", **labels):
+        metric = self.histogram(name, help_text)
+        with self._lock:
+            metric.observe(value, **labels)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            for name in sorted(self._metrics):
+                lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _otel_tracer():
+    if not OTEL_ENABLED:
+        return None
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        print("⚠️ TRACING_OTEL=1 but opentelemetry is not installed; spans stay in-process")
+        return None
+    return trace.get_tracer("api-divergence")
+
+
+_tracer = _otel_tracer()
+
+
+class Span:
+    """
+    One timed pipeline stage. Numeric values added with add() become
+    per-stage Prometheus counters when the span ends; set() attaches
+    plain attributes that only go to OpenTelemetry.
+    """
+
+    def __init__(self, name: str, parent=None, **attributes):
+        self.name = name
+        self.parent = parent
+        self.attributes = dict(attributes)
+        self.counts = {}
+        self.status = "ok"
+        self.duration = None
+        self._lock = threading.Lock()
+
+    def add(self, key: str, amount=1):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + amount
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+
+class _NoopSpan:
+    name = None
+
+    def add(self, key, amount=1):
+        pass
+
+    def set(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+@contextmanager
+def _noop():
+    yield NOOP_SPAN
+
+
+@contextmanager
+def _traced(name, attributes):
+    span = Span(name, _current.get(), **attributes)
+    token = _current.set(span)
+    otel = _tracer.start_as_current_span(name) if _tracer else None
+    otel_span = otel.__enter__() if otel else None
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException:
+        span.status = "error"
+        raise
+    finally:
+        span.duration = time.perf_counter() - started
+        _current.reset(token)
+        registry.observe(f"{METRIC_PREFIX}_stage_duration_seconds", span.duration,
+                         "Wall-clock duration of pipeline stages", stage=name, status=span.status)
+        for key, value in span.counts.items():
+            registry.inc(f"{METRIC_PREFIX}_stage_{key}_total", value,
+                         f"Sum of {key.replace('_', ' ')} recorded by pipeline stages", stage=name)
+        if otel_span is not None:
+            for key, value in {**span.attributes, **span.counts}.items():
+                otel_span.set_attribute(key, value)
+            otel.__exit__(None, None, None)
+
+
+def span(name: str, **attributes):
+    """Context manager timing one stage; yields a Span (a no-op when tracing is disabled)."""
+    if not TRACING_ENABLED:
+        return _noop()
+    return _traced(name, attributes)
+
+
+def current_span():
+    return _current.get() or NOOP_SPAN
+
+
+def record(**counts):
+    """Add counts (files=3, prompt_tokens=812, ...) to whichever stage is running."""
+    current = _current.get()
+    if current is not None:
+        for key, amount in counts.items():
+            current.add(key, amount)
+
+
+def propagate(fn):
+    """Wrap fn so it runs inside the caller's span when handed to a worker thread."""
+    if not TRACING_ENABLED:
+        return fn
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,49 @@
+import json
+import os
+import signal
+
+from src.services import batch_compare
+
+
+def _compare_or_die(entry, log_dir):
+    if entry["name"] == "crash":
+        os.kill(os.getpid(), signal.SIGKILL)
+    return dict(entry, status="completed", duration_s=0.0)
+
+
+def _entries(names):
+    return [{"name": name, "repo": f"https://example.com/{name}.git", "spec": "spec.yaml",
+             "base_url": "http://127.0.0.1:8000", "commit": None} for name in names]
+
+
+def _results(path):
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    return {r["name"]: r for r in lines if r["type"] == "result"}, lines[-1]
+
+
+def test_crashed_worker_only_fails_its_own_entry(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_compare, "compare_entry", _compare_or_die)
+    names = ["a", "b", "crash", "c", "d", "e"]
+    output = str(tmp_path / "batch.jsonl")
+
+    summary = batch_compare.run_batch(_entries(names), output, workers=2)
+
+    results, last = _results(output)
+    assert set(results) == set(names)
+    assert results["crash"]["status"] == "failed"
+    assert results["crash"]["error"] == "worker crashed"
+    assert all(results[name]["status"] == "completed" for name in names if name != "crash")
+    assert summary == last
+    assert (summary["completed"], summary["failed"]) == (5, 1)
+
+
+def test_batch_without_crashes_runs_every_entry_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_compare, "compare_entry", _compare_or_die)
+    output = str(tmp_path / "batch.jsonl")
+
+    summary = batch_compare.run_batch(_entries(["a", "b", "c"]), output, workers=2)
+
+    results, _ = _results(output)
+    assert sorted(results) == ["a", "b", "c"]
+    assert (summary["completed"], summary["failed"]) == (3, 0)
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from src.services.job_queue import JobQueue
+
+
+class BlockingRunner:
+    """Runs comparisons only once released, recording what it was asked to do."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = []
+
+    def __call__(self, **kwargs):
+        self.calls.append(kwargs)
+        self.started.set()
+        assert self.release.wait(5)
+        if kwargs["repo_url"] == "broken":
+            raise RuntimeError("clone failed")
+        return {"repo": kwargs["repo_url"]}
+
+
+@pytest.fixture
+def runner():
+    runner = BlockingRunner()
+    yield runner
+    runner.release.set()
+
+
+def test_identical_in_flight_jobs_share_one_run(runner):
+    queue = JobQueue(workers=1, runner=runner)
+    done = []
+    first = queue.submit("repo", "spec", commit="abc", on_complete=lambda job: done.append(("first", job["id"])))
+    assert runner.started.wait(5)
+    second = queue.submit("repo", "spec", commit="abc", on_complete=lambda job: done.append(("second", job["id"])))
+    other = queue.submit("repo", "spec", commit="def")
+
+    assert (first["deduplicated"], second["deduplicated"], other["deduplicated"]) == (False, True, False)
+    assert second["id"] == first["id"] != other["id"]
+
+    runner.release.set()
+    queue.shutdown()
+    assert [call["commit"] for call in runner.calls] == ["abc", "def"]
+    assert done == [("first", first["id"]), ("second", first["id"])]
+    assert queue.get(first["id"])["status"] == "completed"
+    assert queue.get(first["id"])["result"] == {"repo": "repo"}
+
+
+def test_finished_job_is_not_reused(runner):
+    runner.release.set()
+    queue = JobQueue(workers=1, runner=runner)
+    finished = threading.Event()
+    first = queue.submit("repo", "spec", on_complete=lambda job: finished.set())
+    assert finished.wait(5)
+    second = queue.submit("repo", "spec")
+    queue.shutdown()
+    assert not second["deduplicated"] and second["id"] != first["id"]
+    assert len(runner.calls) == 2
+
+
+def test_cancel_only_affects_queued_jobs(runner):
+    queue = JobQueue(workers=1, runner=runner)
+    called = []
+    running = queue.submit("a", "spec")
+    assert runner.started.wait(5)
+    queued = queue.submit("b", "spec", on_complete=called.append)
+
+    assert not queue.cancel(running["id"])
+    assert queue.cancel(queued["id"])
+    assert not queue.cancel(queued["id"])
+    assert not queue.cancel("unknown")
+    # The cancelled job no longer deduplicates new submits
+    again = queue.submit("b", "spec")
+    assert not again["deduplicated"] and again["id"] != queued["id"]
+
+    runner.release.set()
+    queue.shutdown()
+    assert queue.get(queued["id"])["status"] == "cancelled"
+    assert called == []
+    assert [call["repo_url"] for call in runner.calls] == ["a", "b"]
+
+
+def test_failed_job_records_the_error(runner):
+    runner.release.set()
+    queue = JobQueue(workers=1, runner=runner)
+    outcomes = []
+    job = queue.submit("broken", "spec", on_complete=outcomes.append)
+    queue.shutdown()
+    stored = queue.get(job["id"])
+    assert (stored["status"], stored["error"]) == ("failed", "clone failed")
+    assert [o["status"] for o in outcomes] == ["failed"]
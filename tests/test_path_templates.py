@@ -0,0 +1,62 @@
+import pytest
+
+from src.utils.path_templates import PathTemplateTrie, normalize_path
+
+
+@pytest.mark.parametrize("path, template, names", [
+    ("/users/{user_id}", "/users/{}", ["user_id"]),
+    ("/users/{user_id:int}", "/users/{}", ["user_id"]),
+    ("/users/:id/posts/:post?", "/users/{}/posts/{}", ["id", "post"]),
+    ("/users/<int:user_id>", "/users/{}", ["user_id"]),
+    ("/users/<slug>", "/users/{}", ["slug"]),
+    ("/static/*filepath", "/static/{}", ["filepath"]),
+    ("users//items/", "/users/items", []),
+    ("/search?q=1", "/search", []),
+    ("", "/", []),
+    (None, "/", []),
+])
+def test_normalize_path(path, template, names):
+    assert normalize_path(path) == (template, names)
+
+
+def test_frameworks_normalize_to_the_same_template():
+    spellings = ["/orders/{order_id}/items", "/orders/:order_id/items", "/orders/<int:order_id>/items"]
+    assert {normalize_path(p)[0] for p in spellings} == {"/orders/{}/items"}
+
+
+def _trie(*templates):
+    trie = PathTemplateTrie()
+    for template in templates:
+        trie.insert(template, template)
+    return trie
+
+
+def test_get_is_exact():
+    trie = _trie("/users/{}", "/users/me")
+    assert trie.get("/users/{}") == "/users/{}"
+    assert trie.get("/users/me") == "/users/me"
+    assert trie.get("/users/42") is None
+    assert trie.get("/users") is None
+
+
+def test_match_prefers_literals_and_captures_params():
+    trie = _trie("/users/{}", "/users/me", "/users/{}/posts/{}")
+    assert trie.match("/users/me") == ("/users/me", [])
+    assert trie.match("/users/42") == ("/users/{}", ["42"])
+    assert trie.match("/users/42/posts/7?full=1") == ("/users/{}/posts/{}", ["42", "7"])
+
+
+def test_match_backtracks_from_a_literal_dead_end():
+    trie = _trie("/users/me/settings", "/users/{}/posts")
+    assert trie.match("/users/me/posts") == ("/users/{}/posts", ["me"])
+
+
+def test_match_misses():
+    trie = _trie("/users/{}")
+    assert trie.match("/users") == (None, [])
+    assert trie.match("/users/1/extra") == (None, [])
+
+
+def test_len_counts_distinct_templates():
+    trie = _trie("/a", "/a/{}", "/a")
+    assert len(trie) == 2
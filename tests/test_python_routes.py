@@ -0,0 +1,138 @@
+import textwrap
+
+from src.loader.python_routes import extract_python_routes
+
+
+def _write(root, files):
+    for rel, source in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(textwrap.dedent(source))
+
+
+def _extract(root, files):
+    _write(root, files)
+    routes, unclassified = extract_python_routes(str(root))
+    return sorted((r["method"], r["path"]) for r in routes), unclassified
+
+
+USERS_ROUTER = """
+    from fastapi import APIRouter
+
+    router = APIRouter(prefix="/users")
+
+    @router.get("/{user_id}")
+    def get_user(user_id: int):
+        pass
+"""
+
+
+def test_router_prefix_and_include_prefix(tmp_path):
+    routes, unclassified = _extract(tmp_path, {
+        "app/__init__.py": "",
+        "app/users.py": USERS_ROUTER,
+        "app/main.py": """
+            from fastapi import FastAPI
+            from app import users
+
+            app = FastAPI()
+            app.include_router(users.router, prefix="/api")
+
+            @app.get("/health")
+            def health():
+                pass
+        """,
+    })
+    assert routes == [("GET", "/api/users/{user_id}"), ("GET", "/health")]
+    assert unclassified == []
+
+
+def test_relative_import_and_nested_routers(tmp_path):
+    routes, _ = _extract(tmp_path, {
+        "app/__init__.py": "",
+        "app/users.py": USERS_ROUTER,
+        "app/api.py": """
+            from fastapi import APIRouter
+            from .users import router as users_router
+
+            api = APIRouter(prefix="/v1")
+            api.include_router(users_router)
+        """,
+        "app/main.py": """
+            from fastapi import FastAPI
+            from .api import api
+
+            app = FastAPI()
+            app.include_router(api, prefix="/api")
+        """,
+    })
+    assert routes == [("GET", "/api/v1/users/{user_id}")]
+
+
+def test_src_layout_resolves_imports_by_module_suffix(tmp_path):
+    routes, unclassified = _extract(tmp_path, {
+        "src/app/__init__.py": "",
+        "src/app/routers/__init__.py": "",
+        "src/app/routers/users.py": USERS_ROUTER,
+        "src/app/main.py": """
+            from fastapi import FastAPI
+            from app.routers import users
+
+            app = FastAPI()
+            app.include_router(users.router, prefix="/api")
+        """,
+    })
+    assert routes == [("GET", "/api/users/{user_id}")]
+    assert unclassified == []
+
+
+def test_unresolved_include_marks_the_file_unclassified(tmp_path):
+    _, unclassified = _extract(tmp_path, {
+        "main.py": """
+            from fastapi import FastAPI
+            import plugins
+
+            app = FastAPI()
+            app.include_router(plugins.router, prefix="/plugins")
+        """,
+    })
+    assert unclassified == ["main.py"]
+
+
+def test_flask_blueprint_url_prefix_override(tmp_path):
+    routes, _ = _extract(tmp_path, {
+        "views.py": """
+            from flask import Blueprint
+
+            bp = Blueprint("items", __name__, url_prefix="/items")
+
+            @bp.route("/<int:item_id>", methods=["GET", "DELETE"])
+            def item(item_id):
+                pass
+        """,
+        "app.py": """
+            from flask import Flask
+            from views import bp
+
+            app = Flask(__name__)
+            app.register_blueprint(bp, url_prefix="/v2/items")
+        """,
+    })
+    assert routes == [("DELETE", "/v2/items/<int:item_id>"), ("GET", "/v2/items/<int:item_id>")]
+
+
+def test_dynamic_path_goes_to_the_llm(tmp_path):
+    _, unclassified = _extract(tmp_path, {
+        "dynamic.py": """
+            from fastapi import APIRouter
+
+            router = APIRouter()
+            PATH = "/x"
+
+            @router.get(PATH)
+            def x():
+                pass
+        """,
+        "broken.py": "def (:\n",
+    })
+    assert unclassified == ["broken.py", "dynamic.py"]
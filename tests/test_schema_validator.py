@@ -0,0 +1,86 @@
+import pytest
+
+from src.utils.schema_validator import SchemaCompiler
+
+
+def _rules(schema, instance, ref_resolver=None):
+    return [(d["path"], d["rule"]) for d in SchemaCompiler(ref_resolver).compile(schema)(instance)]
+
+
+@pytest.mark.parametrize("value, multiple_of, valid", [
+    (0.3, 0.1, True),
+    (0.7, 0.1, True),
+    (1.1, 0.01, True),
+    (10, 2.5, True),
+    (9, 3, True),
+    (0.35, 0.1, False),
+    (7, 3, False),
+])
+def test_multiple_of(value, multiple_of, valid):
+    rules = _rules({"type": "number", "multipleOf": multiple_of}, value)
+    assert rules == ([] if valid else [("$", "multipleOf")])
+
+
+def test_bounds_including_numeric_exclusive_bounds():
+    schema = {"type": "integer", "minimum": 1, "exclusiveMaximum": 10}
+    assert _rules(schema, 1) == []
+    assert _rules(schema, 0) == [("$", "minimum")]
+    assert _rules(schema, 10) == [("$", "exclusiveMaximum")]
+
+
+def test_diff_paths_are_rooted_at_dollar():
+    schema = {"type": "object", "required": ["id"],
+              "properties": {"friends": {"type": "array", "items": {
+                  "type": "object", "properties": {"name": {"type": "string"}}}}}}
+    assert _rules(schema, {"friends": [{"name": "a"}, {"name": 1}]}) == [
+        ("$.id", "required"), ("$.friends[1].name", "type")]
+    assert _rules(schema, []) == [("$", "type")]
+
+
+def test_recursive_ref_terminates_and_validates_every_level():
+    node = {"type": "object", "required": ["value"],
+            "properties": {"value": {"type": "integer"},
+                           "children": {"type": "array", "items": {"$ref": "#/components/schemas/Node"}}}}
+    resolver = {"#/components/schemas/Node": node}.get
+    tree = {"value": 1, "children": [{"value": 2, "children": [{"value": "three"}, {}]}]}
+    assert _rules({"$ref": "#/components/schemas/Node"}, tree, resolver) == [
+        ("$.children[0].children[0].value", "type"), ("$.children[0].children[1].value", "required")]
+
+
+def test_unresolvable_ref_accepts_anything():
+    assert _rules({"$ref": "#/components/schemas/Missing"}, {"anything": True}) == []
+
+
+def test_nullable_and_type_failure_short_circuit():
+    schema = {"type": "string", "nullable": True, "minLength": 2}
+    assert _rules(schema, None) == []
+    assert _rules(schema, 5) == [("$", "type")]
+    assert _rules(schema, "a") == [("$", "minLength")]
+
+
+def test_combinators():
+    one_of = {"oneOf": [{"type": "integer"}, {"type": "number"}]}
+    assert _rules(one_of, 1.5) == []
+    assert _rules(one_of, 1) == [("$", "oneOf")]
+    assert _rules({"anyOf": [{"type": "string"}, {"type": "null"}]}, 1) == [("$", "anyOf")]
+    assert _rules({"not": {"type": "string"}}, "x") == [("$", "not")]
+
+
+def test_response_validator_checks_only_documented_statuses():
+    from src.loader.spec_index import SpecIndex
+    from src.utils.schema_validator import ResponseValidator
+
+    def body(schema):
+        return {"description": "", "content": {"application/json": {"schema": schema}}}
+
+    spec = {"openapi": "3.0.0", "paths": {"/users/{id}": {"get": {"responses": {
+        "200": body({"type": "object", "required": ["id"]}),
+        "4XX": body({"type": "object", "required": ["error"]}),
+        "default": body({"type": "object", "required": ["code"]})}}}}}
+    validator = ResponseValidator(SpecIndex(spec))
+
+    assert validator.validate("GET", "/users/1", 200, '{"id": 1}') == []
+    assert [d["path"] for d in validator.validate("GET", "/users/1", 200, "{}")] == ["$.id"]
+    assert [d["path"] for d in validator.validate("GET", "/users/1", 404, "{}")] == ["$.error"]
+    assert validator.validate("GET", "/users/1", 500, "Internal Server Error") is None
+    assert validator.validate("GET", "/nowhere", 200, "{}") is None
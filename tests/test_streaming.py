@@ -0,0 +1,71 @@
+from src.ai.streaming import ArrayStream, JSONArrayParser, is_complete_array
+
+
+def _feed(chunks):
+    parser = JSONArrayParser()
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    parser.close()
+    return items, parser
+
+
+def _chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+TEXT = '```json\n[{"path": "/a", "tags": ["x]", "y,"]}, {"path": "/b\\"q"}, 3, "s", [1, [2]]]\n```'
+EXPECTED = [{"path": "/a", "tags": ["x]", "y,"]}, {"path": '/b"q'}, 3, "s", [1, [2]]]
+
+
+def test_items_are_the_same_for_any_chunking():
+    for size in (1, 2, 7, len(TEXT)):
+        items, parser = _feed(_chunked(TEXT, size))
+        assert items == EXPECTED
+        assert parser.started and parser.finished
+        assert (parser.malformed, parser.truncated) == (0, 0)
+
+
+def test_items_arrive_before_the_array_closes():
+    parser = JSONArrayParser()
+    assert parser.feed('[{"a": 1}, {"b"') == [{"a": 1}]
+    assert parser.feed(': 2}') == [{"b": 2}]
+
+
+def test_truncated_tail_is_counted_and_dropped():
+    items, parser = _feed(['[{"a": 1}, {"b": 2}, {"c": '])
+    assert items == [{"a": 1}, {"b": 2}]
+    assert not parser.finished
+    assert (parser.malformed, parser.truncated) == (0, 1)
+
+
+def test_malformed_items_are_skipped():
+    items, parser = _feed(["[{\"a\": 1}, {b: 2}, {'c': 3}, {\"d\": 4}]"])
+    assert items == [{"a": 1}, {"d": 4}]
+    assert (parser.malformed, parser.truncated) == (2, 0)
+
+
+def test_text_after_the_array_is_ignored():
+    items, parser = _feed(['[1, 2] and then [3]'])
+    assert items == [1, 2]
+    assert parser.finished
+
+
+def test_no_array_at_all():
+    items, parser = _feed(["I cannot help with that."])
+    assert items == []
+    assert not parser.started
+
+
+def test_array_stream_keeps_the_full_text():
+    stream = ArrayStream(iter(_chunked(TEXT, 5)))
+    assert list(stream) == EXPECTED
+    assert stream.text == TEXT
+
+
+def test_is_complete_array():
+    assert is_complete_array(TEXT)
+    assert is_complete_array("[]")
+    assert not is_complete_array('[{"a": 1}, {"b"')
+    assert not is_complete_array('[{"a": 1}, {b}]')
+    assert not is_complete_array("no JSON here")